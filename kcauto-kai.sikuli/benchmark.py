@@ -0,0 +1,410 @@
+"""Decision-latency benchmark suite for kcauto-kai.
+
+Replays recorded sessions (see replay.py) through the real module code and
+reports, per scenario, the latency of every exists/wait/waitVanish/find/
+findAll/text call and frame search, searches per second, and total wall and
+virtual time. Results are written to a JSON file so that runs can be compared
+across changes to kcauto-kai's decision logic.
+
+The fake backend answers searches from the boxes recorded in the session
+manifests instead of matching templates against pixels, so the latencies are
+those of kcauto-kai's own code (waits, caches, hints, gating, and search
+counts) and not of a matching engine; the benchmark cannot compare vision
+backends.
+
+A suite is a JSON file listing the scenarios to run; session and config paths
+are relative to the suite file:
+
+    {
+        "scenarios": [
+            {
+                "name": "nav_chain",
+                "scenario": "nav",
+                "session": "sessions/nav.json",
+                "config": "sessions/config.ini",
+                "destinations": ["resupply", "home", "quests", "home"],
+                "repeat": 5
+            },
+            {
+                "name": "sortie_1-1",
+                "scenario": "sortie",
+                "session": "sessions/sortie_1-1.json",
+                "config": "sessions/config_combat.ini"
+            }
+        ]
+    }
+
+Available scenarios:
+    nav: Nav.goto through each of the destinations
+    sortie: CombatModule.combat_logic_wrapper (a full sortie)
+    ship_switcher: ShipSwitcher.ship_switch_logic (ship list page sweeps)
+    quests: QuestModule.quests_logic_wrapper (quest page scan)
+
+The --maps mode instead micro-benchmarks MapData.find_node_by_pos on every
+map cataloged by MapCatalog (including those in event subfolders), against a
+linear scan over all nodes, over a grid of positions covering the game screen.
+
+Usage:
+    python benchmark.py <suite.json> [<results.json>] [<baseline.json>]
+    python benchmark.py --maps [<results.json>]
+"""
+
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+import replay
+
+# Region and Finder methods timed by the benchmark, keyed by reported name
+TIMED_METHODS = (
+    (replay.Region, 'exists', 'exists'),
+    (replay.Region, 'wait', 'wait'),
+    (replay.Region, 'waitVanish', 'waitVanish'),
+    (replay.Region, 'find', 'find'),
+    (replay.Region, 'findAll', 'findAll'),
+    (replay.Region, 'text', 'text'),
+    (replay.Finder, 'find', 'frame_find'),
+    (replay.Finder, 'findAll', 'frame_findAll'),
+)
+
+
+class Recorder(object):
+    """Collects the wall and virtual latency of every timed call. Nested calls
+    (eg. find calling wait) are only recorded at the outermost level.
+
+    Attributes:
+        calls (dict): list of (wall ms, virtual ms) per call, keyed by
+            reported method name
+        depth (int): current nesting depth of timed calls
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.depth = 0
+
+    def wrap(self, cls, method, name):
+        """Method for replacing a method with a timed version of itself.
+
+        Args:
+            cls (class): class the method belongs to
+            method (str): name of the method
+            name (str): name to report the method's calls under
+        """
+        original = getattr(cls, method)
+        recorder = self
+
+        def timed(*args, **kwargs):
+            recorder.depth += 1
+            wall_start = time.time()
+            virtual_start = replay.Region.session.clock
+            try:
+                return original(*args, **kwargs)
+            finally:
+                recorder.depth -= 1
+                if recorder.depth == 0:
+                    recorder.calls.setdefault(name, []).append((
+                        (time.time() - wall_start) * 1000,
+                        (replay.Region.session.clock - virtual_start) * 1000))
+
+        setattr(cls, method, timed)
+
+    def reset(self):
+        self.calls = {}
+        self.depth = 0
+
+    def summary(self):
+        """Method for summarizing the recorded calls.
+
+        Returns:
+            dict: count and latency percentiles (ms) per method
+        """
+        summary = {}
+        for name, calls in self.calls.items():
+            wall = sorted(call[0] for call in calls)
+            virtual = sorted(call[1] for call in calls)
+            summary[name] = {
+                'count': len(calls),
+                'wall_ms': _percentiles(wall),
+                'virtual_ms': _percentiles(virtual)}
+        return summary
+
+
+def _percentiles(values):
+    """Function for summarizing a sorted list of latencies.
+
+    Args:
+        values (list): sorted list of latencies
+
+    Returns:
+        dict: total, mean, p50, p95, and max of the latencies
+    """
+    return {
+        'total': round(sum(values), 3),
+        'mean': round(sum(values) / len(values), 3),
+        'p50': round(values[len(values) // 2], 3),
+        'p95': round(values[min(len(values) - 1, len(values) * 95 // 100)], 3),
+        'max': round(values[-1], 3)}
+
+
+def _reset_caches(work_path):
+    """Function for resetting the class-level caches and the learned state
+    persisted to the working directory so that every scenario run starts
+    cold.
+
+    Args:
+        work_path (str): path of the benchmark's scratch working directory;
+            emptied of the files persisted by the previous run
+    """
+    from assetregistry import AssetRegistry
+    from digitocr import DigitOCR
+    from nav import Nav
+    from scheduler import Scheduler
+    from statestore import StateStore
+    from util import Util
+    for entry in os.listdir(work_path):
+        os.remove(os.path.join(work_path, entry))
+    Util.release_frame()
+    Util.kc_geometry = None
+    Util.reset_location_cache()
+    Util.location_cache_stats = {}
+    Util.gate_cache = {}
+    Util.searches_saved = 0
+    Util.pyramid_frames = {}
+    Util.pyramid_patterns = {}
+    AssetRegistry.reset()
+    DigitOCR.reset()
+    Nav.screen_fingerprints = {}
+    Scheduler.reset()
+    StateStore.reset()
+
+
+def _run_scenario(spec, kcauto_kai):
+    """Function for running a single scenario against the active session.
+
+    Args:
+        spec (dict): scenario specification from the suite
+        kcauto_kai (KCAutoKai): KCAutoKai instance with modules initialized
+    """
+    from nav import Nav
+    scenario = spec['scenario']
+    if scenario == 'nav':
+        for destination in spec['destinations']:
+            Nav.goto(kcauto_kai.regions, destination)
+    elif scenario == 'sortie':
+        kcauto_kai.modules['combat'].goto_combat()
+        kcauto_kai.modules['combat'].combat_logic_wrapper()
+    elif scenario == 'ship_switcher':
+        kcauto_kai.modules['ship_switcher'].goto_fleetcomp()
+        kcauto_kai.modules['ship_switcher'].ship_switch_logic()
+    elif scenario == 'quests':
+        kcauto_kai.modules['quest'].goto_quests()
+        kcauto_kai.modules['quest'].quests_logic_wrapper()
+    else:
+        raise replay.ReplayError("Unknown scenario '{}'".format(scenario))
+
+
+def run_suite(suite_path, recorder):
+    """Function for running every scenario in a suite.
+
+    Args:
+        suite_path (str): path of the suite file
+        recorder (Recorder): Recorder wrapping the timed methods
+
+    Returns:
+        list: result dict of each scenario
+    """
+    with open(suite_path) as suite_file:
+        suite = json.load(suite_file)
+    base_path = os.path.dirname(os.path.abspath(suite_path))
+    results = []
+    # learned state (glyphs, battle durations, timelines) is persisted to the
+    # working directory; run in a scratch one so that runs neither share it
+    # nor overwrite that of kcauto-kai
+    cwd = os.getcwd()
+    work_path = tempfile.mkdtemp()
+    os.chdir(work_path)
+    try:
+        for spec in suite['scenarios']:
+            runs = []
+            for run in range(spec.get('repeat', 1)):
+                session = replay.ReplaySession(
+                    os.path.join(base_path, spec['session']))
+                replay.install(session)
+                _reset_caches(work_path)
+                # imported after install() so that the fake backend is used
+                from config import Config
+                from main import KCAutoKai
+                config = Config(os.path.join(base_path, spec['config']))
+                kcauto_kai = KCAutoKai(config)
+                kcauto_kai.refresh_config()
+
+                recorder.reset()
+                outcome = 'completed'
+                wall_start = time.time()
+                virtual_start = session.clock
+                searches_start = session.searches
+                try:
+                    _run_scenario(spec, kcauto_kai)
+                except replay.ReplayFinished as e:
+                    outcome = str(e)
+                except replay.FindFailed as e:
+                    outcome = 'FindFailed: {}'.format(e)
+                wall_seconds = time.time() - wall_start
+                searches = session.searches - searches_start
+                runs.append({
+                    'outcome': outcome,
+                    'wall_seconds': round(wall_seconds, 4),
+                    'virtual_seconds': round(session.clock - virtual_start, 3),
+                    'searches': searches,
+                    'searches_per_second': (
+                        round(searches / wall_seconds, 1) if wall_seconds
+                        else None),
+                    'clicks': len(session.clicks),
+                    'calls': recorder.summary()})
+            results.append({'name': spec['name'], 'runs': runs})
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_path)
+    return results
+
+
+def compare(results, baseline):
+    """Function for printing the change in mean wall time per scenario
+    against a baseline results file.
+
+    Args:
+        results (dict): results of this run
+        baseline (dict): results of the baseline run
+    """
+    baseline_scenarios = dict(
+        (scenario['name'], scenario) for scenario in baseline['scenarios'])
+    for scenario in results['scenarios']:
+        if scenario['name'] not in baseline_scenarios:
+            continue
+        current = _mean_wall(scenario)
+        previous = _mean_wall(baseline_scenarios[scenario['name']])
+        change = (current - previous) / previous * 100 if previous else 0
+        print('{}: {:.4f}s -> {:.4f}s ({:+.1f}%)'.format(
+            scenario['name'], previous, current, change))
+
+
+def _mean_wall(scenario):
+    runs = scenario['runs']
+    return sum(run['wall_seconds'] for run in runs) / len(runs)
+
+
+def _linear_find_node_by_pos(map_data, x, y):
+    """Function replicating an unindexed lookup over every node of a map.
+    """
+    for node in map_data.nodes:
+        if map_data.nodes[node].coord_match(x, y):
+            return map_data.nodes[node]
+    return None
+
+
+def run_map_benchmark(step=4):
+    """Function for timing indexed against linear node lookups on every map,
+    over a grid of positions covering the game screen. Also verifies that both
+    lookups return the same node for every position.
+
+    Args:
+        step (int, optional): pixel spacing of the position grid
+
+    Returns:
+        list: result dict of each map
+    """
+    replay.install(replay.ReplaySession(
+        {'start': 'idle', 'states': {'idle': {}}}))
+    from mapData import MapCatalog, MapData
+    positions = [
+        (x, y) for x in range(0, 800, step) for y in range(0, 480, step)]
+    results = []
+    for location in MapCatalog.locations():
+        error = MapCatalog.validate(location)
+        if error:
+            results.append({'map': location, 'error': error})
+            continue
+        load_start = time.time()
+        map_data = MapData(location, {'game': None}, None)
+        load_ms = (time.time() - load_start) * 1000
+
+        linear_start = time.time()
+        linear = [
+            _linear_find_node_by_pos(map_data, x, y) for x, y in positions]
+        linear_seconds = time.time() - linear_start
+        indexed_start = time.time()
+        indexed = [map_data.find_node_by_pos(x, y) for x, y in positions]
+        indexed_seconds = time.time() - indexed_start
+        if linear != indexed:
+            raise replay.ReplayError(
+                "Indexed lookup mismatch on map {}".format(location))
+        results.append({
+            'map': location,
+            'nodes': len(map_data.nodes),
+            'load_ms': round(load_ms, 3),
+            'linear_us': round(linear_seconds / len(positions) * 1e6, 3),
+            'indexed_us': round(indexed_seconds / len(positions) * 1e6, 3)})
+    return results
+
+
+def main(argv):
+    """Function for running a benchmark suite from the command line.
+
+    Args:
+        argv (list): command line arguments
+
+    Returns:
+        int: exit code
+    """
+    if len(argv) not in (2, 3, 4):
+        print(__doc__)
+        return 1
+    if argv[1] == '--maps':
+        results_path = os.path.abspath(
+            argv[2] if len(argv) > 2 else 'benchmark_maps.json')
+        maps = run_map_benchmark()
+        with open(results_path, 'w') as results_file:
+            json.dump({'maps': maps}, results_file, indent=2, sort_keys=True)
+        for result in maps:
+            if 'error' in result:
+                print('{map}: failed to load ({error})'.format(**result))
+                continue
+            print('{map}: {nodes} nodes, {linear_us:.2f}us linear, '
+                  '{indexed_us:.2f}us indexed'.format(**result))
+        maps = [result for result in maps if 'error' not in result]
+        print('{} maps: {:.2f}us linear, {:.2f}us indexed mean'.format(
+            len(maps),
+            sum(result['linear_us'] for result in maps) / len(maps),
+            sum(result['indexed_us'] for result in maps) / len(maps)))
+        return 0
+    results_path = os.path.abspath(
+        argv[2] if len(argv) > 2 else 'benchmark_results.json')
+    baseline_path = os.path.abspath(argv[3]) if len(argv) > 3 else None
+
+    recorder = Recorder()
+    for cls, method, name in TIMED_METHODS:
+        recorder.wrap(cls, method, name)
+    started = datetime.now()
+    scenarios = run_suite(argv[1], recorder)
+    results = {
+        'started': started.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'suite': os.path.abspath(argv[1]),
+        'scenarios': scenarios}
+    with open(results_path, 'w') as results_file:
+        json.dump(results, results_file, indent=2, sort_keys=True)
+    for scenario in scenarios:
+        print('{}: {:.4f}s mean wall time over {} run(s)'.format(
+            scenario['name'], _mean_wall(scenario), len(scenario['runs'])))
+    if baseline_path:
+        with open(baseline_path) as baseline_file:
+            compare(results, json.load(baseline_file))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
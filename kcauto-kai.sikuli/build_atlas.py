@@ -0,0 +1,145 @@
+"""Asset atlas builder for kcauto-kai.
+
+Packs every asset (PNG) in the bundle and its .sikuli folders into a single
+atlas file so that kcauto-kai can memory-map all of its assets at startup
+instead of opening and decoding each PNG on its own (see
+util.sikuli/atlas.py). Assets in the bundle's top-level folder take
+precedence over same-named assets in .sikuli folders, same as in the asset
+registry. Re-run after adding or changing assets; kcauto-kai reads an asset
+from its own file instead of the atlas if it was added, moved, or removed, or
+if its file's mtime or size differs from the one packed.
+
+The atlas is laid out as:
+
+    magic (8 bytes) | version (uint32) | index length (uint32) | index (JSON)
+    | padding to a multiple of 4 bytes | pixel blob
+
+All integers are big-endian. The index maps every asset name to its
+[offset into the blob, width, height, default similarity, path relative to the
+bundle, mtime (whole seconds), size], and the blob holds every asset's pixels
+as row-major 0xRRGGBB uint32s.
+
+Usage:
+    python build_atlas.py [<atlas path>]
+"""
+
+import json
+import os
+import struct
+import sys
+import time
+from kca_globals import Globals
+from replay import read_png
+
+ATLAS_MAGIC = b'KCAATLAS'
+ATLAS_VERSION = 2
+ATLAS_FILE = 'assets.atlas'
+
+# default similarity of assets by filename prefix; other assets default to
+# Globals.DEFAULT_SIMILARITY
+SIMILARITY_PREFIXES = (
+    ('ship_state_dmg_', Globals.DAMAGE_SIMILARITY),
+    ('ship_state_fatigue_', Globals.FATIGUE_SIMILARITY),
+    ('shiplist_ship_', Globals.SHIP_LIST_SIMILARITY),
+    ('shiplist_class_', Globals.SHIP_LIST_SIMILARITY),
+    ('fleet_icon_', Globals.FLEET_ICON_SIMILARITY),
+)
+
+
+def asset_paths(bundle_path):
+    """Function for finding every asset in the bundle and its .sikuli folders.
+
+    Args:
+        bundle_path (str): path of the kcauto-kai.sikuli bundle
+
+    Returns:
+        dict: path of every asset, keyed by asset name
+    """
+    paths = {}
+    for entry in sorted(os.listdir(bundle_path)):
+        entry_path = os.path.join(bundle_path, entry)
+        if entry.endswith('.sikuli') and os.path.isdir(entry_path):
+            for asset in sorted(os.listdir(entry_path)):
+                if asset.endswith('.png'):
+                    paths.setdefault(asset, os.path.join(entry_path, asset))
+    for asset in os.listdir(bundle_path):
+        if asset.endswith('.png'):
+            paths[asset] = os.path.join(bundle_path, asset)
+    return paths
+
+
+def default_similarity(asset):
+    """Function for returning the default similarity of an asset.
+
+    Args:
+        asset (str): name of the asset
+
+    Returns:
+        float: default similarity
+    """
+    for prefix, similarity in SIMILARITY_PREFIXES:
+        if asset.startswith(prefix):
+            return similarity
+    return Globals.DEFAULT_SIMILARITY
+
+
+def build(bundle_path, atlas_path):
+    """Function for packing every asset into an atlas file.
+
+    Args:
+        bundle_path (str): path of the kcauto-kai.sikuli bundle
+        atlas_path (str): path to write the atlas to
+
+    Returns:
+        dict: the atlas index
+    """
+    assets = {}
+    blob = []
+    offset = 0
+    for asset, path in sorted(asset_paths(bundle_path).items()):
+        width, height, pixels = read_png(path)
+        data = struct.pack('>{}I'.format(len(pixels)), *pixels)
+        stat = os.stat(path)
+        assets[asset] = [
+            offset, width, height, default_similarity(asset),
+            os.path.relpath(path, bundle_path), int(stat.st_mtime),
+            stat.st_size]
+        blob.append(data)
+        offset += len(data)
+
+    index = json.dumps(
+        {'built': time.time(), 'assets': assets}, sort_keys=True)
+    index = index.encode('utf-8')
+    header = (
+        ATLAS_MAGIC + struct.pack('>II', ATLAS_VERSION, len(index)) + index)
+    with open(atlas_path, 'wb') as atlas_file:
+        atlas_file.write(header)
+        atlas_file.write(b'\0' * (-len(header) % 4))
+        for data in blob:
+            atlas_file.write(data)
+    return assets
+
+
+def main(argv):
+    """Function for building the atlas from the command line.
+
+    Args:
+        argv (list): command line arguments
+
+    Returns:
+        int: exit code
+    """
+    if len(argv) > 2:
+        print(__doc__)
+        return 1
+    bundle_path = os.path.dirname(os.path.abspath(__file__))
+    atlas_path = os.path.abspath(
+        argv[1] if len(argv) > 1 else os.path.join(bundle_path, ATLAS_FILE))
+    assets = build(bundle_path, atlas_path)
+    print('Packed {} assets into {} ({:.1f} MB)'.format(
+        len(assets), atlas_path, os.path.getsize(atlas_path) / 1048576.0))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
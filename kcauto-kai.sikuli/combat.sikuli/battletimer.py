@@ -0,0 +1,93 @@
+import json
+import os
+from kca_globals import Globals
+
+
+class BattleTimer(object):
+    """Learns how long battles last, per map and node, from past sorties so
+    that the Combat module can idle through most of a battle animation instead
+    of polling for its end the whole time. Durations are persisted to
+    Globals.BATTLE_DURATION_FILE.
+
+    Attributes:
+        durations (dict): list of the most recent battle durations (seconds),
+            keyed by battle key
+    """
+
+    def __init__(self):
+        self.durations = self._load()
+
+    @staticmethod
+    def key(location, node, night=False):
+        """Method for generating the key battle durations are stored under.
+
+        Args:
+            location (str): name of the map
+            node (Node, int): Node (live engine) or node number (legacy
+                engine) of the battle
+            night (bool, optional): whether or not the battle is a night
+                battle
+
+        Returns:
+            str: battle key
+        """
+        return '{}:{}{}'.format(location, node, ':night' if night else '')
+
+    def idle_time(self, key):
+        """Method for returning how long a battle can be idled through before
+        polling for its end: Globals.BATTLE_IDLE_FRACTION of the shortest
+        learned duration of the battle.
+
+        Args:
+            key (str): battle key
+
+        Returns:
+            float: seconds to idle for; 0 if too few durations were learned
+        """
+        samples = self.durations.get(key, [])
+        if len(samples) < Globals.BATTLE_DURATION_MIN_SAMPLES:
+            return 0
+        return min(samples) * Globals.BATTLE_IDLE_FRACTION
+
+    def record(self, key, duration):
+        """Method for learning the duration of a battle.
+
+        Args:
+            key (str): battle key
+            duration (float): seconds the battle lasted
+        """
+        samples = self.durations.setdefault(key, [])
+        samples.append(round(duration, 1))
+        del samples[:-Globals.BATTLE_DURATION_SAMPLES]
+        self._save()
+
+    @staticmethod
+    def _duration_file():
+        """Method for returning the path of the battle duration file.
+
+        Returns:
+            str: path of the battle duration file
+        """
+        return os.path.join(os.getcwd(), Globals.BATTLE_DURATION_FILE)
+
+    @classmethod
+    def _load(cls):
+        """Method for loading the persisted battle durations.
+
+        Returns:
+            dict: battle durations keyed by battle key
+        """
+        try:
+            with open(cls._duration_file()) as duration_file:
+                return json.load(duration_file)
+        except (IOError, ValueError):
+            return {}
+
+    def _save(self):
+        """Method for persisting the battle durations.
+        """
+        try:
+            with open(self._duration_file(), 'w') as duration_file:
+                json.dump(self.durations, duration_file)
+        except IOError:
+            pass
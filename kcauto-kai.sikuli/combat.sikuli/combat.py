@@ -1,15 +1,60 @@
-from sikuli import Region, Pattern, FOREVER
+from sikuli import Region, Pattern
 from datetime import datetime, timedelta
-from threading import Thread
 from kca_globals import Globals
+from battletimer import BattleTimer
 from fleet import Fleet
+from fleettracker import FleetTracker
 from lbas import LBAS
 from mapData import MapData
 from nav import Nav
+from scheduler import Scheduler
+from statestore import StateStore
+from timeline import SortieTimeline
+from assetregistry import AssetRegistry
 from util import Util
 
 
 class CombatModule(object):
+    # transitions that can follow a sortie state while the fleet is moving on
+    # the map, after a compass spin or a node select
+    MAP_TRANSITIONS = (
+        ('game', 'compass.png', 'compass'),
+        ('formation_line_ahead', 'formation_line_ahead.png', 'formation'),
+        ('formation_combinedfleet_1', 'formation_combinedfleet_1.png',
+         'formation'),
+        ('game', 'combat_node_select.png', 'node_select'),
+        ('lower_right_corner', 'next.png', 'battle'),
+        ('game', 'combat_nb_fight.png', 'battle'),
+        ('lower_right_corner', 'next_alt.png', 'resource_end'))
+    # transitions that can follow a battle, up to the night battle prompt or
+    # the results screens
+    BATTLE_TRANSITIONS = (
+        ('game', 'combat_nb_fight.png', 'night_battle'),
+        ('lower_right_corner', 'next.png', 'results'))
+    # transitions that can follow the post-battle results screens
+    RESULTS_TRANSITIONS = (
+        ('game', 'home_menu_sortie.png', 'home'),
+        ('game', 'combat_flagship_dmg.png', 'flagship_retreat'),
+        ('game', 'combat_retreat.png', 'continue_prompt'),
+        ('lower_right_corner', 'next.png', 'results'),
+        ('lower_right_corner', 'next_alt.png', 'results'),
+        ('lower_left', 'fcf_retreat_ship.png', 'fcf'))
+    # sortie state machine: for each state, the (region, asset, next state)
+    # transitions that can legally follow it, in the order they are checked.
+    # Regions are keys of the kcauto-kai regions dict
+    SORTIE_TRANSITIONS = {
+        'sortie': MAP_TRANSITIONS + (
+            ('lower_right_corner', 'combat_flagship_dmg.png',
+             'flagship_retreat'), ),
+        'compass': MAP_TRANSITIONS,
+        'node_select': MAP_TRANSITIONS,
+        'formation': BATTLE_TRANSITIONS,
+        'battle': BATTLE_TRANSITIONS,
+        'night_battle': BATTLE_TRANSITIONS,
+        'results': RESULTS_TRANSITIONS,
+        'fcf': RESULTS_TRANSITIONS,
+    }
+
     def __init__(self, config, stats, regions, fleets):
         """Initializes the Combat module.
 
@@ -25,11 +70,9 @@ class CombatModule(object):
         self.stats = stats
         self.regions = regions
         self.kc_region = regions['game']
-        self.fast_kc_region = Region(self.kc_region)
-        self.fast_kc_region.setAutoWaitTimeout(0)
-        self.observeRegion = Region(self.kc_region)
         self.fleets = fleets
-        self.next_combat_time = datetime.now()
+        self.next_combat_time = None
+        self.set_next_combat_time()
 
         self.combined_fleet = self.config.combat['combined_fleet']
         self.striking_fleet = self.config.combat['striking_fleet']
@@ -46,6 +89,14 @@ class CombatModule(object):
         self.current_position = [0, 0]
         self.current_node = None
         self.nodes_run = []
+        self.sortie_state = None
+        self.sortie_state_entered = None
+        self.transition_times = {}
+        self.timeline = SortieTimeline()
+        self.battle_timer = BattleTimer()
+        self.fleet_tracker = FleetTracker(
+            self.kc_region, self.fleet_icon, self.map,
+            self._update_fleet_position)
 
         self.lbas = (
             LBAS(config, regions, self.map)
@@ -93,6 +144,7 @@ class CombatModule(object):
             hours=delta['hours'] if 'hours' in delta else 0,
             minutes=delta['minutes'] if 'minutes' in delta else 0,
             seconds=delta['seconds'] if 'seconds' in delta else 0)
+        Scheduler.schedule('combat', self.next_combat_time)
 
     def combat_logic_wrapper(self):
         """Method that fires off the necessary child methods that encapsulates
@@ -102,11 +154,15 @@ class CombatModule(object):
             bool: False if the combat fleets could not be sortied
         """
         self.stats.increment_combat_attempted()
+        self.timeline.begin_sortie(self.map.location)
+        self.timeline.start('map_select')
 
         if not self._select_combat_map():
             # LBAS fatigue check failed; cancel sortie
+            self.timeline.finish_sortie('cancelled')
             return False
 
+        self.timeline.start('pre_sortie_checks')
         if self._conduct_pre_sortie_checks():
             start_button = 'combat_start.png'
             if (self.lbas and
@@ -121,9 +177,11 @@ class CombatModule(object):
                 # generic sortie fail catch
                 Util.log_warning("Could not begin sortie for some reason!")
                 self.set_next_combat_time({'minutes': 5})
+                self.timeline.finish_sortie('cancelled')
                 return False
         else:
             # fleet fatigue/damage check failed; cancel sortie
+            self.timeline.finish_sortie('cancelled')
             return False
 
         # reset FCF retreat counters for combined and striking fleets
@@ -134,6 +192,7 @@ class CombatModule(object):
             self.fleets[3].reset_fcf_retreat_counts()
 
         self._run_combat_logic()
+        self.timeline.finish_sortie('completed')
         self.set_next_combat_time()
 
         # after combat, resolve the FCF retreat counters for combined and
@@ -174,10 +233,12 @@ class CombatModule(object):
 
         if self.lbas:
             # resupply and delay sortie time if LBAS fails fatigue check
+            self.timeline.start('lbas_resupply')
             lbas_check_fatigue = (
                 'CheckFatigue' in self.config.combat['misc_options'])
             pass_lbas_check, delay_time = (
                 self.lbas.resupply_groups(lbas_check_fatigue))
+            self.timeline.start('map_select')
             if not pass_lbas_check:
                 self.set_next_combat_time({'minutes': delay_time})
                 return False
@@ -333,16 +394,18 @@ class CombatModule(object):
         # primary combat loop
         sortieing = True
         self.nodes_run = []
+        self.sortie_state = None
+        self._enter_state('sortie')
         disable_combat = False
         post_combat_screens = []
         while sortieing:
-            at_node, dialogue_click = self._run_loop_between_nodes()
+            state = self._run_loop_between_nodes()
 
-            # stop the background observer if no longer on the map screen
+            # stop the fleet tracker if no longer on the map screen
             if self.config.combat['engine'] == 'live':
-                self.observeRegion.stopObserver()
+                self._stop_fleet_observer()
 
-            if at_node:
+            if state in ('formation', 'battle'):
                 # arrived at combat node
                 self._increment_nodes_run()
 
@@ -351,7 +414,7 @@ class CombatModule(object):
                     disable_combat = False
                     post_combat_screens = []
 
-                if dialogue_click:
+                if state == 'formation':
                     # click to get rid of initial boss dialogue in case it
                     # exists
                     Util.kc_sleep(5)
@@ -367,7 +430,10 @@ class CombatModule(object):
                     if self._select_night_battle(self._resolve_night_battle()):
                         self._run_loop_during_battle()
 
-                self.regions['lower_right_corner'].wait('next.png', 30)
+                Util.gated_wait(
+                    self.regions['lower_right_corner'], 'next.png', 30)
+                if self.sortie_state != 'results':
+                    self._enter_state('results')
 
                 # battle complete; resolve combat results
                 Util.click_preset_region(self.regions, 'center')
@@ -377,11 +443,13 @@ class CombatModule(object):
                 self.primary_fleet.print_damage_counts()
                 if 'ClearStop' in self.config.combat['misc_options']:
                     # check for a medal drop here if ClearStop is enabled
-                    self.regions['lower_right_corner'].wait('next.png', 30)
+                    Util.gated_wait(
+                        self.regions['lower_right_corner'], 'next.png', 30)
                     if self.regions['right'].exists('medal_marker.png'):
                         disable_combat = True
                 if self.combined_fleet:
-                    self.regions['lower_right_corner'].wait('next.png', 30)
+                    Util.gated_wait(
+                        self.regions['lower_right_corner'], 'next.png', 30)
                     Util.click_preset_region(self.regions, 'center')
                     Util.kc_sleep(2)
                     self.regions['game'].wait('mvp_marker.png', 30)
@@ -398,65 +466,68 @@ class CombatModule(object):
                             self.module_regions)
                 Util.rejigger_mouse(self.regions, 'lbas')
                 # click through while not next battle or home
-                while not (
-                        self.fast_kc_region.exists('home_menu_sortie.png') or
-                        self.fast_kc_region.exists('combat_flagship_dmg.png')
-                        or self.fast_kc_region.exists('combat_retreat.png')):
-                    if self.regions['lower_right_corner'].exists('next.png'):
-                        Util.click_preset_region(self.regions, 'center')
-                        Util.rejigger_mouse(self.regions, 'top')
-                        if 'ClearStop' in self.config.combat['misc_options']:
-                            post_combat_screens.append('next')
-                    elif self.regions['lower_right_corner'].exists(
-                            'next_alt.png'):
+                while True:
+                    state, target = self._wait_transition(
+                        self.sortie_state, gated=True)
+                    if state in (
+                            'home', 'flagship_retreat', 'continue_prompt'):
+                        break
+                    if state == 'results':
                         Util.click_preset_region(self.regions, 'center')
                         Util.rejigger_mouse(self.regions, 'top')
                         if 'ClearStop' in self.config.combat['misc_options']:
-                            post_combat_screens.append('next_alt')
+                            post_combat_screens.append(
+                                'next' if target == 'next.png' else 'next_alt')
                     if self.map.world == 'event':
                         # if the 'next' asset exists in this region during an
-                        # event map sortie, the map is cleared
-                        if self.module_regions['event_next'].exists(
-                                'next.png'):
+                        # event map sortie, the map is cleared; checked on
+                        # the live screen since it only appears after the
+                        # results are clicked through
+                        if Util.hinted_exists(
+                                self.module_regions['event_next'], 'next.png'):
                             disable_combat = True
-                    if self.combined_fleet or self.striking_fleet:
+                    if state == 'fcf':
                         self._resolve_fcf()
                         Util.rejigger_mouse(self.regions, 'top')
 
-            if self.regions['left'].exists('home_menu_sortie.png'):
+            # resolve the post-node state
+            if state == 'home':
                 # arrived at home; sortie complete
                 self._print_sortie_complete_msg(self.nodes_run)
                 sortieing = False
                 break
 
-            if self.regions['lower_right_corner'].exists(
-                    'combat_flagship_dmg.png'):
+            if state == 'flagship_retreat':
                 # flagship retreat; sortie complete
                 Util.log_msg("Flagship damaged. Automatic retreat.")
                 Util.click_preset_region(self.regions, 'game')
                 self.regions['left'].wait('home_menu_sortie.png', 30)
+                self._enter_state('home')
                 self._print_sortie_complete_msg(self.nodes_run)
                 sortieing = False
                 break
 
-            if self.regions['lower_right_corner'].exists('next_alt.png'):
+            if state == 'resource_end':
                 # resource node end; sortie complete
                 while not self.regions['left'].exists('home_menu_sortie.png'):
                     Util.click_preset_region(self.regions, 'shipgirl')
                     Util.rejigger_mouse(self.regions, 'top')
                     Util.kc_sleep(1)
+                self._enter_state('home')
                 sortieing = False
                 break
 
-            if self.kc_region.exists('combat_retreat.png'):
+            if state == 'continue_prompt':
                 continue_sortie = self._resolve_continue_sortie()
 
                 # resolve retreat/continue
                 if continue_sortie:
                     self._select_continue_sortie(True)
+                    self._enter_state('sortie')
                 else:
                     self._select_continue_sortie(False)
                     self.regions['left'].wait('home_menu_sortie.png', 30)
+                    self._enter_state('home')
                     self._print_sortie_complete_msg(self.nodes_run)
                     sortieing = False
                     break
@@ -470,6 +541,8 @@ class CombatModule(object):
                 # assume that it means that event map is cleared
                 disable_combat = True
 
+        self.print_transition_times()
+
         # if the disable combat flag is set, disable the combat module
         if disable_combat:
             self.disable_combat_module()
@@ -489,31 +562,28 @@ class CombatModule(object):
     def _run_loop_between_nodes(self):
         """Method that continuously checks for the next update between combat
         nodes. Resolves compass spins, formation selects, node selects, and
-        resource node ends.
+        resource node ends. Each tick only checks the transitions that can
+        follow the current sortie state.
 
         Returns:
-            bool: True if the method ends on a combat node, False otherwise
-            bool: True if the click to remove boss dialogue should be done,
-                False otherwise (only applicable if first bool is True)
+            str: sortie state the method ends on: 'formation' or 'battle' if
+                the fleet arrived at a combat node (with or without a formation
+                select), 'flagship_retreat' or 'resource_end' otherwise
         """
-        at_node = False
-
-        # if in live engine mode, begin the background observer to track and
-        # update the fleet position
+        # if in live engine mode, begin the fleet tracker to track and update
+        # the fleet position
         if self.config.combat['engine'] == 'live':
             self._start_fleet_observer()
 
-        while not at_node:
-            if self.fast_kc_region.exists('compass.png'):
+        while True:
+            state = self._check_transition(self.sortie_state)
+            if state == 'compass':
                 # spin compass
                 while (self.kc_region.exists('compass.png')):
                     Util.click_preset_region(self.regions, 'center')
                     Util.rejigger_mouse(self.regions, 'lbas')
                     Util.kc_sleep(3)
-            elif (self.regions['formation_line_ahead'].exists(
-                        'formation_line_ahead.png') or
-                    self.regions['formation_combinedfleet_1'].exists(
-                        'formation_combinedfleet_1.png')):
+            elif state == 'formation':
                 # check for both single fleet and combined fleet formations
                 # since combined fleets can have single fleet battles
                 self._print_current_node()
@@ -522,9 +592,8 @@ class CombatModule(object):
                     if self._select_formation(formation):
                         break
                 Util.rejigger_mouse(self.regions, 'lbas')
-                at_node = True
-                return (True, True)
-            elif self.fast_kc_region.exists('combat_node_select.png'):
+                return state
+            elif state == 'node_select':
                 # node select dialog option exists; resolve fleet location and
                 # select node
                 if self.config.combat['engine'] == 'legacy':
@@ -539,79 +608,176 @@ class CombatModule(object):
                         next_node, self.current_node))
                     self.map.nodes[next_node].click_node(self.regions['game'])
                     Util.rejigger_mouse(self.regions, 'lbas')
-            elif (self.regions['lower_right_corner'].exists('next.png')
-                    or self.fast_kc_region.exists('combat_nb_fight.png')):
+            elif state == 'battle':
                 # post-combat or night battle select without selecting a
                 # formation
                 self._print_current_node()
                 Util.rejigger_mouse(self.regions, 'lbas')
-                at_node = True
-                return (True, False)
-            elif self.regions['lower_right_corner'].exists(
-                    'combat_flagship_dmg.png'):
-                # flagship retreat
-                return (False, False)
-            elif self.regions['lower_right_corner'].exists('next_alt.png'):
-                # resource node end
-                return (False, False)
+                return state
+            elif state in ('flagship_retreat', 'resource_end'):
+                # flagship retreat or resource node end
+                return state
+            else:
+                # nothing actionable in this frame; pace the next tick
+                Util.kc_sleep()
 
     def _run_loop_during_battle(self):
         """Method that continuously runs during combat for the night battle
-        prompt or battle end screen.
+        prompt or battle end screen. Battles started by a formation or night
+        battle select are idled through for most of their learned duration
+        before polling for their end, and their duration is learned.
 
         Returns:
             str: 'night_battle' if combat ends on the night battle prompt,
                 'results' if otherwise
         """
-        while True:
-            if self.kc_region.exists('combat_nb_fight.png'):
-                return 'night_battle'
-            elif self.regions['lower_right_corner'].exists('next.png'):
-                return 'results'
-            else:
-                pass
+        battle_key = None
+        node = self.nodes_run[-1] if self.nodes_run else None
+        if (self.sortie_state in ('formation', 'night_battle') and
+                node is not None):
+            battle_key = BattleTimer.key(
+                self.map.location, node,
+                self.sortie_state == 'night_battle')
+        battle_start = datetime.now()
+        if battle_key:
+            idle_time = self.battle_timer.idle_time(battle_key)
+            if idle_time:
+                Util.kc_sleep(idle_time, 0)
+
+        state, target = self._wait_transition(self.sortie_state)
+        if battle_key:
+            self.battle_timer.record(
+                battle_key, (datetime.now() - battle_start).total_seconds())
+        Nav.learn_screen(self.regions, state, frame=True)
+        return state
+
+    def _enter_state(self, state):
+        """Method for moving the sortie state machine to the specified state,
+        recording how long the previous state lasted under its transition and
+        starting the state's phase in the sortie timeline. Results screens
+        and FCF prompts following other results screens are part of the
+        click-through phase.
+
+        Args:
+            state (str): sortie state being entered
+        """
+        now = datetime.now()
+        if self.sortie_state:
+            times = self.transition_times.setdefault(
+                '{}>{}'.format(self.sortie_state, state), [0, 0.0])
+            times[0] += 1
+            times[1] += (now - self.sortie_state_entered).total_seconds()
+        phase = state
+        if (state in ('results', 'fcf') and
+                self.sortie_state in ('results', 'fcf')):
+            phase = 'click_through'
+        self.timeline.start(phase)
+        self.sortie_state = state
+        self.sortie_state_entered = now
+
+    def _transitions(self, state):
+        """Method for returning the transitions that can follow the specified
+        sortie state. FCF prompts are only possible with combined and striking
+        fleets.
+
+        Args:
+            state (str): current sortie state
+
+        Returns:
+            list: list of (region, asset, next state) transitions
+        """
+        fcf_possible = self.combined_fleet or self.striking_fleet
+        return [
+            transition for transition in self.SORTIE_TRANSITIONS[state]
+            if fcf_possible or transition[2] != 'fcf']
+
+    def _check_transition(self, state):
+        """Method for checking a single captured frame for the transitions
+        that can follow the specified sortie state, entering the first
+        transition's next state if found.
+
+        Args:
+            state (str): current sortie state
+
+        Returns:
+            str: next sortie state, or None if no transition was found
+        """
+        Util.capture_frame(self.kc_region)
+        for region, asset, next_state in self._transitions(state):
+            if Util.frame_exists(self.regions[region], asset):
+                self._enter_state(next_state)
+                return next_state
+        return None
+
+    def _wait_transition(self, state, gated=False):
+        """Method for waiting for any of the transitions that can follow the
+        specified sortie state, and entering its next state.
+
+        Args:
+            state (str): current sortie state
+            gated (bool, optional): whether or not to skip searching regions
+                that have not changed (see Util.wait_any())
+
+        Returns:
+            str: next sortie state
+            str: asset of the transition that was found
+        """
+        transitions = self._transitions(state)
+        target, match = Util.wait_any([
+            (self.regions[region], asset)
+            for region, asset, next_state in transitions], gated=gated)
+        next_state = [
+            transition[2] for transition in transitions
+            if transition[1] == target][0]
+        self._enter_state(next_state)
+        return (next_state, target)
+
+    def print_transition_times(self):
+        """Method for logging the number of times each sortie state
+        transition was made and the mean time spent before making it.
+        """
+        if not self.transition_times:
+            return
+        Util.log_msg("Sortie state transitions (count, mean seconds): {}"
+                     .format(', '.join(
+                         '{} ({}, {:.1f})'.format(
+                             transition, times[0], times[1] / times[0])
+                         for transition, times in sorted(
+                             self.transition_times.items()))))
 
     def _start_fleet_observer(self):
-        """Method that starts the observeRegion/observeInBackground methods
-        that tracks the fleet position icon in real-time in the live engine
-        mode.
+        """Method that starts the fleet tracker that tracks the fleet
+        position icon in real-time in the live engine mode. Mid-sortie, the
+        tracker starts from the fleet's last known position and node.
         """
-        self.observeRegion.onAppear(
-            Pattern(self.fleet_icon).similar(Globals.FLEET_ICON_SIMILARITY),
-            self._update_fleet_position)
-        self.observeRegion.observeInBackground(FOREVER)
+        if self.nodes_run:
+            self.fleet_tracker.start(
+                list(self.current_position), self.current_node)
+        else:
+            self.fleet_tracker.start()
 
     def _stop_fleet_observer(self):
-        """Stops the observer started by the _start_fleet_observer() method.
+        """Stops the tracker started by the _start_fleet_observer() method.
         """
-        self.observeRegion.stopObserver()
+        self.fleet_tracker.stop()
 
-    def _update_fleet_position(self, event):
-        """Method that is run by the fleet observer to continuously update the
+    def _update_fleet_position(self, position, node):
+        """Method that is run by the fleet tracker to continuously update the
         fleet's status.
 
         Args:
-            event (event): sikuli observer event
+            position (list): [x, y] in-game position of the fleet icon
+            node (Node): Node at the position, or the last known Node if there
+                is no Node at the position
         """
-        fleet_match = event.getMatch()
-        # lastMatch is based off of screen positions, so subtract game region
-        # x and y to get in-game positions
-        self.current_position = [
-            fleet_match.x + (fleet_match.w / 2) - self.kc_region.x,
-            fleet_match.y + fleet_match.h - self.kc_region.y
-        ]
+        self.current_position = position
 
-        # debug console print for the observer's found position of the fleet
+        # debug console print for the tracker's found position of the fleet
         """
-        print(
-            "{}, {} ({})".format(
-                self.current_position[0], self.current_position[1],
-                fleet_match))
+        print("{}, {}".format(
+            self.current_position[0], self.current_position[1]))
         """
-        matched_node = self.map.find_node_by_pos(*self.current_position)
-        self.current_node = (
-            matched_node if matched_node is not None else self.current_node)
-        event.repeat()
+        self.current_node = node if node is not None else self.current_node
 
     def _update_fleet_position_once(self):
         """Method that can be called to find and update the fleet's position
@@ -906,8 +1072,29 @@ class CombatModule(object):
         self.enabled = False
         self.disabled_time = datetime.now()
 
+    def get_state(self):
+        """Method to get the Combat module's state to persist to the state
+        store.
+
+        Returns:
+            dict: the next combat time
+        """
+        return {
+            'next_combat_time': StateStore.encode_time(self.next_combat_time)}
+
+    def restore_state(self, state):
+        """Method to restore the Combat module's state from the state store.
+
+        Args:
+            state (dict): state, as returned by get_state()
+        """
+        self.next_combat_time = StateStore.decode_time(
+            state['next_combat_time'])
+        Scheduler.schedule('combat', self.next_combat_time)
+
     def print_status(self):
-        """Method that prints the next sortie time status of the Combat module.
+        """Method that prints the next sortie time status of the Combat module
+        and a summary of the sortie timeline.
         """
         if self.enabled:
             Util.log_success("Next combat sortie at {}".format(
@@ -915,9 +1102,16 @@ class CombatModule(object):
         else:
             Util.log_success("Combat module disabled as of {}".format(
                 self.disabled_time.strftime('%Y-%m-%d %H:%M:%S')))
+        timeline_summary = self.timeline.summary()
+        if timeline_summary:
+            Util.log_msg(timeline_summary)
 
 
 class CombatFleet(Fleet):
+    # ship slot states, in order of priority when classifying a slot
+    DAMAGE_STATES = ('repair', 'heavy', 'moderate', 'minor')
+    FATIGUE_STATES = ('high', 'medium')
+
     def __init__(self, fleet_id):
         """Initializes the CombatFleet object, an extension of the Fleet class.
 
@@ -929,8 +1123,10 @@ class CombatFleet(Fleet):
         self.damage_counts = {
             'repair': 0
         }
+        self.damage_states = []
         self.damaged_fcf_retreat_count = 0
         self.fatigue = {}
+        self.fatigue_states = []
 
     def reset_fcf_retreat_counts(self):
         """Method for setting the fleet's damaged FCF retreat counter.
@@ -1016,47 +1212,36 @@ class CombatFleet(Fleet):
         return count
 
     def check_damages(self, region, reset=True):
-        """Method to multithread the detection of damage states of the fleet.
+        """Method to detect the damage states of the fleet from a single
+        capture. The detected states are stored in damage_states.
 
         Args:
-            region (Region): Region in which to search for the damage states
+            region (Region, list): Region to find every damage icon in, or
+                list of Regions, one per ship slot, to classify
             reset (bool, optional): specifies whether or not the damage count
                 should be reset to 0
 
         Returns:
             dict: dict of counts of the different damage states
         """
-        thread_check_damages_heavy = Thread(
-            target=self._check_damages_func, args=('heavy', region, reset))
-        thread_check_damages_moderate = Thread(
-            target=self._check_damages_func, args=('moderate', region, reset))
-        thread_check_damages_minor = Thread(
-            target=self._check_damages_func, args=('minor', region, reset))
-        thread_check_damages_repair = Thread(
-            target=self._check_damages_func, args=('repair', region, reset))
-        Util.multithreader([
-            thread_check_damages_heavy, thread_check_damages_moderate,
-            thread_check_damages_minor, thread_check_damages_repair])
-        return self.damage_counts
+        targets = [
+            (damage, AssetRegistry.pattern(
+                'ship_state_dmg_{}.png'.format(damage),
+                Globals.DAMAGE_SIMILARITY))
+            for damage in self.DAMAGE_STATES]
+        states = (
+            Util.classify_slots(region, targets) if isinstance(region, list)
+            else Util.classify_icons(region, targets))
 
-    def _check_damages_func(self, type, region, reset):
-        """Child multithreaded method for checking damage states.
-
-        Args:
-            type (str): which damage state to check for
-            region (Region): Region in which to search for the damage state
-            reset (bool): specifies whether or not the damage count should be
-                reset to 0
-        """
         if reset:
-            self.damage_counts[type] = 0
-
-        dmg_img = 'ship_state_dmg_{}.png'.format(type)
-        count = Util.findAll_wrapper(
-            region, Pattern(dmg_img).similar(Globals.DAMAGE_SIMILARITY))
-
-        for i in count:
-            self.damage_counts[type] += 1
+            for damage in self.DAMAGE_STATES:
+                self.damage_counts[damage] = 0
+            self.damage_states = []
+        self.damage_states.extend(states)
+        for state in states:
+            if state:
+                self.damage_counts[state] += 1
+        return self.damage_counts
 
     def check_damages_7th(self, regions):
         """Method that specifically checks the damage in the 7th ship spot
@@ -1082,41 +1267,33 @@ class CombatFleet(Fleet):
         Args:
             regions (dict): dict of pre-defined kcauto-kai regions
         """
-        if (regions['check_damage_flagship'].exists(Pattern(
-                'ship_state_dmg_heavy.png').similar(
-                    Globals.FATIGUE_SIMILARITY))):
+        if (regions['check_damage_flagship'].exists(AssetRegistry.pattern(
+                'ship_state_dmg_heavy.png', Globals.FATIGUE_SIMILARITY))):
             self.flagship_damaged = True
 
     def check_fatigue(self, region):
-        """Method to multithread the detection of fatigue states of the fleet.
+        """Method to detect the fatigue states of the fleet from a single
+        capture. The detected states are stored in fatigue_states.
 
         Args:
-            region (Region): Region in which to search for the fatigue states
+            region (Region, list): Region to find every fatigue icon in, or
+                list of Regions, one per ship slot, to classify
 
         Returns:
             dict: dict of bools of the different fatigue states
         """
-        thread_check_low_fatigue = Thread(
-            target=self._check_fatigue_func, args=('medium', region))
-        thread_check_high_fatigue = Thread(
-            target=self._check_fatigue_func, args=('high', region))
-        Util.multithreader([
-            thread_check_low_fatigue, thread_check_high_fatigue])
+        targets = [
+            (fatigue, AssetRegistry.pattern(
+                'ship_state_fatigue_{}.png'.format(fatigue),
+                Globals.FATIGUE_SIMILARITY))
+            for fatigue in self.FATIGUE_STATES]
+        self.fatigue_states = (
+            Util.classify_slots(region, targets) if isinstance(region, list)
+            else Util.classify_icons(region, targets))
+        for fatigue in self.FATIGUE_STATES:
+            self.fatigue[fatigue] = fatigue in self.fatigue_states
         return self.fatigue
 
-    def _check_fatigue_func(self, mode, region):
-        """Child multithreaded method for checking fatigue states.
-
-        Args:
-            type (str): which fatigue state to check for
-            region (Region): Region in which to search for the fatigue state
-        """
-        self.fatigue[mode] = (
-            True
-            if (region.exists(Pattern('ship_state_fatigue_{}.png'.format(mode))
-                .similar(Globals.FATIGUE_SIMILARITY)))
-            else False)
-
     @staticmethod
     def get_damages_at_threshold(threshold):
         """Method for returning the list of valid damages given a threshold.
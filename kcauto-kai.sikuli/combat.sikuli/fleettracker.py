@@ -0,0 +1,150 @@
+from sikuli import Region, Pattern
+from threading import Event, Thread
+from kca_globals import Globals
+from util import Util
+
+
+class FleetTracker(object):
+    """Tracks the fleet icon on the map screen in the live combat engine.
+    Instead of observing the whole game region, each tick searches a small
+    window around the icon's last known position, only falling back to a
+    search of the whole game region when the icon is not in the window.
+    Searches go through Util, and so through the configured vision backend.
+
+    Attributes:
+        callback (function): function called with the position and Node of
+            the fleet icon every time it is found
+        kc_region (Region): Region of the game screen
+        map (MapData): MapData instance of the map being sortied to
+        metrics (dict): counts of ticks, window hits, fallback hits, and misses
+            of the current tracking session
+        node (Node): Node the fleet icon was last found at, or None
+        pattern (Pattern): Pattern of the fleet icon
+        position (list): last known [x, y] position of the fleet icon,
+            relative to the game region, or None if not known
+    """
+
+    def __init__(self, kc_region, fleet_icon, map, callback):
+        """Initializes the FleetTracker.
+
+        Args:
+            kc_region (Region): Region of the game screen
+            fleet_icon (str): filename of the fleet icon asset
+            map (MapData): MapData instance of the map being sortied to
+            callback (function): function called with the position and Node
+                of the fleet icon every time it is found
+        """
+        self.kc_region = kc_region
+        self.pattern = Pattern(fleet_icon).similar(
+            Globals.FLEET_ICON_SIMILARITY)
+        self.map = map
+        self.callback = callback
+        self.position = None
+        self.node = None
+        self.metrics = {}
+        self._stop_event = Event()
+        self._thread = None
+
+    def start(self, position=None, node=None):
+        """Method for starting the tracking thread.
+
+        Args:
+            position (list, optional): [x, y] position the fleet icon was last
+                found at, if known
+            node (Node, optional): Node the fleet is currently at, if known
+        """
+        self.stop()
+        self.position = position
+        self.node = node
+        self.metrics = {'ticks': 0, 'window': 0, 'fallback': 0, 'missed': 0}
+        self._stop_event = Event()
+        self._thread = Thread(target=self._track)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Method for stopping the tracking thread, if running, and logging
+        its metrics.
+        """
+        if not self._thread:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        tracking_rate, miss_rate = self.rates()
+        Util.log_msg(
+            "Fleet tracker: {} ticks, {:.0%} tracked in window, {:.0%} "
+            "window misses, {} not found.".format(
+                self.metrics['ticks'], tracking_rate, miss_rate,
+                self.metrics['missed']))
+
+    def rates(self):
+        """Method for returning the tracking rate (share of ticks the icon
+        was found in the predicted window) and miss rate (share of ticks that
+        needed a search of the whole game region) of the current tracking
+        session.
+
+        Returns:
+            float: tracking rate, between 0 and 1
+            float: miss rate, between 0 and 1
+        """
+        ticks = self.metrics.get('ticks', 0)
+        if not ticks:
+            return (0.0, 0.0)
+        window = self.metrics['window'] / float(ticks)
+        return (window, 1 - window)
+
+    def update(self, match):
+        """Method for updating the tracker's last known position and node from
+        a match of the fleet icon.
+
+        Args:
+            match (Match): match of the fleet icon
+        """
+        self.position = [
+            match.x + (match.w / 2) - self.kc_region.x,
+            match.y + match.h - self.kc_region.y]
+        node = self.map.find_node_by_pos(*self.position)
+        self.node = node if node is not None else self.node
+
+    def predict_window(self):
+        """Method for predicting the Region the fleet icon will be found in
+        next: the area within Globals.FLEET_TRACKER_RADIUS of its last known
+        position.
+
+        Returns:
+            Region: predicted Region, or None if the position is not known
+        """
+        if not self.position:
+            return None
+        radius = Globals.FLEET_TRACKER_RADIUS
+        x, y = self.position
+        x1 = max(x - radius, 0)
+        y1 = max(y - radius, 0)
+        x2 = min(x + radius, self.kc_region.w)
+        y2 = min(y + radius, self.kc_region.h)
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return Region(
+            self.kc_region.x + x1, self.kc_region.y + y1, x2 - x1, y2 - y1)
+
+    def _track(self):
+        """Method run by the tracking thread; searches for the fleet icon
+        every tick until stopped.
+        """
+        interval = 1.0 / Globals.SIKULI_SCANRATE
+        while not self._stop_event.is_set():
+            self.metrics['ticks'] += 1
+            match = None
+            window = self.predict_window()
+            if window:
+                match = Util.hinted_exists(window, self.pattern, 0)
+                if match:
+                    self.metrics['window'] += 1
+            if not match:
+                match = Util.hinted_exists(self.kc_region, self.pattern, 0)
+                self.metrics['fallback' if match else 'missed'] += 1
+            if match:
+                self.update(match)
+                self.callback(self.position, self.node)
+            self._stop_event.wait(interval)
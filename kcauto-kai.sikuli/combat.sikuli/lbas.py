@@ -1,7 +1,8 @@
 from sikuli import Region, Pattern
-from threading import Thread
 from kca_globals import Globals
+from assetregistry import AssetRegistry
 from util import Util
+from workerpool import WorkerPool
 
 
 class LBAS(object):
@@ -31,7 +32,7 @@ class LBAS(object):
         """Method for assigning sortied LBAS groups to their respective nodes
         on the sortie map.
         """
-        self.kc_region.wait('lbas_panel_ready.png', 10)
+        Util.gated_wait(self.kc_region, 'lbas_panel_ready.png', 10)
         Util.kc_sleep(1)
         Util.log_msg("Assign LBAS groups to nodes.")
         for lbas_group_nodes in (
@@ -167,18 +168,15 @@ class LBAS(object):
         Util.log_msg("LBAS group switched to {} mode.".format(final_mode))
 
     def _check_fatigue(self):
-        """Method to multithread detection of LBAS group fatigue states.
+        """Method to detect LBAS group fatigue states, checking for the
+        different states in parallel.
 
         Returns:
             dict: updated fatigue counter dict
         """
-        # reset fatigue
-        thread_check_low_fatigue = Thread(
-            target=self._check_fatigue_func, args=('medium', ))
-        thread_check_high_fatigue = Thread(
-            target=self._check_fatigue_func, args=('high', ))
-        Util.multithreader([
-            thread_check_low_fatigue, thread_check_high_fatigue])
+        modes = ('medium', 'high')
+        self.fatigue = dict(zip(
+            modes, WorkerPool.shared().map(self._check_fatigue_func, modes)))
         return self.fatigue
 
     def _check_fatigue_func(self, mode):
@@ -186,12 +184,16 @@ class LBAS(object):
 
         Args:
             mode (str): which fatigue state to check for
+
+        Returns:
+            bool: True if the fatigue state was found, False otherwise
         """
-        self.fatigue[mode] = (
+        return (
             True
             if (self.module_regions['check_lbas_fatigue'].exists(
-                Pattern('ship_state_fatigue_{}.png'.format(mode))
-                .similar(Globals.FATIGUE_SIMILARITY)))
+                AssetRegistry.pattern(
+                    'ship_state_fatigue_{}.png'.format(mode),
+                    Globals.FATIGUE_SIMILARITY)))
             else False)
 
     def print_fatigue_states(self, group):
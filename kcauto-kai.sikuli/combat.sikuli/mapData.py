@@ -1,19 +1,246 @@
 import json
 import os
 from random import randint
+from sikuli import getBundlePath
 from util import Util
 
 
+class MapCatalog(object):
+    """Catalog of every map in the maps folder, loaded, validated, and compiled
+    into Node objects and node position indexes once, and served to MapData
+    instances from memory. Map files are re-compiled when their modification
+    time changes; a map file that fails to re-compile keeps being served from
+    its last good version. Maps in event subfolders are cataloged by their file
+    name, with maps in the top-level folder taking precedence. All methods are
+    class methods; MapCatalog should not be directly instantiated.
+
+    Attributes:
+        errors (dict): (modification time, error message) of every map file
+            that failed to compile, keyed by location
+        loaded (bool): whether or not the maps folder has been scanned
+        maps (dict): compiled map dict (path, mtime, world, subworld, nodes,
+            node_index) keyed by location
+        paths (dict): path of every map file, keyed by location
+    """
+
+    # size (in pixels) of the grid cells used to index the node positions
+    INDEX_CELL_SIZE = 40
+    VALID_TYPES = (
+        'boss', 'sub', 'air', 'mixed', 'retreat', 'select', 'push', 'nb')
+    VALID_FORMATIONS = (
+        'combinedfleet_1', 'combinedfleet_2', 'combinedfleet_3',
+        'combinedfleet_4', 'line_ahead', 'double_line', 'diamond', 'echelon',
+        'line_abreast', 'vanguard')
+
+    errors = {}
+    loaded = False
+    maps = {}
+    paths = {}
+
+    @classmethod
+    def load(cls):
+        """Method for scanning the maps folder and compiling every map file in
+        it. Called once at startup; afterwards get() and validate() only
+        re-compile map files that changed.
+        """
+        maps_path = os.path.join(getBundlePath(), 'maps')
+        paths = {}
+        for entry in sorted(os.listdir(maps_path), reverse=True):
+            entry_path = os.path.join(maps_path, entry)
+            if not os.path.isdir(entry_path):
+                continue
+            # newer event folders take precedence over older ones
+            for map_file in sorted(os.listdir(entry_path)):
+                if map_file.endswith('.json'):
+                    paths.setdefault(
+                        map_file[:-5], os.path.join(entry_path, map_file))
+        for map_file in os.listdir(maps_path):
+            if map_file.endswith('.json'):
+                paths[map_file[:-5]] = os.path.join(maps_path, map_file)
+
+        cls.paths = paths
+        cls.maps = {}
+        cls.errors = {}
+        cls.loaded = True
+        for location in paths:
+            cls._refresh(location)
+
+    @classmethod
+    def get(cls, location):
+        """Method for returning the compiled version of a map.
+
+        Args:
+            location (str): localized map name; should be equivalent to the
+                json file name sans extension
+
+        Raises:
+            ValueError: the map does not exist or has never compiled
+
+        Returns:
+            dict: compiled map dict
+        """
+        error = cls.validate(location)
+        if location not in cls.maps:
+            raise ValueError(error)
+        return cls.maps[location]
+
+    @classmethod
+    def validate(cls, location):
+        """Method for checking whether or not a map exists and its current
+        file compiles.
+
+        Args:
+            location (str): localized map name; should be equivalent to the
+                json file name sans extension
+
+        Returns:
+            str: error message, or None if the map is valid
+        """
+        if not cls.loaded:
+            cls.load()
+        if location not in cls.paths:
+            return "Map file for '{}' does not exist".format(location)
+        cls._refresh(location)
+        return cls.errors[location][1] if location in cls.errors else None
+
+    @classmethod
+    def locations(cls):
+        """Method for returning the locations of every cataloged map.
+
+        Returns:
+            list: sorted list of map locations
+        """
+        if not cls.loaded:
+            cls.load()
+        return sorted(cls.paths)
+
+    @classmethod
+    def _refresh(cls, location):
+        """Method for (re-)compiling a map file if its modification time
+        differs from the one it was last compiled at.
+
+        Args:
+            location (str): localized map name
+        """
+        path = cls.paths[location]
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            cls.errors[location] = (
+                None, "Map file {} is missing".format(path))
+            return
+        compiled = cls.maps.get(location, None)
+        if compiled and compiled['mtime'] == mtime:
+            cls.errors.pop(location, None)
+            return
+        if cls.errors.get(location, (None, None))[0] == mtime:
+            return
+        try:
+            with open(path) as raw_json:
+                map_data = json.load(raw_json)
+            cls.maps[location] = cls._compile(path, mtime, map_data)
+            cls.errors.pop(location, None)
+        except (IOError, ValueError) as e:
+            cls.errors[location] = (
+                mtime, "Map file {} is invalid: {}".format(path, e))
+
+    @classmethod
+    def _compile(cls, path, mtime, map_data):
+        """Method for validating the JSON data of a map file and compiling it
+        into Node objects and a node position index.
+
+        Args:
+            path (str): path of the map file
+            mtime (float): modification time of the map file
+            map_data (dict): JSON data of the map file
+
+        Raises:
+            ValueError: the map data is invalid
+
+        Returns:
+            dict: compiled map dict
+        """
+        if not isinstance(map_data, dict):
+            raise ValueError("not a JSON object")
+        for key in ('world', 'subworld', 'nodes'):
+            if key not in map_data:
+                raise ValueError("missing '{}'".format(key))
+        if not isinstance(map_data['nodes'], dict) or not map_data['nodes']:
+            raise ValueError("'nodes' is not a non-empty object")
+
+        nodes = {}
+        for name, node_data in map_data['nodes'].items():
+            coords = [node_data.get('coords', None)]
+            coords.extend(node_data.get('altCoords', []))
+            for coord in coords:
+                if (not isinstance(coord, list) or len(coord) != 2 or not all(
+                        isinstance(value, int) for value in coord)):
+                    raise ValueError(
+                        "node {} has invalid coords {}".format(name, coord))
+            for node_type in node_data.get('types', []):
+                if node_type not in cls.VALID_TYPES:
+                    raise ValueError("node {} has invalid type '{}'".format(
+                        name, node_type))
+            formation = node_data.get('formation', '')
+            if formation and formation not in cls.VALID_FORMATIONS:
+                raise ValueError("node {} has invalid formation '{}'".format(
+                    name, formation))
+            if not isinstance(node_data.get('nightBattle', False), bool):
+                raise ValueError(
+                    "node {} has invalid nightBattle".format(name))
+            nodes[name] = Node(name, node_data)
+
+        return {
+            'path': path,
+            'mtime': mtime,
+            'world': map_data['world'],
+            'subworld': map_data['subworld'],
+            'nodes': nodes,
+            'node_index': cls._build_node_index(nodes)}
+
+    @classmethod
+    def _build_node_index(cls, nodes):
+        """Method for building the grid bucket index of a map's nodes. Every
+        grid cell overlapped by a node's matching area (including its boss
+        buffer) lists that node, in the same order the nodes are iterated in.
+
+        Args:
+            nodes (dict): Node objects keyed by node name
+
+        Returns:
+            dict: list of candidate Nodes keyed by (column, row) grid cell
+        """
+        size = cls.INDEX_CELL_SIZE
+        node_index = {}
+        for node in nodes:
+            node = nodes[node]
+            cells = []
+            for coord in node.all_coords:
+                for col in range(
+                        (coord[0] - node.node_buffer) // size,
+                        (coord[0] + node.node_buffer) // size + 1):
+                    for row in range(
+                            (coord[1] - node.node_buffer) // size,
+                            (coord[1] + node.node_buffer) // size + 1):
+                        if (col, row) not in cells:
+                            cells.append((col, row))
+            for cell in cells:
+                node_index.setdefault(cell, []).append(node)
+        return node_index
+
+
 class MapData(object):
     location = None
     world = None
     subworld = None
     nodes = None
+    node_index = None
 
     def __init__(self, location, regions, config):
         """Initializes a MapData instance. Holds the map and node information
         of the specified map, as well as methods for resolving formation
-        and night battle selections based on node data.
+        and night battle selections based on node data. The map data itself is
+        served by the MapCatalog.
 
         Args:
             location (str): localized map name; should be equivalent to the
@@ -26,30 +253,23 @@ class MapData(object):
         self.kc_region = self.regions['game']
         self.config = config
 
-        # load json data for map
-        json_path = os.path.join(
-            os.getcwd(), 'kcauto-kai.sikuli', 'maps',
-            '{}.json'.format(self.location))
         try:
-            with open(json_path) as raw_json:
-                map_data = json.load(raw_json)
-        except:
+            map_data = MapCatalog.get(self.location)
+        except ValueError as e:
             Util.log_error(
                 "There was an issue opening or loading the specified map file:"
-                " {}.json".format(self.location))
+                " {}".format(e))
             raise
 
         self.world = map_data['world']
         self.subworld = map_data['subworld']
-
-        # instantiate Node objects for every node
-        self.nodes = {}
-        for node in map_data['nodes']:
-            self.nodes[node] = Node(node, map_data['nodes'][node])
+        self.nodes = map_data['nodes']
+        self.node_index = map_data['node_index']
 
     def find_node_by_pos(self, x, y):
-        """Method to loop through the nodes on the map and find the node
-        matching the provided x and y coordinates.
+        """Method to find the node matching the provided x and y coordinates.
+        Only the nodes indexed in the grid cell containing the coordinates are
+        checked.
 
         Args:
             x (int): x coordinate of where to search
@@ -59,9 +279,10 @@ class MapData(object):
             Node or None: Node object for node that exists at the coordinates,
                 otherwise None if no matching Node object was found
         """
-        for node in self.nodes:
-            if self.nodes[node].coord_match(x, y):
-                return self.nodes[node]
+        size = MapCatalog.INDEX_CELL_SIZE
+        for node in self.node_index.get((int(x) // size, int(y) // size), ()):
+            if node.coord_match(x, y):
+                return node
         return None
 
     def resolve_formation(self, node):
@@ -147,6 +368,7 @@ class Node(object):
     coords = None
     all_coords = None
     types = None
+    node_buffer = 20
     formation = ''
     night_battle = None
 
@@ -165,6 +387,7 @@ class Node(object):
         if 'altCoords' in node_data:
             self.all_coords.extend(node_data['altCoords'])
         self.types = node_data['types'] if 'types' in node_data else []
+        self.node_buffer = 35 if 'boss' in self.types else 20
         self.formation = (
             node_data['formation'] if 'formation' in node_data else '')
         self.night_battle = (
@@ -182,12 +405,11 @@ class Node(object):
         Returns:
             bool: True if the x,y coordinates match the Node's, False otherwise
         """
-        node_buffer = 35 if 'boss' in self.types else 20
         for coord in self.all_coords:
-            min_x = coord[0] - node_buffer
-            max_x = coord[0] + node_buffer
-            min_y = coord[1] - node_buffer
-            max_y = coord[1] + node_buffer
+            min_x = coord[0] - self.node_buffer
+            max_x = coord[0] + self.node_buffer
+            min_y = coord[1] - self.node_buffer
+            max_y = coord[1] + self.node_buffer
             if min_x <= x <= max_x and min_y <= y <= max_y:
                 return True
         return False
@@ -0,0 +1,129 @@
+import json
+import os
+from datetime import datetime
+from kca_globals import Globals
+from util import Util
+
+
+class SortieTimeline(object):
+    """Records where the time of each sortie goes: the start and end of every
+    phase of the sortie along with the number of vision calls (see
+    Util.vision_calls) made during it. Every sortie's timeline is appended to
+    Globals.SORTIE_TIMELINE_FILE as a JSON line, and per-phase totals are kept
+    for summarizing.
+
+    Attributes:
+        phase (str): name of the current phase, or None if not in a sortie
+        phase_start (datetime): when the current phase started
+        phase_vision_calls (int): Util.vision_calls when the current phase
+            started
+        phases (list): dicts of the completed phases of the current sortie
+        sortie (dict): map and start time of the current sortie
+        sorties (int): number of sorties recorded
+        totals (dict): [count, seconds, vision calls] of every phase across
+            the recorded sorties, keyed by phase name
+    """
+
+    def __init__(self):
+        self.phase = None
+        self.phase_start = None
+        self.phase_vision_calls = 0
+        self.phases = []
+        self.sortie = None
+        self.sorties = 0
+        self.totals = {}
+
+    def begin_sortie(self, location):
+        """Method for starting the timeline of a new sortie.
+
+        Args:
+            location (str): name of the map being sortied to
+        """
+        self.phases = []
+        self.phase = None
+        self.sortie = {
+            'map': location,
+            'start': datetime.now()}
+
+    def start(self, phase):
+        """Method for ending the current phase and starting the specified
+        one. Does nothing if the phase is already the current one, or if not
+        in a sortie.
+
+        Args:
+            phase (str): name of the phase
+        """
+        if not self.sortie or phase == self.phase:
+            return
+        self._end_phase()
+        self.phase = phase
+        self.phase_start = datetime.now()
+        self.phase_vision_calls = Util.vision_calls
+
+    def finish_sortie(self, outcome):
+        """Method for ending the current sortie's timeline and appending it to
+        the timeline file.
+
+        Args:
+            outcome (str): how the sortie ended (eg. 'completed', 'cancelled')
+        """
+        if not self.sortie:
+            return
+        self._end_phase()
+        end = datetime.now()
+        record = {
+            'map': self.sortie['map'],
+            'start': self.sortie['start'].strftime('%Y-%m-%d %H:%M:%S'),
+            'end': end.strftime('%Y-%m-%d %H:%M:%S'),
+            'seconds': round(
+                (end - self.sortie['start']).total_seconds(), 2),
+            'outcome': outcome,
+            'phases': self.phases}
+        self.sortie = None
+        self.sorties += 1
+        try:
+            with open(os.path.join(
+                    os.getcwd(), Globals.SORTIE_TIMELINE_FILE),
+                    'a') as timeline_file:
+                timeline_file.write(json.dumps(record) + '\n')
+        except IOError:
+            Util.log_warning("Could not write the sortie timeline.")
+
+    def summary(self):
+        """Method for summarizing the mean time and vision calls spent per
+        sortie in each phase, slowest phase first.
+
+        Returns:
+            str: summary, or None if no sorties were recorded
+        """
+        if not self.sorties:
+            return None
+        phases = ', '.join(
+            '{} {:.1f}/{:.0f}'.format(
+                phase, totals[1] / self.sorties,
+                totals[2] / float(self.sorties))
+            for phase, totals in sorted(
+                self.totals.items(), key=lambda item: -item[1][1]))
+        return (
+            "Sortie phases over {} sorties (mean seconds/vision calls per "
+            "sortie): {}".format(self.sorties, phases))
+
+    def _end_phase(self):
+        """Method for ending the current phase, if any, and recording it.
+        """
+        if not self.phase:
+            return
+        end = datetime.now()
+        seconds = (end - self.phase_start).total_seconds()
+        vision_calls = Util.vision_calls - self.phase_vision_calls
+        self.phases.append({
+            'phase': self.phase,
+            'start': self.phase_start.strftime('%H:%M:%S.%f')[:-3],
+            'end': end.strftime('%H:%M:%S.%f')[:-3],
+            'seconds': round(seconds, 3),
+            'vision_calls': vision_calls})
+        totals = self.totals.setdefault(self.phase, [0, 0.0, 0])
+        totals[0] += 1
+        totals[1] += seconds
+        totals[2] += vision_calls
+        self.phase = None
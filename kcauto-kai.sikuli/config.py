@@ -5,7 +5,9 @@ import sys
 import re
 from sikuli import getBundlePath
 from copy import deepcopy
+from mapData import MapCatalog
 from util import Util
+from vision import BACKENDS
 
 
 class Config(object):
@@ -17,11 +19,15 @@ class Config(object):
             (UNUSED)
         changed (bool): indicates whether or not the config has changed from
             the previously stored config
+        changed_sections (set): names of the config sections (keys of
+            SECTIONS) that changed from the previously stored config
         combat (dict): dict of combat-related config settings
         config_file (str): name of config file
         expeditions (dict): dict of expedition-related config settings
         expeditions_all (list): list of all expeditions to be passed in to the
             expedition module
+        file_stamp (tuple): modification time and size of the config file
+            when it was last read
         initialized (bool): indicates whether or not kcauto-kai has been
             initialized with the current config
         jst_offset (int): hours offset from JST
@@ -33,15 +39,31 @@ class Config(object):
         recovery_method (str): specifies the recovery method to be attempted
             by kcauto-kai (UNUSED)
         scheduled_sleep (dict): dict of scheduled sleep-related config settings
+        vision_backend (str): name of the vision backend screen searches are
+            conducted through
     """
 
+    # attributes parsed from each config section, keyed by section name
+    SECTIONS = {
+        'general': ('program', 'jst_offset', 'vision_backend'),
+        'scheduled_sleep': ('scheduled_sleep', ),
+        'expeditions': ('expeditions', 'expeditions_all'),
+        'pvp': ('pvp', ),
+        'combat': ('combat', ),
+        'ship_switcher': ('ship_switcher', ),
+        'quests': ('quests', )
+    }
+
     ok = False
     initialized = False
     changed = False
+    changed_sections = set()
+    file_stamp = None
     program = ''
     recovery_method = ''
     basic_recovery = False
     jst_offset = 0
+    vision_backend = 'sikuli'
 
     scheduled_sleep = {'enabled': False}
     expeditions = {'enabled': False}
@@ -61,13 +83,25 @@ class Config(object):
         os.chdir(getBundlePath())
         os.chdir('..')
         self.config_file = config_file
+        # copy the class-level section settings to the instance so that they
+        # are backed up and diffed along with the rest of the config
+        for section in (
+                'scheduled_sleep', 'expeditions', 'pvp', 'combat',
+                'ship_switcher', 'quests'):
+            setattr(self, section, deepcopy(getattr(self, section)))
         self.read()
 
     def read(self):
         """Method that backs up the previous config, reads in the specified
-        config file and validates it.
+        config file and validates it. Once initialized, the config file is
+        only re-read if its modification time or size changed since it was
+        last read.
         """
+        file_stamp = self._get_file_stamp()
+        if self.initialized and file_stamp == self.file_stamp:
+            return
         backup_config = deepcopy(self.__dict__)
+        self.file_stamp = file_stamp
 
         if not self.initialized:
             Util.log_msg('Reading config')
@@ -114,18 +148,25 @@ class Config(object):
             Util.log_msg('Starting kancolle-auto!')
             self.initialized = True
             self.changed = True
+            self.changed_sections = set(self.SECTIONS)
         elif (not self.ok and not self.initialized):
             Util.log_error('Invalid config. Please check your config file.')
             sys.exit(1)
         elif (not self.ok and self.initialized):
-            Util.warning(
+            Util.log_warning(
                 'Config change detected, but with problems. Rolling back '
                 'config.')
             self._rollback_config(backup_config)
+            # do not re-read the problematic config until it changes again
+            self.file_stamp = file_stamp
         elif (self.ok and self.initialized):
-            if backup_config != self.__dict__:
-                Util.log_warning('Config change detected. Hot-reloading.')
+            changed_sections = self._diff_sections(backup_config)
+            if changed_sections:
+                Util.log_warning(
+                    'Config change detected in {}. Hot-reloading.'.format(
+                        ', '.join(sorted(changed_sections))))
                 self.changed = True
+                self.changed_sections.update(changed_sections)
 
     def validate(self):
         """Method to validate the passed in config file
@@ -134,6 +175,16 @@ class Config(object):
             Util.log_msg("Validating config")
         self.ok = True
 
+        if self.vision_backend not in BACKENDS:
+            Util.log_error("Invalid Vision Backend: '{}'.".format(
+                self.vision_backend))
+            self.ok = False
+        elif not BACKENDS[self.vision_backend].available():
+            Util.log_error(
+                "Vision Backend '{}' is not available in this "
+                "environment.".format(self.vision_backend))
+            self.ok = False
+
         if self.expeditions['enabled']:
             valid_expeditions = range(1, 41) + [
                 'A1', 'A2', 'A3', 'B1', 9998, 9999]
@@ -144,6 +195,11 @@ class Config(object):
                     self.ok = False
 
         if self.combat['enabled']:
+            # validate the map
+            map_error = MapCatalog.validate(self.combat['map'])
+            if map_error:
+                Util.log_error("Invalid Combat Map: {}.".format(map_error))
+                self.ok = False
             # validate the combat engine
             if self.combat['engine'] not in ('legacy', 'live'):
                 Util.log_error("Invalid Combat Engine: '{}'.".format(
@@ -268,6 +324,9 @@ class Config(object):
         """
         self.program = config.get('General', 'Program')
         self.jst_offset = config.getint('General', 'JSTOffset')
+        self.vision_backend = (
+            config.get('General', 'VisionBackend')
+            if config.has_option('General', 'VisionBackend') else 'sikuli')
 
     def _read_scheduled_sleep(self, config):
         """Method to parse the Scheduled Sleep settings of the passed in
@@ -439,6 +498,35 @@ class Config(object):
         """
         self.quests['enabled'] = True
 
+    def _get_file_stamp(self):
+        """Method to get the modification time and size of the config file.
+
+        Returns:
+            tuple: modification time and size of the config file, or None if
+                it could not be accessed
+        """
+        try:
+            stat = os.stat(self.config_file)
+        except OSError:
+            return None
+        return (stat.st_mtime, stat.st_size)
+
+    def _diff_sections(self, config):
+        """Method to find the config sections whose settings differ from the
+        passed in config's.
+
+        Args:
+            config (dict): previously backed up config
+
+        Returns:
+            set: names of the changed config sections
+        """
+        return set(
+            section for section, attributes in self.SECTIONS.items()
+            if any(
+                config.get(attribute) != self.__dict__.get(attribute)
+                for attribute in attributes))
+
     def _rollback_config(self, config):
         """Method to roll back the config to the passed in config's.
 
@@ -446,7 +534,7 @@ class Config(object):
             config (dict): previously backed up config
         """
         for key in config:
-            setattr(self, key, config['key'])
+            setattr(self, key, config[key])
 
     @staticmethod
     def _getlist(config, section, option):
@@ -3,6 +3,8 @@ from datetime import datetime, timedelta
 from random import choice
 from fleet import Fleet
 from nav import Nav
+from scheduler import Scheduler
+from statestore import StateStore
 from util import Util
 
 
@@ -156,6 +158,28 @@ class ExpeditionModule(object):
                 fleet.at_base = True
                 fleet.needs_resupply = True
 
+    def get_state(self):
+        """Method to get the Expedition module's state to persist to the state
+        store.
+
+        Returns:
+            dict: state of every expedition fleet, keyed by fleet id
+        """
+        return dict(
+            (str(fleet_id), fleet.get_state())
+            for fleet_id, fleet in self.fleets.items())
+
+    def restore_state(self, state):
+        """Method to restore the Expedition module's state from the state
+        store.
+
+        Args:
+            state (dict): state, as returned by get_state()
+        """
+        for fleet_id, fleet in self.fleets.items():
+            if str(fleet_id) in state:
+                fleet.restore_state(state[str(fleet_id)])
+
     def print_status(self):
         """Method to print the arrival times of the expedition fleets.
         """
@@ -183,6 +207,7 @@ class ExpeditionFleet(Fleet):
         self.expedition_duration = None
         self.dispatch_fleet_time = datetime.now()
         self.return_time = datetime.now()
+        self._schedule_return()
 
     def choose_expedition(self):
         """Method to randomly choose one of the expeditions specified in the
@@ -202,6 +227,7 @@ class ExpeditionFleet(Fleet):
         self.return_time = self.dispatch_fleet_time + self.expedition_duration
         self.at_base = False
         self.needs_resupply = False
+        self._schedule_return()
 
     def update_return_time(self, hours, minutes):
         """Method to update the ExpeditionFleet's expected return time relative
@@ -216,6 +242,44 @@ class ExpeditionFleet(Fleet):
             hours=hours, minutes=minutes)
         self.at_base = False
         self.needs_resupply = False
+        self._schedule_return()
+
+    def get_state(self):
+        """Method to get the ExpeditionFleet's state to persist to the state
+        store.
+
+        Returns:
+            dict: the fleet's current expedition, dispatch and return times,
+                and flags
+        """
+        return {
+            'expedition': self.expedition,
+            'dispatch_fleet_time': StateStore.encode_time(
+                self.dispatch_fleet_time),
+            'return_time': StateStore.encode_time(self.return_time),
+            'at_base': self.at_base,
+            'needs_resupply': self.needs_resupply}
+
+    def restore_state(self, state):
+        """Method to restore the ExpeditionFleet's state from the state store.
+
+        Args:
+            state (dict): state, as returned by get_state()
+        """
+        self.expedition = state['expedition']
+        self.dispatch_fleet_time = StateStore.decode_time(
+            state['dispatch_fleet_time'])
+        self.return_time = StateStore.decode_time(state['return_time'])
+        self.at_base = state['at_base']
+        self.needs_resupply = state['needs_resupply']
+        self._schedule_return()
+
+    def _schedule_return(self):
+        """Method to push the ExpeditionFleet's expected return time to the
+        scheduler.
+        """
+        Scheduler.schedule(
+            'expedition_fleet_{}'.format(self.fleet_id), self.return_time)
 
 
 def get_expedition_info(expedition):
@@ -1,6 +1,7 @@
-from sikuli import Pattern
-from threading import Thread
+from assetregistry import AssetRegistry
+from kca_globals import Globals
 from util import Util
+from workerpool import WorkerPool
 
 
 class Fleet(object):
@@ -35,8 +36,8 @@ class Fleet(object):
         Util.log_msg(self.damage_counts)
 
     def check_supplies(self, region):
-        """Method to multithread the detection of fleet supply states
-        pre-expedition or pre-sortie.
+        """Method to detect fleet supply states pre-expedition or pre-sortie,
+        checking for the different alerts in parallel.
 
         Args:
             region (Region): Region in which to search for the supply states
@@ -44,11 +45,9 @@ class Fleet(object):
         Returns:
             bool: False if the fleet needs resupply, True otherwise
         """
-        thread_check_alert = Thread(
-            target=self._check_supplies_func, args=('', region))
-        thread_check_alert_red = Thread(
-            target=self._check_supplies_func, args=('_red', region))
-        Util.multithreader([thread_check_alert, thread_check_alert_red])
+        if any(WorkerPool.shared().map(
+                self._check_supplies_func, ('', '_red'), (region, region))):
+            self.needs_resupply = True
 
         if self.needs_resupply:
             Util.log_warning("Fleet needs resupply!")
@@ -62,9 +61,11 @@ class Fleet(object):
         Args:
             type (str): which supply state to check for
             region (Region): Region in which to search for the supply state
+
+        Returns:
+            bool: True if the supply state was found, False otherwise
         """
-        if region.exists('resupply_alert{}.png'.format(type)):
-            self.needs_resupply = True
+        return bool(region.exists('resupply_alert{}.png'.format(type)))
 
     @staticmethod
     def switch(region, fleet):
@@ -77,6 +78,8 @@ class Fleet(object):
             fleet (int): id of fleet to switch to
         """
         Util.wait_and_click_and_wait(
-            region, Pattern('fleet_{}.png'.format(fleet)).exact(),
-            region, Pattern('fleet_{}_active.png'.format(fleet)).exact())
+            region, AssetRegistry.pattern(
+                'fleet_{}.png'.format(fleet), Globals.EXACT_SIMILARITY),
+            region, AssetRegistry.pattern(
+                'fleet_{}_active.png'.format(fleet), Globals.EXACT_SIMILARITY))
         Util.kc_sleep()
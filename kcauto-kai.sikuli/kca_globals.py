@@ -1,12 +1,51 @@
 class Globals(object):
     # for the sikuli scan and observe rates (times per second)
     SIKULI_SCANRATE = 20
-    # time to wait before executing another kcauto-kai loop
-    LOOP_SLEEP_LENGTH = 15
+    # bounds (in seconds) of the main loop's sleep until the next scheduled
+    # deadline; the maximum is also how often config changes are picked up and
+    # deadlines a module has not acted on yet are retried
+    SCHEDULER_MIN_SLEEP = 1
+    SCHEDULER_MAX_SLEEP = 15
     # how often to check the quests outside of other checkpoints
     QUEST_LOOP_CHECK_RATE = 5
     # the number of seconds to add to all waits
     SLEEP_MODIFIER = 0
+    # pauses (in seconds) between consecutive scans in Util.wait_any(); the
+    # last value is repeated once the schedule is exhausted
+    WAIT_ANY_BACKOFF = (0.1, 0.2, 0.3, 0.5, 0.75, 1)
+    # padding (in pixels) around an asset's last known location to search in
+    # before falling back to the full search region
+    LOCATION_CACHE_PADDING = 10
+    # max summed hamming distance between two screen fingerprints for
+    # Nav.current_screen() to consider them the same screen, and the number of
+    # fingerprint samples kept per screen
+    SCREEN_FINGERPRINT_THRESHOLD = 24
+    SCREEN_FINGERPRINT_SAMPLES = 5
+    # minimum per-glyph confidence for a glyph template OCR read to be used
+    # instead of Tesseract, the minimum margin of that confidence over the
+    # next best character's, the number of templates kept per character, the
+    # number of agreeing Tesseract reads of a glyph before it is learned, and
+    # the file (relative to the working directory) the templates persist to
+    GLYPH_OCR_CONFIDENCE = 0.9
+    GLYPH_OCR_MARGIN = 0.05
+    GLYPH_OCR_SAMPLES = 3
+    GLYPH_OCR_CONFIRMATIONS = 3
+    GLYPH_OCR_FILE = 'glyphs.json'
+    # the file (relative to the working directory) the per-phase timeline of
+    # every sortie is appended to as JSON lines
+    SORTIE_TIMELINE_FILE = 'sortie_timeline.jsonl'
+    # battle animations are idled through for this fraction of the shortest
+    # learned duration of the battle before polling for its end; durations
+    # are learned per map and node, keeping this many samples each once there
+    # are at least the minimum number of samples, and persisted to the file
+    # (relative to the working directory)
+    BATTLE_IDLE_FRACTION = 0.8
+    BATTLE_DURATION_SAMPLES = 10
+    BATTLE_DURATION_MIN_SAMPLES = 3
+    BATTLE_DURATION_FILE = 'battle_durations.json'
+    # gated searches are skipped while their region's checksum is unchanged,
+    # but are still conducted after this many consecutive skips
+    FRAME_GATE_MAX_SKIPS = 5
 
     # similarity thresholds for various asset types
     DEFAULT_SIMILARITY = 0.8
@@ -14,6 +53,43 @@ class Globals(object):
     FATIGUE_SIMILARITY = 0.85
     SHIP_LIST_SIMILARITY = 0.96
     FLEET_ICON_SIMILARITY = 0.8
+    # same as Pattern.exact()
+    EXACT_SIMILARITY = 0.99
+
+    # pyramid matching of frame searches over regions of at least this many
+    # pixels: candidates are found at the smallest scale at which the asset
+    # is still at least the minimum size (in pixels), at the asset's
+    # similarity minus the margin, and then confirmed at full resolution at
+    # the asset's own similarity; at most this many candidates are confirmed
+    # for single-match searches. If no candidate is confirmed the search
+    # falls back to a full resolution search
+    PYRAMID_MATCHING = True
+    PYRAMID_SCALES = (0.25, 0.5)
+    PYRAMID_MIN_REGION_AREA = 100000
+    PYRAMID_MIN_ASSET_SIZE = 10
+    PYRAMID_SIMILARITY_MARGIN = 0.1
+    PYRAMID_MAX_CANDIDATES = 5
+
+    # fleet icon tracking in the live combat engine: the icon is searched for
+    # within this many pixels of its last known position, falling back to
+    # the whole game region when it is not found there
+    FLEET_TRACKER_RADIUS = 60
+
+    # max number of decoded assets held by the asset registry
+    ASSET_REGISTRY_SIZE = 512
+    # max number of in-memory images (eg. atlas-backed or downscaled assets)
+    # the OpenCV vision backend holds template Mats of
+    IMAGE_TEMPLATE_CACHE_SIZE = 512
+
+    # number of worker threads in the shared pool parallel searches are run in
+    WORKER_POOL_SIZE = 4
+
+    # the journal file (relative to the working directory) the runtime state
+    # of the modules persists to, the number of records after which it is
+    # compacted, and the max age (in hours) of a state to restore on startup
+    STATE_FILE = 'kcauto-kai.state'
+    STATE_COMPACT_RECORDS = 500
+    STATE_MAX_AGE = 12
 
     # how many combat sorties to conduct when sparkling
     SPARKLING_RUN_COUNT = 3
@@ -6,7 +6,6 @@ import org.sikuli.script.FindFailed as FindFailed
 import org.sikuli.util.JythonHelper as JythonHelper
 import os
 import sys
-from time import sleep
 
 JythonHelper.get().addSysPath(sikuli.getBundlePath())
 sys.path.append(os.getcwd())
@@ -18,7 +17,9 @@ from args import Args  # noqa
 from config import Config  # noqa
 from debug import Debug  # noqa
 from recovery import Recovery  # noqa
+from scheduler import Scheduler  # noqa
 from util import Util  # noqa
+from assetregistry import AssetRegistry  # noqa
 
 # Sikuli settings
 sikuli.Settings.MinSimilarity = Globals.DEFAULT_SIMILARITY
@@ -28,6 +29,9 @@ sikuli.Settings.OcrTextRead = True
 sikuli.Settings.AutoWaitTimeout = 1
 sikuli.Settings.RepeatWaitTime = 0
 
+# decode the assets up front, now that the default similarity is set
+AssetRegistry.load()
+
 # check run-time args
 args = None
 if len(sys.argv) > 1:
@@ -54,26 +58,15 @@ while True:
 
         if not kcauto_kai.conduct_scheduled_sleep():
 
-            kcauto_kai.run_receive_expedition_cycle()
-
-            kcauto_kai.run_quest_cycle()
-
-            kcauto_kai.run_expedition_cycle()
-
-            kcauto_kai.run_pvp_cycle()
-
-            kcauto_kai.run_combat_cycle()
-
-            kcauto_kai.run_repair_cycle()
-
-            kcauto_kai.run_ship_switch_cycle()
-
-            kcauto_kai.run_resupply_cycle()
-
-            kcauto_kai.run_quest_cycle()
+            kcauto_kai.run_due_cycles(Scheduler.due())
 
             kcauto_kai.print_cycle_stats()
 
-        sleep(Globals.LOOP_SLEEP_LENGTH)
+            kcauto_kai.save_state()
+
+        # sleep until the next deadline; the modules that skipped their due
+        # deadlines are retried then
+        Scheduler.sleep_until_next()
     except FindFailed as e:
+        kcauto_kai.save_state()
         Recovery.recover(kcauto_kai, e)
@@ -8,8 +8,12 @@ from repair import RepairModule
 from resupply import ResupplyModule
 from shipswitcher import ShipSwitcher
 from nav import Nav
+from scheduler import Scheduler
 from stats import Stats
+from statestore import StateStore
+from assetregistry import AssetRegistry
 from util import Util
+from workerpool import WorkerPool
 
 
 class KCAutoKai(object):
@@ -33,11 +37,32 @@ class KCAutoKai(object):
             searching and matching
         print_stats_check (bool): whether or not the stats should be displayed
             at the end of the loop
+        state_restored (bool): whether or not the persisted runtime state has
+            been restored into the modules
         sleep_wake_time (datetime): when the script should exit out of
             scheduled sleep
         stats (Stats): Stats instance
     """
 
+    # config sections each module is re-initialized on changes to
+    MODULE_SECTIONS = {
+        'resupply': ('pvp', 'combat', 'expeditions'),
+        'pvp': ('pvp', ),
+        'combat': ('combat', ),
+        'repair': ('combat', ),
+        'ship_switcher': ('combat', 'ship_switcher'),
+        'expedition': ('expeditions', ),
+        'quest': ('quests', )
+    }
+    # scheduler tasks of each module, dropped when it is re-initialized
+    MODULE_TASKS = {
+        'pvp': ('pvp', ),
+        'combat': ('combat', ),
+        'repair': ('repair', ),
+        'expedition': (
+            'expedition_fleet_2', 'expedition_fleet_3', 'expedition_fleet_4')
+    }
+
     kc_region = None
     config = None
     stats = None
@@ -51,6 +76,7 @@ class KCAutoKai(object):
         'quest': None
     }
     print_stats_check = True
+    state_restored = False
     regions = {}
     active_fleets = {}
     combat_fleets = {}
@@ -74,100 +100,182 @@ class KCAutoKai(object):
     def refresh_config(self):
         """Method that allows for the hot-reloading of the config files. Run at
         the beginning of every cycle and instantiates, re-instantiates, or
-        destroys modules as necessary.
+        destroys modules as necessary. Only the modules depending on the
+        config sections that changed (see MODULE_SECTIONS) are
+        re-instantiated; the others keep their state.
         """
         self.config.read()
-        self.config.validate()
 
         if self.config.changed:
-            self.active_fleets = {}
-            self.combat_fleets = {}
-            self.expedition_fleets = {}
-            self._reset_scheduled_sleep()
+            changed_sections = self.config.changed_sections
+            if 'general' in changed_sections:
+                Util.set_vision_backend(self.config.vision_backend)
+            if 'scheduled_sleep' in changed_sections:
+                Scheduler.unschedule('scheduled_sleep_start')
+                Scheduler.unschedule('scheduled_sleep_end')
+                self._reset_scheduled_sleep()
             self._focus_kancolle()
 
+            reset_modules = [
+                module for module in self.modules
+                if changed_sections.intersection(self.MODULE_SECTIONS[module])]
+            for module in reset_modules:
+                for task in self.MODULE_TASKS.get(module, ()):
+                    Scheduler.unschedule(task)
+            if changed_sections.intersection(('pvp', 'combat', 'expeditions')):
+                self._assign_fleets()
+
             # initialize pvp module
-            if self.config.pvp['enabled']:
-                self.active_fleets[1] = CombatFleet(1)
-                self.modules['pvp'] = PvPModule(
-                    self.config, self.stats, self.regions,
-                    self.active_fleets[1])
-            else:
-                self.modules['pvp'] = None
-
-            # initialize combat fleets
-            if self.config.combat['enabled']:
-                if self.config.combat['combined_fleet']:
-                    if 1 not in self.active_fleets:
-                        self.active_fleets[1] = CombatFleet(1)
-                    self.combat_fleets[1] = self.active_fleets[1]
-                    self.active_fleets[2] = CombatFleet(2)
-                    self.combat_fleets[2] = self.active_fleets[2]
-                elif self.config.combat['fleet_mode'] == 'striking':
-                    self.active_fleets[3] = CombatFleet(3)
-                    self.combat_fleets[3] = self.active_fleets[3]
+            if 'pvp' in reset_modules:
+                if self.config.pvp['enabled']:
+                    self.modules['pvp'] = PvPModule(
+                        self.config, self.stats, self.regions,
+                        self.active_fleets[1])
                 else:
-                    if 1 not in self.active_fleets:
-                        self.active_fleets[1] = CombatFleet(1)
-                    self.combat_fleets[1] = self.active_fleets[1]
+                    self.modules['pvp'] = None
 
             # initialize combat module
-            if self.config.combat['enabled']:
-                self.modules['combat'] = CombatModule(
-                    self.config, self.stats, self.regions, self.combat_fleets)
-                self.modules['repair'] = RepairModule(
-                    self.config, self.stats, self.regions, self.combat_fleets,
-                    self.modules['combat'])
-            else:
-                self.modules['combat'] = None
-                self.modules['repair'] = None
+            if 'combat' in reset_modules:
+                if self.config.combat['enabled']:
+                    self.modules['combat'] = CombatModule(
+                        self.config, self.stats, self.regions,
+                        self.combat_fleets)
+                    self.modules['repair'] = RepairModule(
+                        self.config, self.stats, self.regions,
+                        self.combat_fleets, self.modules['combat'])
+                else:
+                    self.modules['combat'] = None
+                    self.modules['repair'] = None
 
             # initialize ship switcher module
-            if self.config.ship_switcher['enabled'] and self.modules['combat']:
-                self.modules['ship_switcher'] = ShipSwitcher(
-                    self.config, self.stats, self.regions, self.combat_fleets,
-                    self.modules['combat'])
-            else:
-                self.modules['ship_switcher'] = None
+            if 'ship_switcher' in reset_modules:
+                if (self.config.ship_switcher['enabled']
+                        and self.modules['combat']):
+                    self.modules['ship_switcher'] = ShipSwitcher(
+                        self.config, self.stats, self.regions,
+                        self.combat_fleets, self.modules['combat'])
+                else:
+                    self.modules['ship_switcher'] = None
 
             # initialize expedition module
-            if self.config.expeditions['enabled']:
-                if 'fleet2' in self.config.expeditions:
-                    fleet2 = ExpeditionFleet(
-                        2, self.config.expeditions['fleet2'])
-                    self.active_fleets[2] = fleet2
-                    self.expedition_fleets[2] = fleet2
-                if 'fleet3' in self.config.expeditions:
-                    fleet3 = ExpeditionFleet(
-                        3, self.config.expeditions['fleet3'])
-                    self.active_fleets[3] = fleet3
-                    self.expedition_fleets[3] = fleet3
-                if 'fleet4' in self.config.expeditions:
-                    fleet4 = ExpeditionFleet(
-                        4, self.config.expeditions['fleet4'])
-                    self.active_fleets[4] = fleet4
-                    self.expedition_fleets[4] = fleet4
-
-                self.modules['expedition'] = ExpeditionModule(
-                 self.config, self.stats, self.regions, self.expedition_fleets)
-            else:
-                self.modules['expedition'] = None
+            if 'expedition' in reset_modules:
+                if self.config.expeditions['enabled']:
+                    self.modules['expedition'] = ExpeditionModule(
+                        self.config, self.stats, self.regions,
+                        self.expedition_fleets)
+                else:
+                    self.modules['expedition'] = None
 
             # initialize resupply module
-            self.modules['resupply'] = ResupplyModule(
-                self.config, self.stats, self.regions, self.active_fleets)
+            if 'resupply' in reset_modules:
+                self.modules['resupply'] = ResupplyModule(
+                    self.config, self.stats, self.regions, self.active_fleets)
 
             # initialize quest module
-            if self.config.quests['enabled']:
-                self.modules['quest'] = QuestModule(
-                    self.config, self.stats, self.regions)
-            else:
-                self.modules['quest'] = None
+            if 'quest' in reset_modules:
+                if self.config.quests['enabled']:
+                    self.modules['quest'] = QuestModule(
+                        self.config, self.stats, self.regions)
+                else:
+                    self.modules['quest'] = None
+            elif (self.modules['quest'] and changed_sections.intersection(
+                    ('pvp', 'combat', 'expeditions'))):
+                # only the quest list depends on the other modules' sections;
+                # redefine it in place to keep the quest checkpoints
+                self.modules['quest'].define_quest_list()
+
+            if reset_modules:
+                Util.log_msg("Re-initialized modules: {}".format(
+                    ', '.join(sorted(reset_modules))))
+            if not self.state_restored:
+                self._restore_state()
 
             # reset the config module's changed status
             self.config.changed = False
+            self.config.changed_sections = set()
             self.print_stats_check = True
 
+    def save_state(self):
+        """Method that persists the runtime state of the stats and every
+        active module to the state store, to be restored after a restart.
+        """
+        StateStore.put('stats', self.stats.get_state())
+        saved = ['stats']
+        for module in self.modules:
+            if hasattr(self.modules[module], 'get_state'):
+                StateStore.put(module, self.modules[module].get_state())
+                saved.append(module)
+        StateStore.touch(saved)
+
+    def _restore_state(self):
+        """Method that restores the runtime state of the stats and every
+        active module persisted by a previous run, so that their timers,
+        caches, and checkpoints do not have to be rediscovered in-game.
+        """
+        self.state_restored = True
+        restored = []
+        state = StateStore.get('stats')
+        if state:
+            self.stats.restore_state(state)
+            restored.append('stats')
+        for module in sorted(self.modules):
+            state = StateStore.get(module)
+            if state and hasattr(self.modules[module], 'restore_state'):
+                self.modules[module].restore_state(state)
+                restored.append(module)
+        if restored:
+            Util.log_msg("Restored the runtime state of: {}".format(
+                ', '.join(restored)))
+
+    def _assign_fleets(self):
+        """Method that assigns the fleets of the pvp, combat, and expedition
+        modules. Fleets that keep their role are carried over from the
+        previous assignment so that modules that are not re-initialized keep
+        referencing them.
+        """
+        previous_fleets = self.active_fleets
+        expeditions_changed = (
+            'expeditions' in self.config.changed_sections)
+        self.active_fleets = {}
+        self.combat_fleets = {}
+        self.expedition_fleets = {}
+
+        def _combat_fleet(fleet_id):
+            if fleet_id not in self.active_fleets:
+                fleet = previous_fleets.get(fleet_id)
+                self.active_fleets[fleet_id] = (
+                    fleet if isinstance(fleet, CombatFleet)
+                    else CombatFleet(fleet_id))
+            return self.active_fleets[fleet_id]
+
+        # assign pvp fleet
+        if self.config.pvp['enabled']:
+            _combat_fleet(1)
+
+        # assign combat fleets
+        if self.config.combat['enabled']:
+            if self.config.combat['combined_fleet']:
+                self.combat_fleets[1] = _combat_fleet(1)
+                self.combat_fleets[2] = _combat_fleet(2)
+            elif self.config.combat['fleet_mode'] == 'striking':
+                self.combat_fleets[3] = _combat_fleet(3)
+            else:
+                self.combat_fleets[1] = _combat_fleet(1)
+
+        # assign expedition fleets
+        if self.config.expeditions['enabled']:
+            for fleet_id in (2, 3, 4):
+                key = 'fleet{}'.format(fleet_id)
+                if key not in self.config.expeditions:
+                    continue
+                fleet = previous_fleets.get(fleet_id)
+                if expeditions_changed or not isinstance(
+                        fleet, ExpeditionFleet):
+                    fleet = ExpeditionFleet(
+                        fleet_id, self.config.expeditions[key])
+                self.active_fleets[fleet_id] = fleet
+                self.expedition_fleets[fleet_id] = fleet
+
     def _reset_scheduled_sleep(self):
         """Method to reset the scheduled sleep attributes.
         """
@@ -215,6 +323,36 @@ class KCAutoKai(object):
         Nav.goto(self.regions, 'home')
         return self.run_receive_expedition_cycle()
 
+    def run_due_cycles(self, due_tasks):
+        """Method to run the cycles of the modules with due scheduler tasks
+        (see MODULE_TASKS), along with the unscheduled cycles (receiving
+        expeditions, quests, and resupplies) whose checks are cheap. The
+        repair and ship switch cycles also follow a combat cycle. Modules
+        replace or remove their due deadlines once they act on them; those
+        they skip stay due and are retried on the next loop.
+
+        Args:
+            due_tasks (list): names of the due scheduler tasks
+        """
+        def _due(module):
+            return any(
+                task in due_tasks for task in self.MODULE_TASKS[module])
+
+        self.combat_cycle = False
+        self.run_receive_expedition_cycle()
+        self.run_quest_cycle()
+        if _due('expedition'):
+            self.run_expedition_cycle()
+        if _due('pvp'):
+            self.run_pvp_cycle()
+        if _due('combat'):
+            self.run_combat_cycle()
+        if self.combat_cycle or _due('repair'):
+            self.run_repair_cycle()
+        self.run_ship_switch_cycle()
+        self.run_resupply_cycle()
+        self.run_quest_cycle()
+
     def run_receive_expedition_cycle(self):
         """Method that checks for and receives the returned expedition. Calls
         itself to check for and receive additional returned expeditions.
@@ -227,7 +365,8 @@ class KCAutoKai(object):
             if self.modules['expedition']:
                 # expedition module is enabled
                 self.modules['expedition'].receive_expedition()
-            self.regions['lower_right_corner'].wait('next.png', 30)
+            Util.gated_wait(
+                self.regions['lower_right_corner'], 'next.png', 30)
             while not self.regions['home_menu'].exists('home_menu_sortie.png'):
                 Util.click_preset_region(self.regions, 'shipgirl')
                 Util.kc_sleep()
@@ -364,7 +503,7 @@ class KCAutoKai(object):
         """Method that runs the repair cycle.
 
         Returns:
-            bool: False if there is no Combat module
+            bool: True if ships were repaired, False otherwise
         """
         if not self.modules['combat']:
             return False
@@ -373,6 +512,8 @@ class KCAutoKai(object):
             self.modules['repair'].goto_repair()
 
             self.modules['repair'].repair_fleets()
+            return True
+        return False
 
     def run_ship_switch_cycle(self):
         """Method that runs the ship switch cycle.
@@ -412,10 +553,13 @@ class KCAutoKai(object):
                 # specified time has already passed today, set to next day
                 self.next_scheduled_sleep_time = (
                     self.next_scheduled_sleep_time + timedelta(days=1))
+            Scheduler.schedule(
+                'scheduled_sleep_start', self.next_scheduled_sleep_time)
 
         # if the current time is before the wake time, stay asleep
         if cur_time < self.sleep_wake_time:
             return True
+        Scheduler.unschedule('scheduled_sleep_end')
 
         # if the current time is past the schedule sleep time, go to sleep
         if cur_time >= self.next_scheduled_sleep_time:
@@ -431,6 +575,9 @@ class KCAutoKai(object):
             # set the next scheduled sleep time as well
             self.next_scheduled_sleep_time = (
                 self.next_scheduled_sleep_time + timedelta(days=1))
+            Scheduler.schedule('scheduled_sleep_end', self.sleep_wake_time)
+            Scheduler.schedule(
+                'scheduled_sleep_start', self.next_scheduled_sleep_time)
             return True
         return False
 
@@ -453,4 +600,22 @@ class KCAutoKai(object):
                 self.modules['quest'].print_status()
 
             self.stats.print_stats()
+            pool_summary = WorkerPool.shared().summary()
+            if pool_summary:
+                Util.log_msg(pool_summary)
+            registry_summary = AssetRegistry.summary()
+            if registry_summary:
+                Util.log_msg(registry_summary)
+            location_cache_stats = Util.get_location_cache_stats()
+            lookups = (
+                location_cache_stats['hits'] + location_cache_stats['misses'])
+            if lookups:
+                Util.log_msg(
+                    "Location cache: {:.1%} hit rate over {} lookups".format(
+                        location_cache_stats['hits'] / float(lookups),
+                        lookups))
+            if Util.searches_saved:
+                Util.log_msg(
+                    "Search gate: {} searches skipped on unchanged "
+                    "regions".format(Util.searches_saved))
         self.print_stats_check = False
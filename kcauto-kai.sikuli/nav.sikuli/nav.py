@@ -1,5 +1,7 @@
-from sikuli import Pattern
+import org.sikuli.script.FindFailed as FindFailed
 from random import randint, choice
+from kca_globals import Globals
+from assetregistry import AssetRegistry
 from util import Util
 
 
@@ -59,8 +61,11 @@ class NavNode(object):
             Util.wait_and_click(
                 regions[c['click_target_region']], c['click_target'])
             Util.rejigger_mouse(regions, 'top')
-            regions[c['wait_target_region']].wait(
-                Pattern(c['wait_target']).exact(), 60)
+            Util.hinted_wait(
+                regions[c['wait_target_region']],
+                AssetRegistry.pattern(
+                    c['wait_target'], Globals.EXACT_SIMILARITY), 60)
+            Nav.learn_screen(regions, target)
             return c['target']
         else:
             Util.log_error(
@@ -74,6 +79,32 @@ class Nav(object):
     instantiated.
     """
 
+    # fixed areas of the game screen fingerprinted by current_screen(), as
+    # (x, y, width, height) offsets into the game region
+    SCREEN_FINGERPRINT_AREAS = (
+        (0, 120, 100, 280),     # side menu
+        (115, 25, 550, 50),     # top menu
+        (30, 85, 335, 325),     # home menu
+        (100, 100, 700, 45),    # top submenu
+        (700, 400, 100, 80))    # lower right corner
+    # labels that map onto the generic navigation nodes
+    TOP_MENU_SCREENS = ('top_menu', 'quests')
+    SIDE_MENU_SCREENS = (
+        'side_menu', 'sortie', 'combat', 'pvp', 'expedition', 'fleetcomp',
+        'resupply', 'equipment', 'repair', 'development')
+    # (region, asset) template probes that confirm the screen fingerprints
+    # of each label are matched against; labels of the generic navigation
+    # nodes are confirmed by the node's probe
+    SCREEN_PROBES = {
+        'home': ('home_menu', 'home_menu_sortie.png'),
+        'side_menu': ('side_menu', 'side_menu_home.png'),
+        'top_menu': ('lower_left', 'top_menu_home.png'),
+        'night_battle': ('game', 'combat_nb_fight.png'),
+        'results': ('lower_right_corner', 'next.png')
+    }
+    # label -> list of fingerprints, trained from template confirmations
+    screen_fingerprints = {}
+
     # define all the NavNodes first
     home = NavNode('home')
     top_menu = NavNode('top_menu')
@@ -225,16 +256,10 @@ class Nav(object):
         Util.rejigger_mouse(regions, 'top')
         Util.kc_sleep()
         # Figure out where we are
-        current_location = None
-        if regions['home_menu'].exists('home_menu_sortie.png'):
-            Util.log_msg("At home")
-            current_location = cls.home
-        elif regions['side_menu'].exists('side_menu_home.png'):
-            Util.log_msg("At side menu")
-            current_location = cls.side_menu
-        elif regions['lower_left'].exists('top_menu_home.png'):
-            Util.log_msg("At top menu")
-            current_location = cls.top_menu
+        current_location = cls.node_for_screen(cls.current_screen(regions))
+        if current_location is None:
+            raise FindFailed("Could not determine the current screen")
+        Util.log_msg("At {}".format(current_location.name.replace('_', ' ')))
 
         if current_location.name == 'home':
             # Starting from home screen
@@ -278,6 +303,157 @@ class Nav(object):
         current_location.navigate_to(regions, destination)
         return True
 
+    @classmethod
+    def current_screen(cls, regions, probe=True):
+        """Method that labels the current screen from a single capture of the
+        game region by comparing perceptual hashes of fixed areas of the
+        screen against fingerprints learned for previously confirmed screens.
+        Since near-identical screens hash alike, every learned screen close
+        enough is confirmed with its template probe (see SCREEN_PROBES),
+        closest first, before it is trusted. If none is confirmed, the home,
+        side menu, and top menu template probes are used instead, and their
+        result is learned.
+
+        Args:
+            regions (dict): dict of pre-defined kcauto-kai regions
+            probe (bool, optional): whether or not to fall back to template
+                probes if the fingerprints are inconclusive
+
+        Returns:
+            str: label of the current screen (eg. 'home', 'side_menu',
+                'quests', 'results'), or None if it could not be determined
+        """
+        Util.capture_frame(regions['game'])
+        fingerprint = cls._fingerprint(regions)
+        candidates = []
+        for label, samples in cls.screen_fingerprints.items():
+            distance = min(
+                sum(
+                    Util.hamming_distance(a, b)
+                    for a, b in zip(fingerprint, sample))
+                for sample in samples)
+            if distance <= Globals.SCREEN_FINGERPRINT_THRESHOLD:
+                candidates.append((distance, label))
+        for distance, label in sorted(candidates):
+            if cls._confirm_screen(regions, label):
+                cls._store_fingerprint(label, fingerprint)
+                return label
+        if not probe:
+            return None
+
+        if Util.hinted_exists(regions['home_menu'], 'home_menu_sortie.png'):
+            label = 'home'
+        elif Util.hinted_exists(regions['side_menu'], 'side_menu_home.png'):
+            label = 'side_menu'
+        elif Util.hinted_exists(regions['lower_left'], 'top_menu_home.png'):
+            label = 'top_menu'
+        else:
+            return None
+        cls._store_fingerprint(label, fingerprint)
+        return label
+
+    @classmethod
+    def learn_screen(cls, regions, label, frame=False):
+        """Method to record the fingerprint of the current screen under the
+        specified label, to be called once the screen has been confirmed by
+        other means (eg. a template match). If the screen was confirmed
+        against the stored frame (see Util.capture_frame()), the frame is
+        reused; otherwise the game region is only captured if the label has
+        fewer than Globals.SCREEN_FINGERPRINT_SAMPLES fingerprints.
+
+        Args:
+            regions (dict): dict of pre-defined kcauto-kai regions
+            label (str): label of the current screen
+            frame (bool, optional): whether or not the screen was confirmed
+                against the stored frame
+        """
+        game = regions['game']
+        if not (frame and Util.frame_covers(game)):
+            if (len(cls.screen_fingerprints.get(label, ())) >=
+                    Globals.SCREEN_FINGERPRINT_SAMPLES):
+                return
+            Util.capture_frame(game)
+        cls._store_fingerprint(label, cls._fingerprint(regions))
+
+    @classmethod
+    def _confirm_screen(cls, regions, label):
+        """Method to confirm that the current screen is the specified screen
+        with the label's template probe, checking the probe asset's last
+        known location first.
+
+        Args:
+            regions (dict): dict of pre-defined kcauto-kai regions
+            label (str): label of the screen
+
+        Returns:
+            bool: True if the screen was confirmed, False otherwise (or if the
+                label has no probe)
+        """
+        if label in cls.TOP_MENU_SCREENS:
+            label = 'top_menu'
+        elif label in cls.SIDE_MENU_SCREENS:
+            label = 'side_menu'
+        if label not in cls.SCREEN_PROBES:
+            return False
+        region, asset = cls.SCREEN_PROBES[label]
+        return bool(Util.hinted_exists(regions[region], asset, 0))
+
+    @classmethod
+    def _fingerprint(cls, regions):
+        """Method that generates the fingerprint of the current screen from
+        the stored frame (see Util.capture_frame()), which must cover the game
+        region: the perceptual hashes of each of the fingerprint areas.
+
+        Args:
+            regions (dict): dict of pre-defined kcauto-kai regions
+
+        Returns:
+            tuple: hashes of the fingerprint areas
+        """
+        game = regions['game']
+        roi = Util.frame.getROI()
+        image = Util.frame.getImage()
+        return tuple(
+            Util.average_hash(image.getSubimage(
+                game.x - roi.x + x, game.y - roi.y + y, w, h))
+            for x, y, w, h in cls.SCREEN_FINGERPRINT_AREAS)
+
+    @classmethod
+    def _store_fingerprint(cls, label, fingerprint):
+        """Method to add a fingerprint to a label's samples, dropping the
+        oldest sample when the per-label limit is reached.
+
+        Args:
+            label (str): label of the screen
+            fingerprint (tuple): fingerprint of the screen
+        """
+        samples = cls.screen_fingerprints.setdefault(label, [])
+        if fingerprint in samples:
+            return
+        samples.append(fingerprint)
+        if len(samples) > Globals.SCREEN_FINGERPRINT_SAMPLES:
+            samples.pop(0)
+
+    @classmethod
+    def node_for_screen(cls, label):
+        """Method that maps a current_screen() label to the navigation node
+        that navigation can start from.
+
+        Args:
+            label (str): label of the screen
+
+        Returns:
+            NavNode: matching navigation node, or None if the screen is not
+                navigable
+        """
+        if label == 'home':
+            return cls.home
+        elif label in cls.TOP_MENU_SCREENS:
+            return cls.top_menu
+        elif label in cls.SIDE_MENU_SCREENS:
+            return cls.side_menu
+        return None
+
     @staticmethod
     def _choose_sidestep(exclude):
         """Method to choose the sidestep destination, excluding the defined
@@ -1,9 +1,11 @@
 from sikuli import Pattern
 from datetime import datetime, timedelta
 from random import randint
-from threading import Thread
 from nav import Nav
+from scheduler import Scheduler
+from statestore import StateStore
 from util import Util
+from workerpool import WorkerPool
 
 
 class PvPModule(object):
@@ -74,24 +76,21 @@ class PvPModule(object):
         Util.rejigger_mouse(self.regions, 'top')
         Util.wait_and_click(self.regions[formation], formation)
 
-        while not (
-                self.regions['lower_right_corner'].exists('next.png') or
-                self.kc_region.exists('combat_nb_fight.png')):
-            # wait through combat
-            pass
+        # wait through combat
+        target, match = Util.wait_any([
+            (self.regions['lower_right_corner'], 'next.png'),
+            (self.kc_region, 'combat_nb_fight.png')])
 
         # resolve night battle
-        if self.kc_region.exists('combat_nb_fight.png'):
+        if target == 'combat_nb_fight.png':
             if (night_battle):
                 Util.check_and_click(
                     self.kc_region, 'combat_nb_fight.png')
             else:
                 Util.check_and_click(
                     self.kc_region, 'combat_nb_retreat.png')
-
-        while not self.regions['lower_right_corner'].exists('next.png'):
             # wait through night battle combat, if applicable
-            pass
+            Util.wait_any([(self.regions['lower_right_corner'], 'next.png')])
 
         Util.click_preset_region(self.regions, 'center')
 
@@ -105,6 +104,23 @@ class PvPModule(object):
         self.fleet.needs_resupply = True
         return True
 
+    def get_state(self):
+        """Method to get the PvP module's state to persist to the state store.
+
+        Returns:
+            dict: the next PvP time
+        """
+        return {'next_pvp_time': StateStore.encode_time(self.next_pvp_time)}
+
+    def restore_state(self, state):
+        """Method to restore the PvP module's state from the state store.
+
+        Args:
+            state (dict): state, as returned by get_state()
+        """
+        self.next_pvp_time = StateStore.decode_time(state['next_pvp_time'])
+        Scheduler.schedule('pvp', self.next_pvp_time)
+
     def print_status(self):
         """Prints the next PvP time to console.
         """
@@ -121,6 +137,7 @@ class PvPModule(object):
             self.next_pvp_time = Util.convert_from_jst(temp_time, self.config)
         else:
             self.next_pvp_time = datetime.now()
+        Scheduler.schedule('pvp', self.next_pvp_time)
 
     def _reset_next_pvp_time(self):
         """Method to reset the next PvP time. Called when the next PvP time
@@ -135,6 +152,7 @@ class PvPModule(object):
         else:
             temp_time = jst_time.replace(hour=5, minute=randint(5, 55))
         self.next_pvp_time = Util.convert_from_jst(temp_time, self.config)
+        Scheduler.schedule('pvp', self.next_pvp_time)
 
     def _pvp_planner(self, opponent):
         """Method to ascertain the formation and night battle of the PvP.
@@ -167,15 +185,15 @@ class PvPModule(object):
         return (formation, night_battle)
 
     def _count_ships(self):
-        """Method to multithread counting of opponent ships.
+        """Method to count opponent ships, counting ships, SSs, and SSVs in
+        parallel.
 
         Returns:
             dict: dict of enemy ship counts
         """
-        t1 = Thread(target=self._count_ships_func, args=('ship', ))
-        t2 = Thread(target=self._count_ships_func, args=('ss', ))
-        t3 = Thread(target=self._count_ships_func, args=('ssv', ))
-        Util.multithreader([t1, t2, t3])
+        modes = ('ship', 'ss', 'ssv')
+        self.opponent = dict(zip(
+            modes, WorkerPool.shared().map(self._count_ships_func, modes)))
         return self.opponent
 
     def _count_ships_func(self, mode):
@@ -183,6 +201,9 @@ class PvPModule(object):
 
         Args:
             mode (str): specifies whether to count ships, SSs, or SSVs
+
+        Returns:
+            int: number of ships of the type
         """
         if mode == 'ship':
             img_target = 'pvp_lvl.png'
@@ -191,9 +212,5 @@ class PvPModule(object):
         elif mode == 'ssv':
             img_target = 'ship_class_ssv.png'
 
-        self.opponent[mode] = 0
-        count = Util.findAll_wrapper(
-            self.regions['enemy_pvp_fleet'], img_target)
-
-        for i in count:
-            self.opponent[mode] += 1
+        return len(Util.findAll_wrapper(
+            self.regions['enemy_pvp_fleet'], img_target))
@@ -18,15 +18,12 @@ class QuestModule(object):
         self.stats = stats
         self.regions = regions
         self.kc_region = self.regions['game']
-        self.quest_list = []
         self.active_quests = []
-        self.active_quest_types = []
-        self.inactive_quest_types = ['b', 'c', 'd', 'e']
         self.combat_checkpoints = []
         self.pvp_checkpoints = []
         self.expedition_checkpoints = []
         self.loop_checkpoint = None
-        self._define_quest_list()
+        self.define_quest_list()
 
     def goto_quests(self):
         """Method to navigate to the quest menu.
@@ -111,6 +108,31 @@ class QuestModule(object):
         if post_check_finished_quests > pre_check_finished_quests:
             self._run_check_quests_wrapper()
 
+    def get_state(self):
+        """Method to get the Quest module's state to persist to the state
+        store.
+
+        Returns:
+            dict: the quest checkpoints
+        """
+        return {
+            'combat_checkpoints': self.combat_checkpoints,
+            'pvp_checkpoints': self.pvp_checkpoints,
+            'expedition_checkpoints': self.expedition_checkpoints,
+            'loop_checkpoint': self.loop_checkpoint}
+
+    def restore_state(self, state):
+        """Method to restore the Quest module's state from the state store.
+        first_run is left set, since the quests may have changed while
+        kcauto-kai was not running.
+
+        Args:
+            state (dict): state, as returned by get_state()
+        """
+        for attribute, value in state.items():
+            if attribute != 'first_run':
+                setattr(self, attribute, value)
+
     def print_status(self):
         """Method to print the next checkpoints for checking quests.
         """
@@ -277,9 +299,13 @@ class QuestModule(object):
         icon_img = 'icon_{}.png'.format(type)
         return Util.read_number(region, icon_img, 'r', 33, 1)
 
-    def _define_quest_list(self):
+    def define_quest_list(self):
         """Defines the valid quests based on the supplied kcauto-kai Config.
+        Re-run when the pvp, combat, or expeditions config changes.
         """
+        self.quest_list = []
+        self.active_quest_types = []
+        self.inactive_quest_types = ['b', 'c', 'd', 'e']
         self.active_quest_types.append('e')
         self.inactive_quest_types.remove('e')
         self.quest_list.append(get_quest_info('e4'))
@@ -1,5 +1,7 @@
 from sikuli import App, Region, Location, Pattern, Key
+import org.sikuli.script.FindFailed as FindFailed
 from time import sleep
+from nav import Nav
 from util import Util
 
 
@@ -33,24 +35,30 @@ class Recovery(object):
         # basic recovery attempt
         type(Key.ESC)
         sleep(1)
-        if kc_region.exists(Pattern('kc_reference_point.png').exact()):
-            # reference point exists, so we are in-game
-            Util.log_success("Recovery successful.")
-            kcauto_kai.stats.increment_recoveries()
-            return True
-        elif kc_region.exists('next.png'):
+        reference_point = Pattern('kc_reference_point.png').exact()
+        recovery_targets = [
+            (kc_region, reference_point), (kc_region, 'next.png')]
+        # classify the screen from a single capture before probing templates
+        screen = Nav.current_screen(regions, probe=False)
+        if Nav.node_for_screen(screen):
+            target = reference_point
+        elif screen == 'results':
+            target = 'next.png'
+        else:
+            target = Recovery._wait_any_or_none(recovery_targets)
+        if target == 'next.png':
             # crashed at some results screen; try to click it away until we see
             # the main game screen
-            while (kc_region.exists('next.png') and
-                    not kc_region.exists(
-                        Pattern('kc_reference_point.png').exact())):
+            Nav.learn_screen(regions, 'results')
+            while target == 'next.png':
                 Util.click_preset_region(regions, 'center')
                 sleep(2)
-            if kc_region.exists(Pattern('kc_reference_point.png').exact()):
-                # reference point exists, so we are back in-game
-                Util.log_success("Recovery successful.")
-                kcauto_kai.stats.increment_recoveries()
-                return True
+                target = Recovery._wait_any_or_none(recovery_targets)
+        if target == reference_point:
+            # reference point exists, so we are in-game
+            Util.log_success("Recovery successful.")
+            kcauto_kai.stats.increment_recoveries()
+            return True
 
         # catbomb recovery
         if kc_region.exists('catbomb.png') and recovery_method != 'None':
@@ -94,3 +102,22 @@ class Recovery(object):
         Util.log_error("** Irrecoverable crash. **")
         print(e)
         raise
+
+    @staticmethod
+    def _wait_any_or_none(region_target_pairs, timeout=1):
+        """Method that wraps Util.wait_any() to return None instead of raising
+        FindFailed, since a miss is an expected outcome during recovery.
+
+        Args:
+            region_target_pairs (list): list of (Region, target) tuples
+            timeout (int, optional): max amount of time to wait for any of
+                the targets to appear
+
+        Returns:
+            str, Pattern: the target that was matched, or None
+        """
+        try:
+            target, match = Util.wait_any(region_target_pairs, timeout)
+            return target
+        except FindFailed:
+            return None
@@ -3,6 +3,8 @@ from datetime import datetime, timedelta
 from kca_globals import Globals
 from combat import CombatFleet
 from nav import Nav
+from scheduler import Scheduler
+from statestore import StateStore
 from util import Util
 
 
@@ -31,6 +33,30 @@ class RepairModule(object):
         """
         Nav.goto(self.regions, 'repair')
 
+    def get_state(self):
+        """Method to get the Repair module's state to persist to the state
+        store.
+
+        Returns:
+            dict: the number of repair slots and the ongoing repair timers
+        """
+        return {
+            'repair_slots': self.repair_slots,
+            'repair_timers': [
+                StateStore.encode_time(timer) for timer in self.repair_timers]}
+
+    def restore_state(self, state):
+        """Method to restore the Repair module's state from the state store.
+
+        Args:
+            state (dict): state, as returned by get_state()
+        """
+        self.repair_slots = state['repair_slots']
+        self.repair_timers = [
+            StateStore.decode_time(timer) for timer in state['repair_timers']]
+        self._remove_old_timers()
+        self._schedule_repair_check()
+
     def check_need_to_repair(self):
         """Method to check whether or not ships need to be repaired in the
         active combat fleets.
@@ -58,7 +84,8 @@ class RepairModule(object):
 
         # find busy docks and resolve existing repair timers
         self.repair_timers = []
-        dock_busy_matches = Util.findAll_wrapper(
+        Util.capture_frame(self.kc_region)
+        dock_busy_matches = Util.frame_find_all(
             self.kc_region, 'dock_timer.png')
         dock_busy_count = 0
 
@@ -66,10 +93,12 @@ class RepairModule(object):
             dock_busy_count += 1
             repair_timer = Util.read_timer(self.kc_region, match, 'l', 100)
             self.repair_timers.append(self._timer_to_datetime(repair_timer))
+        self._schedule_repair_check()
 
         # find empty docks
-        dock_empty_matches = Util.findAll_wrapper(
+        dock_empty_matches = Util.frame_find_all(
             self.kc_region, 'dock_empty.png')
+        Util.release_frame()
         dock_empty_count = 0
 
         for match in dock_empty_matches:
@@ -229,6 +258,7 @@ class RepairModule(object):
         now = datetime.now()
         self.repair_timers = [
             timer for timer in self.repair_timers if timer > now]
+        self._schedule_repair_check()
 
     def _update_combat_next_sortie_time(self, timer):
         """Method to update the combat module's next sortie time based on the
@@ -240,9 +270,19 @@ class RepairModule(object):
         """
         repair_end_time = self._timer_to_datetime(timer)
         self.repair_timers.append(repair_end_time)
+        self._schedule_repair_check()
 
         if repair_end_time > self.combat.next_combat_time:
             timer['minutes'] += 1
             self.combat.set_next_combat_time(timer)
             Util.log_msg("Delaying next combat sortie to {}".format(
                 self.combat.next_combat_time.strftime('%Y-%m-%d %H:%M:%S')))
+
+    def _schedule_repair_check(self):
+        """Method to push the earliest repair timer to the scheduler, since a
+        dock frees up when it ends.
+        """
+        if self.repair_timers:
+            Scheduler.schedule('repair', min(self.repair_timers))
+        else:
+            Scheduler.unschedule('repair')
@@ -0,0 +1,1017 @@
+"""Offline replay harness for kcauto-kai.
+
+Runs kcauto-kai (or any of its modules) headless under CPython 2.7 against a
+recorded session instead of a live Sikuli desktop and game. install() replaces
+the sikuli, org.sikuli.* and java.awt.* modules with a fake backend whose
+Region/Pattern/Match/Finder searches are answered from the current state of a
+scripted state machine, and replaces time.sleep and datetime.now with a
+virtual clock so that waits cost nothing. Searches are answered from the boxes
+listed in the manifest; no template is matched against pixels, so replays
+exercise kcauto-kai's logic but not a matching engine, and only the sikuli
+vision backend can be used.
+
+A session is a JSON manifest:
+
+    {
+        "start": "home",
+        "origin": [0, 0],
+        "screen": [1280, 720],
+        "seed": 0,
+        "states": {
+            "home": {
+                "frame": "frames/home.png",
+                "assets": {
+                    "kc_reference_point.png": [[99, 0, 30, 30]],
+                    "home_menu_sortie.png": [[160, 200, 90, 90, 0.95]]
+                },
+                "text": [{"box": [600, 5, 40, 20], "text": "123"}],
+                "clicks": [
+                    {"asset": "home_menu_sortie.png", "next": "sortie"},
+                    {"box": [0, 0, 800, 480], "next": "home"}
+                ],
+                "keys": {"F5": "home"},
+                "after": {"seconds": 5, "next": "home"},
+                "final": false
+            }
+        }
+    }
+
+All boxes are [x, y, width, height(, score)] relative to the upper-left
+corner of the game screen, which sits at "origin" on the fake screen. An asset
+is found if one of its boxes lies within the searched region and its score
+(default 1.0) is at least the similarity of the searched Pattern. Clicks and
+key presses move to the "next" state of the first matching transition, and
+"after" moves to its "next" state once the state has been active for the
+specified number of virtual seconds. "frame" is an optional 8-bit PNG of the
+game screen used for pixel-level reads (screen fingerprints, glyph OCR).
+Entering a "final" state ends the replay.
+
+Usage:
+    python replay.py <session.json> [<config.ini>]
+"""
+
+import datetime
+import json
+import os
+import random
+import runpy
+import struct
+import sys
+import time
+import types
+import zlib
+from copy import copy
+
+
+class ReplayError(Exception):
+    """Raised when the session manifest is invalid.
+    """
+
+
+class ReplayFinished(Exception):
+    """Raised when the replay reaches a final state or its virtual time limit.
+    Not a FindFailed, so kcauto-kai's recovery does not catch it.
+    """
+
+
+class Settings(object):
+    MinSimilarity = 0.7
+    WaitScanRate = 3
+    ObserveScanRate = 3
+    OcrTextRead = False
+    AutoWaitTimeout = 3
+    RepeatWaitTime = 1
+
+
+class Button(object):
+    LEFT = 16
+    MIDDLE = 8
+    RIGHT = 4
+
+
+class Key(object):
+    ESC = 'ESC'
+    F5 = 'F5'
+    SPACE = 'SPACE'
+    TAB = 'TAB'
+    ALT = 'ALT'
+    DOWN = 'DOWN'
+    UP = 'UP'
+    ENTER = 'ENTER'
+
+
+FOREVER = float('inf')
+
+
+class FindFailed(Exception):
+    pass
+
+
+class Rectangle(object):
+    def __init__(self, x=0, y=0, width=0, height=0):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def contains(self, x, y, width=0, height=0):
+        return (
+            self.x <= x and self.y <= y and
+            x + width <= self.x + self.width and
+            y + height <= self.y + self.height)
+
+
+class RenderingHints(object):
+    KEY_INTERPOLATION = 'interpolation'
+    VALUE_INTERPOLATION_BILINEAR = 'bilinear'
+
+
+class Location(object):
+    def __init__(self, x, y):
+        self.x = int(x)
+        self.y = int(y)
+
+    def getX(self):
+        return self.x
+
+    def getY(self):
+        return self.y
+
+    def offset(self, dx, dy):
+        return Location(self.x + dx, self.y + dy)
+
+    def __repr__(self):
+        return 'L({},{})'.format(self.x, self.y)
+
+
+class Pattern(object):
+    def __init__(self, filename):
+        self.scale = 1.0
+        self.similarity = Settings.MinSimilarity
+        self.target_offset = (0, 0)
+        if isinstance(filename, Pattern):
+            # copy of a Pattern
+            self.__dict__.update(filename.__dict__)
+            return
+        elif isinstance(filename, BufferedImage):
+            # Pattern of a downscaled asset image (see Graphics.drawImage)
+            self.scale = filename.scale
+            filename = filename.source.filename
+        elif isinstance(filename, Image):
+            filename = filename.getName()
+        self.filename = filename
+
+    def similar(self, similarity):
+        pattern = copy(self)
+        pattern.similarity = similarity
+        return pattern
+
+    def exact(self):
+        return self.similar(0.99)
+
+    def targetOffset(self, dx, dy):
+        pattern = copy(self)
+        pattern.target_offset = (dx, dy)
+        return pattern
+
+    def getFilename(self):
+        return self.filename
+
+    def getSimilar(self):
+        return self.similarity
+
+    def getBImage(self):
+        return AssetImage(self.filename)
+
+    def __repr__(self):
+        return 'P({}) S: {}'.format(self.filename, self.similarity)
+
+
+class Image(object):
+    def __init__(self, image, name):
+        self.image = image
+        self.name = name
+
+    def get(self):
+        return self.image
+
+    def getName(self):
+        return self.name
+
+
+class Region(object):
+    session = None
+
+    def __init__(self, *args):
+        if len(args) == 1:
+            args = (args[0].x, args[0].y, args[0].w, args[0].h)
+        self.x, self.y, self.w, self.h = [int(arg) for arg in args]
+        self.auto_wait_timeout = Settings.AutoWaitTimeout
+        self.last_match = None
+        self.appear_handlers = []
+
+    def __repr__(self):
+        return 'R[{},{} {}x{}]'.format(self.x, self.y, self.w, self.h)
+
+    def getX(self):
+        return self.x
+
+    def getY(self):
+        return self.y
+
+    def getW(self):
+        return self.w
+
+    def getH(self):
+        return self.h
+
+    def getScreen(self):
+        return Screen()
+
+    def getCenter(self):
+        return Location(self.x + self.w // 2, self.y + self.h // 2)
+
+    def getTarget(self):
+        return self.getCenter()
+
+    def getLastMatch(self):
+        return self.last_match
+
+    def getAutoWaitTimeout(self):
+        return self.auto_wait_timeout
+
+    def setAutoWaitTimeout(self, seconds):
+        self.auto_wait_timeout = seconds
+
+    def right(self, width=None):
+        width = (
+            self.session.screen.w - self.x - self.w if width is None
+            else width)
+        return Region(self.x + self.w, self.y, width, self.h)
+
+    def left(self, width=None):
+        width = self.x if width is None else width
+        return Region(self.x - width, self.y, width, self.h)
+
+    def above(self, height=None):
+        height = self.y if height is None else height
+        return Region(self.x, self.y - height, self.w, height)
+
+    def below(self, height=None):
+        height = (
+            self.session.screen.h - self.y - self.h if height is None
+            else height)
+        return Region(self.x, self.y + self.h, self.w, height)
+
+    def nearby(self, distance=50):
+        return Region(
+            self.x - distance, self.y - distance, self.w + 2 * distance,
+            self.h + 2 * distance)
+
+    def offset(self, dx, dy=None):
+        if dy is None:
+            dx, dy = dx.x, dx.y
+        return Region(self.x + dx, self.y + dy, self.w, self.h)
+
+    def _poll(self, target, seconds, appear):
+        seconds = self.auto_wait_timeout if seconds is None else seconds
+        end = self.session.clock + seconds
+        while True:
+            matches = self.session.find(target, self)
+            if bool(matches) == appear:
+                return matches
+            if self.session.clock >= end:
+                return None
+            self.session.advance(1.0 / Settings.WaitScanRate)
+
+    def exists(self, target, seconds=None):
+        matches = self._poll(target, seconds, True)
+        self.last_match = matches[0] if matches else None
+        return self.last_match
+
+    def wait(self, target=None, seconds=None):
+        if target is None or isinstance(target, (int, float)):
+            self.session.advance(
+                self.auto_wait_timeout if target is None else target)
+            return None
+        match = self.exists(target, seconds)
+        if match is None:
+            raise FindFailed('{} not found in {}'.format(target, self))
+        return match
+
+    def waitVanish(self, target, seconds=None):
+        return self._poll(target, seconds, False) is not None
+
+    def find(self, target):
+        return self.wait(target)
+
+    def findAll(self, target):
+        matches = self.session.find(target, self)
+        if not matches:
+            raise FindFailed('{} not found in {}'.format(target, self))
+        self.last_match = matches[0]
+        return iter(matches)
+
+    def _location(self, target):
+        if target is None:
+            return self.session.mouse
+        if isinstance(target, Location):
+            return target
+        if isinstance(target, Region):
+            return target.getTarget()
+        return self.find(target).getTarget()
+
+    def mouseMove(self, target=None):
+        self.session.mouse = self._location(target)
+        return 1
+
+    hover = mouseMove
+
+    def mouseDown(self, button=Button.LEFT):
+        return 1
+
+    def mouseUp(self, button=Button.LEFT):
+        self.session.click(self.session.mouse)
+        return 1
+
+    def click(self, target=None):
+        self.session.mouse = self._location(target)
+        self.session.click(self.session.mouse)
+        return 1
+
+    def text(self):
+        return self.session.text(self)
+
+    @staticmethod
+    def type(*args):
+        Region.session.type_key(args[-1])
+        return 1
+
+    def onAppear(self, target, handler):
+        self.appear_handlers.append((target, handler))
+
+    def observeInBackground(self, seconds=FOREVER):
+        self.session.observers.append(self)
+        self.session.fire_observers()
+        return True
+
+    def stopObserver(self):
+        if self in self.session.observers:
+            self.session.observers.remove(self)
+
+
+class Match(Region):
+    def __init__(self, x, y, w, h, score=1.0, target_offset=(0, 0)):
+        Region.__init__(self, x, y, w, h)
+        self.score = score
+        self.target_offset = target_offset
+
+    def __repr__(self):
+        return 'M[{},{} {}x{}] S:{:.2f}'.format(
+            self.x, self.y, self.w, self.h, self.score)
+
+    def getScore(self):
+        return self.score
+
+    def getTarget(self):
+        return self.getCenter().offset(*self.target_offset)
+
+
+class Screen(Region):
+    def __init__(self, id=0):
+        Region.__init__(self, 0, 0, *self.session.screen_size)
+
+    def getBounds(self):
+        return Rectangle(self.x, self.y, self.w, self.h)
+
+    def capture(self, *args):
+        region = args[0] if len(args) == 1 else Region(*args)
+        return ScreenImage(
+            Rectangle(region.x, region.y, region.w, region.h),
+            FrameImage(
+                self.session, self.session.state, region.x, region.y,
+                region.w, region.h))
+
+
+class ObserveEvent(object):
+    def __init__(self, match):
+        self.match = match
+
+    def getMatch(self):
+        return self.match
+
+    def repeat(self, seconds=0):
+        pass
+
+
+class App(object):
+    def __init__(self, name=''):
+        self.name = name
+
+    @staticmethod
+    def focus(*args):
+        return App(args[0] if args else '')
+
+    def focusedWindow(self):
+        return Screen()
+
+    def window(self, index=0):
+        return Screen()
+
+
+class AssetImage(object):
+    """Stand-in for the BufferedImage of an asset, found on sys.path.
+    """
+
+    def __init__(self, filename):
+        self.filename = os.path.basename(filename)
+        for path in sys.path:
+            asset_path = os.path.join(path, self.filename)
+            if os.path.isfile(asset_path):
+                self.width, self.height, self.pixels = read_png(asset_path)
+                break
+        else:
+            raise ReplayError("Asset '{}' not found".format(self.filename))
+
+    def getWidth(self):
+        return self.width
+
+    def getHeight(self):
+        return self.height
+
+    def getRGB(self, x, y, width, height, array=None, offset=0, scansize=0):
+        return [
+            self.pixels[(y + j) * self.width + x + i]
+            for j in range(height) for i in range(width)]
+
+
+class FrameImage(object):
+    """Stand-in for a BufferedImage of part of the screen in a given state.
+    """
+
+    def __init__(self, session, state, x, y, width, height):
+        self.session = session
+        self.state = state
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def getWidth(self):
+        return self.width
+
+    def getHeight(self):
+        return self.height
+
+    def getSubimage(self, x, y, width, height):
+        return FrameImage(
+            self.session, self.state, self.x + x, self.y + y, width, height)
+
+    def getRGB(self, x, y, width, height, array=None, offset=0, scansize=0):
+        return [
+            self.session.pixel(self.state, self.x + x + i, self.y + y + j)
+            for j in range(height) for i in range(width)]
+
+
+class ScreenImage(object):
+    def __init__(self, rectangle, image):
+        self.rectangle = rectangle
+        self.image = image
+
+    def getROI(self):
+        return self.rectangle
+
+    def getImage(self):
+        return self.image
+
+
+class TextRecognizer(object):
+    """Stand-in for sikuli's OCR engine; reads the text of the state a frame
+    was captured in.
+    """
+
+    @classmethod
+    def getInstance(cls):
+        return cls()
+
+    def recognize(self, image):
+        return Region.session.text(
+            Region(image.x, image.y, image.width, image.height), image.state)
+
+
+class Finder(object):
+    def __init__(self, screen_image, region=None):
+        self.screen_image = screen_image
+        self.matches = []
+
+    def _search(self, target):
+        rect = self.screen_image.getROI()
+        image = self.screen_image.getImage()
+        if not isinstance(image, BufferedImage):
+            return Region.session.find(
+                target, Region(rect.x, rect.y, rect.width, rect.height),
+                image.state)
+        # downscaled frame: search the frame it was drawn from and scale the
+        # matches down to it
+        scale = image.scale
+        matches = Region.session.find(
+            target, Region(
+                rect.x, rect.y, int(round(rect.width / scale)),
+                int(round(rect.height / scale))),
+            image.source.state)
+        return [
+            Match(
+                rect.x + int((match.x - rect.x) * scale),
+                rect.y + int((match.y - rect.y) * scale),
+                int(match.w * scale), int(match.h * scale), match.score)
+            for match in matches]
+
+    def find(self, target):
+        self.matches = self._search(target)[:1]
+
+    def findAll(self, target):
+        self.matches = self._search(target)
+
+    def hasNext(self):
+        return bool(self.matches)
+
+    def next(self):
+        return self.matches.pop(0)
+
+    def destroy(self):
+        self.matches = []
+
+
+class BufferedImage(object):
+    TYPE_INT_RGB = 1
+    TYPE_BYTE_GRAY = 10
+
+    def __init__(self, width, height, image_type=TYPE_BYTE_GRAY):
+        self.width = width
+        self.height = height
+        self.samples = [0] * (width * height)
+        self.source = None
+        self.scale = 1.0
+
+    def getWidth(self):
+        return self.width
+
+    def getHeight(self):
+        return self.height
+
+    def createGraphics(self):
+        return Graphics(self)
+
+    def getRaster(self):
+        return self
+
+    def getSample(self, x, y, band):
+        return self.samples[y * self.width + x]
+
+
+class Graphics(object):
+    def __init__(self, target):
+        self.target = target
+
+    def setRenderingHint(self, key, value):
+        pass
+
+    def drawImage(self, image, x, y, width, height, observer=None):
+        source_width = image.getWidth()
+        source_height = image.getHeight()
+        self.target.source = image
+        self.target.scale = width / float(source_width)
+        pixels = image.getRGB(
+            0, 0, source_width, source_height, None, 0, source_width)
+        for j in range(height):
+            for i in range(width):
+                p = pixels[
+                    (j * source_height // height) * source_width +
+                    i * source_width // width]
+                self.target.samples[(y + j) * self.target.width + x + i] = (
+                    ((p >> 16 & 0xff) * 299 + (p >> 8 & 0xff) * 587 +
+                     (p & 0xff) * 114) // 1000)
+        return True
+
+    def dispose(self):
+        pass
+
+
+class JythonHelper(object):
+    @staticmethod
+    def get():
+        return JythonHelper()
+
+    def addSysPath(self, path):
+        if path not in sys.path:
+            sys.path.append(path)
+
+
+def read_png(path):
+    """Function for decoding a non-interlaced 8-bit grayscale, RGB, palette,
+    or RGBA PNG into a list of 0xRRGGBB pixels.
+
+    Args:
+        path (str): path of the PNG
+
+    Returns:
+        tuple: width, height, and row-major list of pixels
+    """
+    with open(path, 'rb') as png:
+        data = png.read()
+    if data[:8] != b'\x89PNG\r\n\x1a\n':
+        raise ReplayError('{} is not a PNG'.format(path))
+    position = 8
+    compressed = b''
+    palette = []
+    while position < len(data):
+        length, = struct.unpack('>I', data[position:position + 4])
+        chunk_type = data[position + 4:position + 8]
+        chunk = data[position + 8:position + 8 + length]
+        position += 12 + length
+        if chunk_type == b'IHDR':
+            width, height, depth, color, _, _, interlace = struct.unpack(
+                '>IIBBBBB', chunk)
+        elif chunk_type == b'PLTE':
+            palette = [
+                struct.unpack('>I', b'\0' + chunk[i:i + 3])[0]
+                for i in range(0, len(chunk) - 2, 3)]
+        elif chunk_type == b'IDAT':
+            compressed += chunk
+        elif chunk_type == b'IEND':
+            break
+    if depth != 8 or interlace or color not in (0, 2, 3, 4, 6):
+        raise ReplayError('{} is not an 8-bit PNG'.format(path))
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}[color]
+    stride = width * channels
+    raw = bytearray(zlib.decompress(compressed))
+    previous = bytearray(stride)
+    pixels = []
+    for row in range(height):
+        start = row * (stride + 1)
+        filter_type = raw[start]
+        line = raw[start + 1:start + 1 + stride]
+        for i in range(stride):
+            left = line[i - channels] if i >= channels else 0
+            up = previous[i]
+            up_left = previous[i - channels] if i >= channels else 0
+            if filter_type == 1:
+                line[i] = (line[i] + left) & 0xff
+            elif filter_type == 2:
+                line[i] = (line[i] + up) & 0xff
+            elif filter_type == 3:
+                line[i] = (line[i] + (left + up) // 2) & 0xff
+            elif filter_type == 4:
+                estimate = left + up - up_left
+                distances = (
+                    abs(estimate - left), abs(estimate - up),
+                    abs(estimate - up_left))
+                predictor = (left, up, up_left)[
+                    distances.index(min(distances))]
+                line[i] = (line[i] + predictor) & 0xff
+        for i in range(0, stride, channels):
+            if color == 3:
+                pixels.append(palette[line[i]])
+                continue
+            if channels < 3:
+                red = green = blue = line[i]
+            else:
+                red, green, blue = line[i], line[i + 1], line[i + 2]
+            pixels.append(red << 16 | green << 8 | blue)
+        previous = line
+    return (width, height, pixels)
+
+
+class ReplaySession(object):
+    """A recorded session: the scripted state machine the fake backend
+    answers searches, clicks, key presses, and OCR reads from.
+
+    Attributes:
+        clicks (list): (virtual time, x, y, state) of every click
+        clock (float): virtual seconds elapsed since the start of the replay
+        mouse (Location): current mouse location
+        observers (list): Regions with active background observers
+        searches (int): number of asset searches conducted
+        state (str): name of the current state
+        visited (list): names of the states entered, in order
+    """
+
+    def __init__(self, manifest_path, max_time=86400):
+        """Initializes the session from its manifest.
+
+        Args:
+            manifest_path (str or dict): path of the session manifest, or the
+                manifest itself (asset paths are then relative to the current
+                directory)
+            max_time (int, optional): virtual seconds after which the replay
+                is ended
+        """
+        if isinstance(manifest_path, dict):
+            manifest = manifest_path
+            self.base_path = os.getcwd()
+        else:
+            with open(manifest_path) as manifest_file:
+                manifest = json.load(manifest_file)
+            self.base_path = os.path.dirname(os.path.abspath(manifest_path))
+        self.states = manifest['states']
+        if manifest['start'] not in self.states:
+            raise ReplayError("Unknown start state '{}'".format(
+                manifest['start']))
+        self.origin = manifest.get('origin', [0, 0])
+        self.screen_size = manifest.get('screen', [1280, 720])
+        self.seed = manifest.get('seed', 0)
+        self.max_time = max_time
+        self.start_time = datetime.datetime(2018, 1, 1, 12)
+        self.clock = 0.0
+        self.state = manifest['start']
+        self.state_entered = 0.0
+        self.mouse = Location(0, 0)
+        self.clicks = []
+        self.typed = []
+        self.searches = 0
+        self.visited = [self.state]
+        self.observers = []
+        self.frames = {}
+
+    @property
+    def screen(self):
+        return Region(0, 0, *self.screen_size)
+
+    def now(self):
+        return self.start_time + datetime.timedelta(seconds=self.clock)
+
+    def advance(self, seconds):
+        """Method for advancing the virtual clock, triggering any timed
+        transitions.
+
+        Args:
+            seconds (float): number of virtual seconds to advance by
+        """
+        self.clock += max(seconds, 0)
+        if self.clock > self.max_time:
+            raise ReplayFinished(
+                'virtual time limit of {}s reached'.format(self.max_time))
+        after = self.states[self.state].get('after')
+        while after and self.clock - self.state_entered >= after['seconds']:
+            self.goto(after['next'])
+            after = self.states[self.state].get('after')
+
+    def goto(self, state):
+        """Method for transitioning to the specified state.
+
+        Args:
+            state (str): name of the state
+        """
+        if state not in self.states:
+            raise ReplayError("Unknown state '{}'".format(state))
+        self.state = state
+        self.state_entered = self.clock
+        self.visited.append(state)
+        if self.states[state].get('final'):
+            raise ReplayFinished("reached final state '{}'".format(state))
+        self.fire_observers()
+
+    def _boxes(self, state, filename):
+        boxes = self.states[state].get('assets', {}).get(filename, [])
+        for box in boxes:
+            yield (
+                self.origin[0] + box[0], self.origin[1] + box[1], box[2],
+                box[3], box[4] if len(box) > 4 else 1.0)
+
+    def find(self, target, region, state=None):
+        """Method for finding all matches of an asset within a region.
+
+        Args:
+            target (str, Pattern): filename of the asset or Pattern
+            region (Region): Region to search in
+            state (str, optional): state to search in; defaults to the
+                current state
+
+        Returns:
+            list: list of Matches, best first
+        """
+        self.searches += 1
+        pattern = target if isinstance(target, Pattern) else Pattern(target)
+        filename = os.path.basename(pattern.filename)
+        matches = [
+            Match(x, y, w, h, score, pattern.target_offset)
+            for x, y, w, h, score in self._boxes(
+                state if state else self.state, filename)
+            if score >= pattern.similarity and
+            Rectangle(region.x, region.y, region.w, region.h).contains(
+                x, y, w, h)]
+        return sorted(matches, key=lambda match: -match.score)
+
+    def click(self, location):
+        """Method for resolving a click at the specified location.
+
+        Args:
+            location (Location): location of the click
+        """
+        self.clicks.append((self.clock, location.x, location.y, self.state))
+        for transition in self.states[self.state].get('clicks', []):
+            if 'asset' in transition:
+                boxes = list(self._boxes(self.state, transition['asset']))
+            else:
+                box = transition['box']
+                boxes = [(
+                    self.origin[0] + box[0], self.origin[1] + box[1], box[2],
+                    box[3], 1.0)]
+            for x, y, w, h, score in boxes:
+                if Rectangle(x, y, w, h).contains(location.x, location.y):
+                    self.goto(transition['next'])
+                    return
+
+    def type_key(self, key):
+        """Method for resolving a key press.
+
+        Args:
+            key (str): key pressed
+        """
+        self.typed.append((self.clock, key, self.state))
+        keys = self.states[self.state].get('keys', {})
+        if key in keys:
+            self.goto(keys[key])
+
+    def text(self, region, state=None):
+        """Method for returning the text within a region, left to right.
+
+        Args:
+            region (Region): Region to read
+            state (str, optional): name of the state to read the text of;
+                defaults to the current state
+
+        Returns:
+            unicode: text within the region
+        """
+        entries = []
+        state = state if state else self.state
+        for entry in self.states[state].get('text', []):
+            x, y, w, h = entry['box']
+            center_x = self.origin[0] + x + w // 2
+            center_y = self.origin[1] + y + h // 2
+            if Rectangle(region.x, region.y, region.w, region.h).contains(
+                    center_x, center_y):
+                entries.append((x, entry['text']))
+        return u''.join(text for x, text in sorted(entries))
+
+    def pixel(self, state, x, y):
+        """Method for returning the color of a screen pixel in a state.
+
+        Args:
+            state (str): name of the state
+            x (int): screen x-coordinate
+            y (int): screen y-coordinate
+
+        Returns:
+            int: 0xRRGGBB color; mid-gray outside of the state's frame
+        """
+        if state not in self.frames:
+            frame = self.states[state].get('frame')
+            self.frames[state] = (
+                read_png(os.path.join(self.base_path, frame)) if frame
+                else (0, 0, []))
+        width, height, pixels = self.frames[state]
+        x -= self.origin[0]
+        y -= self.origin[1]
+        if 0 <= x < width and 0 <= y < height:
+            return pixels[y * width + x]
+        return 0x808080
+
+    def fire_observers(self):
+        """Method for running the appear handlers of the active observers
+        against the current state.
+        """
+        for region in list(self.observers):
+            for target, handler in region.appear_handlers:
+                matches = self.find(target, region)
+                if matches:
+                    handler(ObserveEvent(matches[0]))
+
+    def report(self):
+        """Method for summarizing the replay.
+
+        Returns:
+            dict: summary of the replay
+        """
+        return {
+            'state': self.state,
+            'visited': self.visited,
+            'virtual_seconds': round(self.clock, 2),
+            'clicks': len(self.clicks),
+            'keys': len(self.typed),
+            'searches': self.searches}
+
+
+def _module(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+
+class VirtualDatetime(datetime.datetime):
+    """datetime whose now() follows the virtual clock of the active session.
+    """
+
+    @classmethod
+    def now(cls, tz=None):
+        return Region.session.now()
+
+
+def virtual_sleep(seconds):
+    """Replacement for time.sleep that advances the active session's virtual
+    clock instead.
+
+    Args:
+        seconds (float): number of seconds to sleep for
+    """
+    Region.session.advance(seconds)
+
+
+def install(session):
+    """Function for installing the fake backend and virtual clock for the
+    specified session. Must be called before any kcauto-kai module is
+    imported; calling it again switches the backend over to a new session.
+
+    Args:
+        session (ReplaySession): session to replay
+    """
+    Region.session = session
+    random.seed(session.seed)
+    if time.sleep is virtual_sleep:
+        return
+    time.sleep = virtual_sleep
+    datetime.datetime = VirtualDatetime
+
+    bundle_path = os.path.dirname(os.path.abspath(__file__))
+    script = dict(
+        FindFailed=FindFailed, Region=Region, Match=Match, Pattern=Pattern,
+        Finder=Finder, ScreenImage=ScreenImage, Screen=Screen, Image=Image,
+        TextRecognizer=TextRecognizer,
+        Location=Location, App=App, Key=Key, Button=Button,
+        Settings=Settings)
+    sikuli = _module(
+        'sikuli', FOREVER=FOREVER, getBundlePath=lambda: bundle_path,
+        **script)
+    org_sikuli_script = _module('org.sikuli.script', **script)
+    org_sikuli_util = _module('org.sikuli.util', JythonHelper=JythonHelper)
+    org_sikuli = _module(
+        'org.sikuli', script=org_sikuli_script, util=org_sikuli_util)
+    java_awt_image = _module('java.awt.image', BufferedImage=BufferedImage)
+    java_awt = _module(
+        'java.awt', Rectangle=Rectangle, RenderingHints=RenderingHints,
+        image=java_awt_image)
+    modules = {
+        'sikuli': sikuli,
+        'org': _module('org', sikuli=org_sikuli),
+        'org.sikuli': org_sikuli,
+        'org.sikuli.script': org_sikuli_script,
+        'org.sikuli.util': org_sikuli_util,
+        'org.sikuli.util.JythonHelper': JythonHelper,
+        'java': _module('java', awt=java_awt),
+        'java.awt': java_awt,
+        'java.awt.image': java_awt_image,
+    }
+    for name, value in script.items():
+        modules['org.sikuli.script.' + name] = value
+    sys.modules.update(modules)
+
+    for path in [bundle_path] + [
+            os.path.join(bundle_path, entry)
+            for entry in sorted(os.listdir(bundle_path))
+            if entry.endswith('.sikuli')]:
+        if path not in sys.path:
+            sys.path.append(path)
+
+
+def main(argv):
+    """Function for replaying a session through the kcauto-kai main loop
+    until the session ends.
+
+    Args:
+        argv (list): command line arguments
+
+    Returns:
+        int: exit code
+    """
+    if len(argv) not in (2, 3):
+        print(__doc__)
+        return 1
+    session = ReplaySession(argv[1])
+    install(session)
+    bundle_path = os.path.dirname(os.path.abspath(__file__))
+    sys.argv = ['kcauto-kai.py'] + (['cfg', argv[2]] if len(argv) == 3 else [])
+    started = time.time()
+    try:
+        runpy.run_path(
+            os.path.join(bundle_path, 'kcauto-kai.py'), run_name='__main__')
+    except ReplayFinished as e:
+        print('Replay finished: {}'.format(e))
+    summary = session.report()
+    summary['real_seconds'] = round(time.time() - started, 2)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
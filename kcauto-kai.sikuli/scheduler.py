@@ -0,0 +1,130 @@
+import heapq
+from datetime import datetime
+from time import sleep
+from kca_globals import Globals
+
+
+class Scheduler(object):
+    """Scheduler module that keeps a priority queue of the deadlines at which
+    the various kcauto-kai modules next need attention, so that the main loop
+    can sleep until the earliest one instead of polling at a fixed rate.
+    Modules push their own deadlines whenever they change them; a deadline is
+    only replaced or removed by its module once it has acted on it, so a due
+    deadline stays due until then. All methods are class methods; Scheduler
+    should not be directly instantiated.
+
+    Attributes:
+        queue (list): heap of the (deadline, task) tuple of every scheduled
+            task; holds exactly one entry per task
+    """
+
+    queue = []
+
+    @classmethod
+    def schedule(cls, task, deadline):
+        """Method for setting the deadline of a task. A task has at most one
+        deadline; scheduling it again replaces the previous deadline.
+
+        Args:
+            task (str): name of the task
+            deadline (datetime): when the task next needs attention
+        """
+        cls._remove(task)
+        heapq.heappush(cls.queue, (deadline, task))
+
+    @classmethod
+    def unschedule(cls, task):
+        """Method for removing the deadline of a task, if it has one.
+
+        Args:
+            task (str): name of the task
+        """
+        cls._remove(task)
+
+    @classmethod
+    def _remove(cls, task):
+        """Method for removing the entry of a task from the queue, if it has
+        one, and restoring the heap.
+
+        Args:
+            task (str): name of the task
+        """
+        for index, entry in enumerate(cls.queue):
+            if entry[1] == task:
+                cls.queue[index] = cls.queue[-1]
+                cls.queue.pop()
+                heapq.heapify(cls.queue)
+                return
+
+    @classmethod
+    def reset(cls):
+        """Method for removing all deadlines.
+        """
+        cls.queue = []
+
+    @classmethod
+    def next_deadline(cls, after=None):
+        """Method for returning the earliest deadline in the queue, optionally
+        skipping the deadlines at or before the specified time. Subtrees of
+        the heap whose root is already after the time are not descended
+        into, since none of their deadlines can be earlier than their root.
+
+        Args:
+            after (datetime, optional): time the deadline has to be after
+
+        Returns:
+            datetime: earliest deadline, or None if nothing is scheduled
+        """
+        if not cls.queue:
+            return None
+        if after is None:
+            return cls.queue[0][0]
+        earliest = None
+        indices = [0]
+        while indices:
+            index = indices.pop()
+            if index >= len(cls.queue):
+                continue
+            deadline = cls.queue[index][0]
+            if deadline > after:
+                if earliest is None or deadline < earliest:
+                    earliest = deadline
+            else:
+                indices.extend((2 * index + 1, 2 * index + 2))
+        return earliest
+
+    @classmethod
+    def due(cls, now=None):
+        """Method for returning the tasks whose deadlines have passed.
+
+        Args:
+            now (datetime, optional): time to compare the deadlines against;
+                defaults to the current time
+
+        Returns:
+            list: names of the due tasks, earliest deadline first
+        """
+        now = now if now else datetime.now()
+        return [
+            task for deadline, task in sorted(cls.queue) if deadline <= now]
+
+    @classmethod
+    def sleep_until_next(cls):
+        """Method for sleeping until the earliest upcoming deadline, bounded by
+        Globals.SCHEDULER_MIN_SLEEP and Globals.SCHEDULER_MAX_SLEEP so that
+        the main loop neither spins nor stops checking in (eg. for config
+        changes and error retries) when nothing is scheduled. Deadlines that
+        have already passed are ones their modules have not acted on yet; they
+        are retried after Globals.SCHEDULER_MAX_SLEEP at most.
+
+        Returns:
+            float: number of seconds slept
+        """
+        length = Globals.SCHEDULER_MAX_SLEEP
+        deadline = cls.next_deadline(datetime.now())
+        if deadline:
+            until_deadline = (deadline - datetime.now()).total_seconds()
+            length = min(
+                max(until_deadline, Globals.SCHEDULER_MIN_SLEEP), length)
+        sleep(length)
+        return length
@@ -1,10 +1,11 @@
 from sikuli import Region, Pattern
 from math import ceil
 from re import sub
-from threading import Thread
 from kca_globals import Globals
 from nav import Nav
+from assetregistry import AssetRegistry
 from util import Util
+from workerpool import WorkerPool
 
 
 class ShipSwitcher(object):
@@ -56,6 +57,28 @@ class ShipSwitcher(object):
         self.module_regions['panels'][0].wait('shiplist_button.png', 2)
         self.current_shiplist_page = 1
 
+    def get_state(self):
+        """Method to get the Ship Switcher module's state to persist to the
+        state store.
+
+        Returns:
+            dict: the shiplist position and sparkling caches as lists of
+                (key, value) pairs
+        """
+        return {
+            'position_cache': self.position_cache.items(),
+            'sparkling_cache': self.sparkling_cache.items()}
+
+    def restore_state(self, state):
+        """Method to restore the Ship Switcher module's state from the state
+        store.
+
+        Args:
+            state (dict): state, as returned by get_state()
+        """
+        self.position_cache = dict(state['position_cache'])
+        self.sparkling_cache = dict(state['sparkling_cache'])
+
     def check_need_to_switch(self):
         fleet = self.fleets[1]
         if fleet.damage_counts['repair'] > 0:
@@ -107,7 +130,7 @@ class ShipSwitcher(object):
         # TODO: only checks on damage and repair states only, not fatigue!
         Util.kc_sleep(2)
         fleet = self.fleets[1]
-        damage_counts = fleet.check_damages(self.kc_region)
+        damage_counts = fleet.check_damages(self.module_regions['panels'])
         if (fleet.get_damage_counts_at_threshold(
                     self.config.combat['repair_limit']) == 0 and
                 damage_counts['repair'] == 0):
@@ -167,23 +190,30 @@ class ShipSwitcher(object):
         """
         Util.log_msg("Checking ship in slot {}.".format(slot + 1))
         panel_regions = self.module_regions['panels']
+        states = []
         if 'damage' in criteria:
             valid_damages = list(self.fleets[1].get_damages_at_threshold(
                 self.config.combat['repair_limit']))
             valid_damages.append('repair')
-            for damage in valid_damages:
-                if panel_regions[slot].exists(
-                        Pattern('ship_state_dmg_{}.png'.format(damage))
-                        .similar(Globals.DAMAGE_SIMILARITY)):
-                    Util.log_msg("Ship is damaged: attempting switch.")
-                    return True
+            states.extend(
+                (damage, AssetRegistry.pattern(
+                    'ship_state_dmg_{}.png'.format(damage),
+                    Globals.DAMAGE_SIMILARITY))
+                for damage in valid_damages)
         if 'fatigue' in criteria:
-            for fatigue in ('medium', 'high'):
-                if panel_regions[slot].exists(
-                        Pattern('ship_state_fatigue_{}.png'.format(fatigue))
-                        .similar(Globals.FATIGUE_SIMILARITY)):
-                    Util.log_msg("Ship is fatigued: attempting switch.")
-                    return True
+            states.extend(
+                (fatigue, AssetRegistry.pattern(
+                    'ship_state_fatigue_{}.png'.format(fatigue),
+                    Globals.FATIGUE_SIMILARITY))
+                for fatigue in ('medium', 'high'))
+        if states:
+            slot_state = Util.classify_slots([panel_regions[slot]], states)[0]
+            if slot_state in ('medium', 'high'):
+                Util.log_msg("Ship is fatigued: attempting switch.")
+                return True
+            elif slot_state:
+                Util.log_msg("Ship is damaged: attempting switch.")
+                return True
         if 'sparkle' in criteria:
             if (panel_regions[slot].exists('sparkle_indicator.png', 2) and
                     self.sparkling_cache[slot] <= self.stats.combat_done):
@@ -347,16 +377,16 @@ class ShipSwitcher(object):
                 self.config.combat['repair_limit']))
         valid_damages.extend(['repair', 'heavy'])
         for damage in set(valid_damages):
-            if temp_region.exists(
-                    Pattern('ship_state_dmg_{}.png'.format(damage))
-                    .similar(Globals.DAMAGE_SIMILARITY)):
+            if temp_region.exists(AssetRegistry.pattern(
+                    'ship_state_dmg_{}.png'.format(damage),
+                    Globals.DAMAGE_SIMILARITY)):
                 return False
         # check fatigue states if it is a criteria
         if 'fatigue' in criteria:
             for fatigue in ('medium', 'high'):
-                if temp_region.exists(
-                        Pattern('ship_state_fatigue_{}.png'.format(fatigue))
-                        .similar(Globals.FATIGUE_SIMILARITY)):
+                if temp_region.exists(AssetRegistry.pattern(
+                        'ship_state_fatigue_{}.png'.format(fatigue),
+                        Globals.FATIGUE_SIMILARITY)):
                     return False
         # check sparkle if it is a criteria
         if 'sparkle' in criteria:
@@ -567,12 +597,14 @@ class ShipSwitcher(object):
 
         while (not self.temp_ship_position_dict and
                 self.current_shiplist_page < self.ship_page_count):
-            ship_search_threads = []
-            for ship in slot_config['ships']:
-                ship_search_threads.append(Thread(
-                    target=self._match_shiplist_ships_func,
-                    args=(mode, ship[mode], ship)))
-            Util.multithreader(ship_search_threads)
+            ships = slot_config['ships']
+            matches = WorkerPool.shared().map(
+                self._match_shiplist_ships_func, [mode] * len(ships),
+                [ship[mode] for ship in ships], ships)
+            for ship, ship_positions in zip(ships, matches):
+                if ship_positions:
+                    self.temp_ship_position_dict[ship[mode]] = ship_positions
+                    self.temp_ship_config_dict[ship[mode]] = ship
 
             if not self.temp_ship_position_dict:
                 # no matches on this page; continue loop
@@ -632,18 +664,18 @@ class ShipSwitcher(object):
                 'class'es
             name (str): name of class or ship
             ship_config (dict): dictionary of ship criteria
+
+        Returns:
+            list: list of positions of ships matching the criteria
         """
         img = (
             'shiplist_ship_{}.png'.format(name) if mode == 'ship'
             else 'shiplist_class_{}.png'.format(name))
         matched_ships = Util.findAll_wrapper(
             self.module_regions['shiplist_class_col'],
-            Pattern(img).similar(Globals.SHIP_LIST_SIMILARITY))
+            AssetRegistry.pattern(img, Globals.SHIP_LIST_SIMILARITY))
 
-        ship_positions = self._filter_ships(matched_ships, ship_config)
-        if ship_positions:
-            self.temp_ship_position_dict[name] = ship_positions
-            self.temp_ship_config_dict[name] = ship_config
+        return self._filter_ships(matched_ships, ship_config)
 
     def _set_position_cache(self, name):
         self.position_cache[name] = (
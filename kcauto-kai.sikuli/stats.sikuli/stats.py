@@ -31,6 +31,26 @@ class Stats(object):
         self.quests_finished = 0
         self.recoveries = 0
 
+    def get_state(self):
+        """Method to get the stats to persist to the state store.
+
+        Returns:
+            dict: all stats, keyed by attribute name
+        """
+        return dict(
+            (stat, value) for stat, value in vars(self).items()
+            if stat != 'config')
+
+    def restore_state(self, state):
+        """Method to restore the stats from the state store.
+
+        Args:
+            state (dict): stats, as returned by get_state()
+        """
+        for stat, value in state.items():
+            if hasattr(self, stat) and stat != 'config':
+                setattr(self, stat, value)
+
     def print_stats(self):
         """Prints a summary of all the stats to console.
         """
@@ -0,0 +1,168 @@
+import os
+from collections import OrderedDict
+from threading import Lock
+from sikuli import Pattern, getBundlePath
+import org.sikuli.script.Image as SikuliImage
+from kca_globals import Globals
+from atlas import AssetAtlas
+
+
+class AssetRegistry(object):
+    """Registry of every asset (PNG) in the bundle and its .sikuli folders.
+    The assets are decoded once at startup, along with a Pattern of each at
+    every similarity level defined in Globals, and served by name from memory
+    so that the first search for an asset does not stall on disk I/O. Assets
+    are read from the asset atlas (see AssetAtlas) instead of their own files
+    when one is available. At most
+    Globals.ASSET_REGISTRY_SIZE assets are held; the least recently used are
+    evicted first. All methods are class methods; AssetRegistry should not be
+    directly instantiated.
+
+    Attributes:
+        entries (OrderedDict): (decoded image, dict of Patterns keyed by
+            similarity) of every held asset, keyed by asset name, least
+            recently used first
+        loaded (bool): whether or not the assets have been scanned
+        paths (dict): path of every asset, keyed by asset name
+        stats (dict): hits, misses, and evictions of the registry
+    """
+
+    # similarity levels Patterns are precomputed for
+    SIMILARITIES = (
+        Globals.DEFAULT_SIMILARITY, Globals.DAMAGE_SIMILARITY,
+        Globals.FATIGUE_SIMILARITY, Globals.SHIP_LIST_SIMILARITY,
+        Globals.FLEET_ICON_SIMILARITY, Globals.EXACT_SIMILARITY)
+
+    entries = OrderedDict()
+    loaded = False
+    paths = {}
+    stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+    _lock = Lock()
+
+    @classmethod
+    def load(cls):
+        """Method for scanning the bundle and its .sikuli folders for assets
+        and decoding them. Assets in the bundle's top-level folder take
+        precedence over same-named assets in .sikuli folders. Called once at
+        startup, after the sikuli settings are set.
+        """
+        bundle_path = getBundlePath()
+        paths = {}
+        for entry in sorted(os.listdir(bundle_path)):
+            entry_path = os.path.join(bundle_path, entry)
+            if entry.endswith('.sikuli') and os.path.isdir(entry_path):
+                for asset in sorted(os.listdir(entry_path)):
+                    if asset.endswith('.png'):
+                        paths.setdefault(
+                            asset, os.path.join(entry_path, asset))
+        for asset in os.listdir(bundle_path):
+            if asset.endswith('.png'):
+                paths[asset] = os.path.join(bundle_path, asset)
+        AssetAtlas.load(paths)
+
+        with cls._lock:
+            cls.paths = paths
+            cls.entries = OrderedDict()
+            for asset in sorted(paths)[:Globals.ASSET_REGISTRY_SIZE]:
+                cls._entry(asset)
+            cls.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+            cls.loaded = True
+
+    @classmethod
+    def reset(cls):
+        """Method for discarding the decoded assets and the registry's stats,
+        so that the registry starts cold (eg. between benchmark runs).
+        """
+        with cls._lock:
+            cls.entries = OrderedDict()
+            cls.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+            cls.loaded = False
+
+    @classmethod
+    def pattern(cls, asset, similarity=None):
+        """Method for returning a Pattern of an asset. A new Pattern is
+        returned every call so that callers can modify it (eg. with
+        targetOffset()) without affecting the registry.
+
+        Args:
+            asset (str): filename of the asset
+            similarity (float, optional): similarity of the Pattern; defaults
+                to the asset's default similarity in the atlas, or the sikuli
+                minimum similarity if not in the atlas
+
+        Returns:
+            Pattern: Pattern of the asset
+        """
+        with cls._lock:
+            patterns = cls._entry(asset)[1]
+            if similarity not in patterns:
+                patterns[similarity] = Pattern(patterns[None]).similar(
+                    similarity)
+            return Pattern(patterns[similarity])
+
+    @classmethod
+    def image(cls, asset):
+        """Method for returning the decoded image of an asset.
+
+        Args:
+            asset (str): filename of the asset
+
+        Returns:
+            BufferedImage: decoded image of the asset, or None if it could not
+                be loaded
+        """
+        with cls._lock:
+            return cls._entry(asset)[0]
+
+    @classmethod
+    def summary(cls):
+        """Method for summarizing the registry's hit rate.
+
+        Returns:
+            str: summary, or None if no assets were requested
+        """
+        requests = cls.stats['hits'] + cls.stats['misses']
+        if not requests:
+            return None
+        return (
+            "Asset registry: {} assets held, {:.1%} hit rate over {} "
+            "requests, {} evictions".format(
+                len(cls.entries), cls.stats['hits'] / float(requests),
+                requests, cls.stats['evictions']))
+
+    @classmethod
+    def _entry(cls, asset):
+        """Method for returning the entry of an asset, decoding it and evicting
+        the least recently used asset if it is not held.
+
+        Args:
+            asset (str): filename of the asset
+
+        Returns:
+            tuple: decoded image of the asset and dict of its Patterns keyed
+                by similarity (None for the default similarity)
+        """
+        if asset in cls.entries:
+            cls.stats['hits'] += 1
+            entry = cls.entries.pop(asset)
+            cls.entries[asset] = entry
+            return entry
+
+        cls.stats['misses'] += 1
+        image = AssetAtlas.image(asset)
+        if image is not None:
+            pattern = Pattern(SikuliImage(image, asset)).similar(
+                AssetAtlas.similarity(asset))
+        else:
+            # creating the Pattern resolves and decodes the asset
+            pattern = Pattern(asset)
+            image = pattern.getBImage()
+        patterns = {None: pattern}
+        for similarity in cls.SIMILARITIES:
+            patterns[similarity] = Pattern(pattern).similar(similarity)
+        entry = (image, patterns)
+        cls.entries[asset] = entry
+        while len(cls.entries) > Globals.ASSET_REGISTRY_SIZE:
+            cls.entries.popitem(last=False)
+            cls.stats['evictions'] += 1
+        return entry
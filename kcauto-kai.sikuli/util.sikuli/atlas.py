@@ -0,0 +1,132 @@
+import json
+import os
+import struct
+from sikuli import getBundlePath
+from java.awt.image import BufferedImage
+
+try:
+    from java.io import RandomAccessFile
+    from java.nio.channels import FileChannel
+    from jarray import zeros
+except ImportError:
+    RandomAccessFile = None
+
+
+class AssetAtlas(object):
+    """Memory-mapped atlas of every asset, packed by build_atlas.py. Images
+    of the assets are built straight from the mapped pixel blob, without
+    opening or decoding the individual PNGs. All methods are class methods;
+    AssetAtlas should not be directly instantiated.
+
+    Attributes:
+        assets (dict): [offset, width, height, default similarity, path,
+            mtime, size] of every asset in the atlas, keyed by asset name
+        blob (MappedByteBuffer): memory-mapped pixel blob of the atlas, or
+            None if no usable atlas is loaded
+    """
+
+    MAGIC = 'KCAATLAS'
+    VERSION = 2
+    FILE = 'assets.atlas'
+
+    assets = {}
+    blob = None
+
+    @classmethod
+    def load(cls, asset_paths, path=None):
+        """Method for memory-mapping the atlas. The atlas is not used if it is
+        missing or of another version. Only the assets whose file is the one
+        that was packed, with the same mtime and size, are served from the
+        atlas; assets that were added, moved, or changed in place since the
+        atlas was built are read from their own files instead.
+
+        Args:
+            asset_paths (dict): path of every asset currently in the bundle,
+                keyed by asset name
+            path (str, optional): path of the atlas; defaults to the bundle's
+                atlas
+
+        Returns:
+            bool: True if the atlas was loaded, False otherwise
+        """
+        cls.assets = {}
+        cls.blob = None
+        bundle_path = getBundlePath()
+        path = path if path else os.path.join(bundle_path, cls.FILE)
+        if RandomAccessFile is None or not os.path.isfile(path):
+            return False
+
+        with open(path, 'rb') as atlas_file:
+            header = atlas_file.read(16)
+            if len(header) < 16 or header[:8] != cls.MAGIC:
+                return False
+            version, index_length = struct.unpack('>II', header[8:])
+            if version != cls.VERSION:
+                return False
+            index = json.loads(atlas_file.read(index_length))
+
+        assets = {}
+        for asset, entry in index['assets'].items():
+            asset_path = asset_paths.get(asset)
+            if (asset_path is None or os.path.normpath(asset_path)
+                    != os.path.normpath(os.path.join(bundle_path, entry[4]))):
+                # removed, or shadowed by a newly added asset
+                continue
+            try:
+                stat = os.stat(asset_path)
+            except OSError:
+                continue
+            if (int(stat.st_mtime), stat.st_size) == tuple(entry[5:7]):
+                assets[asset] = entry
+        if not assets:
+            return False
+
+        blob_start = 16 + index_length + (-(16 + index_length) % 4)
+        atlas = RandomAccessFile(path, 'r')
+        try:
+            channel = atlas.getChannel()
+            cls.blob = channel.map(
+                FileChannel.MapMode.READ_ONLY, blob_start,
+                channel.size() - blob_start)
+        finally:
+            # the mapping stays valid after the file is closed
+            atlas.close()
+        cls.assets = assets
+        return True
+
+    @classmethod
+    def image(cls, asset):
+        """Method for building the image of an asset from the atlas.
+
+        Args:
+            asset (str): name of the asset
+
+        Returns:
+            BufferedImage: image of the asset, or None if the asset is not in
+                the atlas
+        """
+        if cls.blob is None or asset not in cls.assets:
+            return None
+        offset, width, height = cls.assets[asset][:3]
+        pixels = zeros(width * height, 'i')
+        view = cls.blob.duplicate()
+        view.position(offset)
+        view.asIntBuffer().get(pixels)
+        image = BufferedImage(width, height, BufferedImage.TYPE_INT_RGB)
+        image.setRGB(0, 0, width, height, pixels, 0, width)
+        return image
+
+    @classmethod
+    def similarity(cls, asset):
+        """Method for returning the default similarity of an asset.
+
+        Args:
+            asset (str): name of the asset
+
+        Returns:
+            float: default similarity, or None if the asset is not in the
+                atlas
+        """
+        if asset not in cls.assets:
+            return None
+        return cls.assets[asset][3]
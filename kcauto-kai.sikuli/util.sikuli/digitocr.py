@@ -0,0 +1,323 @@
+import json
+import os
+from kca_globals import Globals
+
+
+class DigitOCR(object):
+    """Template-based recognizer for the fixed font digits and colons used in
+    the game's timers and counters. Glyph templates are learned from Tesseract
+    reads that were validated by the caller, once enough reads agree on them
+    (Globals.GLYPH_OCR_CONFIRMATIONS), and persisted to disk so that later
+    reads can skip Tesseract entirely. All methods are class methods;
+    DigitOCR should not be instantiated directly.
+
+    Attributes:
+        candidates (list): [character, glyph, agreeing reads] of glyphs read
+            by Tesseract but not yet learned
+        glyphs (dict): list of learned glyph templates keyed by character;
+            each template is a [aspect ratio, relative height, bitmap] list
+        loaded (bool): whether or not the glyph file has been loaded
+    """
+
+    # size of the grid each glyph is normalized to
+    GRID_WIDTH = 8
+    GRID_HEIGHT = 12
+    # minimum luminance spread for an image to be considered to contain text
+    MIN_CONTRAST = 40
+    # templates scoring at or above this against an existing template of the
+    # same character are not stored
+    DUPLICATE_SCORE = 0.97
+
+    candidates = []
+    glyphs = {}
+    loaded = False
+
+    @classmethod
+    def read(cls, image):
+        """Method for reading the digits in an image via the learned glyph
+        templates.
+
+        Args:
+            image (BufferedImage): image containing a single line of digits
+
+        Returns:
+            str: the read text, or None if there are no templates, no glyphs
+                in the image, or any glyph was recognized below the
+                confidence threshold or without a clear enough margin over
+                the next best character
+        """
+        cls._load()
+        if not cls.glyphs:
+            return None
+        text = ''
+        for glyph in cls.segment(image):
+            char, confidence, margin = cls._classify(glyph)
+            if (confidence < Globals.GLYPH_OCR_CONFIDENCE
+                    or margin < Globals.GLYPH_OCR_MARGIN):
+                return None
+            text += str(char)
+        return text if text else None
+
+    @classmethod
+    def learn(cls, image, text):
+        """Method for learning glyph templates from an image whose text is
+        known to be valid. A glyph is only learned once
+        Globals.GLYPH_OCR_CONFIRMATIONS reads agree on its character; a read
+        disagreeing with a pending glyph discards it. Learning a glyph
+        discards any templates of other characters it would be recognized as.
+        Nothing is learned if the number of segmented glyphs does not match
+        the length of the text.
+
+        Args:
+            image (BufferedImage): image containing a single line of digits
+            text (str): validated text of the image
+
+        Returns:
+            bool: True if any new templates were stored, False otherwise
+        """
+        cls._load()
+        glyphs = cls.segment(image)
+        if len(glyphs) != len(text):
+            return False
+        updated = False
+        read_glyphs = []
+        for glyph, char in zip(glyphs, text):
+            # a glyph repeated within the read counts as a single read
+            if any(
+                    cls._score(glyph, read_glyph) >= cls.DUPLICATE_SCORE
+                    for read_glyph in read_glyphs):
+                continue
+            read_glyphs.append(glyph)
+            samples = cls.glyphs.setdefault(char, [])
+            if len(samples) >= Globals.GLYPH_OCR_SAMPLES:
+                continue
+            if any(
+                    cls._score(glyph, sample) >= cls.DUPLICATE_SCORE
+                    for sample in samples):
+                continue
+            if not cls._confirm(glyph, char):
+                continue
+            cls._forget_conflicts(glyph, char)
+            samples.append(glyph)
+            updated = True
+        if updated:
+            cls._save()
+        return updated
+
+    @classmethod
+    def forget(cls, char=None):
+        """Method for discarding the learned templates of a character, or of
+        every character, eg. after a misread was learned.
+
+        Args:
+            char (str, optional): character to discard the templates of;
+                defaults to all characters
+        """
+        cls._load()
+        if char is None:
+            cls.glyphs = {}
+        else:
+            cls.glyphs.pop(char, None)
+        cls.candidates = []
+        cls._save()
+
+    @classmethod
+    def reset(cls):
+        """Method for discarding the loaded templates and pending glyphs in
+        memory only, so that the glyph file is loaded again on next use.
+        """
+        cls.glyphs = {}
+        cls.candidates = []
+        cls.loaded = False
+
+    @classmethod
+    def segment(cls, image):
+        """Method for binarizing an image and segmenting it into glyphs by
+        its foreground columns. Each glyph is cropped to its own rows and
+        normalized to the glyph grid.
+
+        Args:
+            image (BufferedImage): image containing a single line of digits
+
+        Returns:
+            list: list of [aspect ratio, relative height, bitmap] glyphs, left
+                to right
+        """
+        width = image.getWidth()
+        height = image.getHeight()
+        pixels = image.getRGB(0, 0, width, height, None, 0, width)
+        luminance = [
+            ((p >> 16 & 0xff) * 299 + (p >> 8 & 0xff) * 587 +
+             (p & 0xff) * 114) / 1000
+            for p in pixels]
+        low = min(luminance)
+        high = max(luminance)
+        if high - low < cls.MIN_CONTRAST:
+            return []
+        threshold = (low + high) / 2
+        bright = [value > threshold for value in luminance]
+        # text is the minority class, whether light on dark or dark on light
+        text_is_bright = bright.count(True) <= len(bright) / 2
+        foreground = [value == text_is_bright for value in bright]
+
+        column_has_ink = [
+            any(foreground[y * width + x] for y in range(height))
+            for x in range(width)]
+        runs = []
+        start = None
+        for x, ink in enumerate(column_has_ink + [False]):
+            if ink and start is None:
+                start = x
+            elif not ink and start is not None:
+                runs.append((start, x))
+                start = None
+
+        crops = []
+        for x1, x2 in runs:
+            rows = [
+                y for y in range(height)
+                if any(foreground[y * width + x] for x in range(x1, x2))]
+            crops.append((x1, x2, rows[0], rows[-1] + 1))
+        if not crops:
+            return []
+        line_height = float(max(y2 - y1 for x1, x2, y1, y2 in crops))
+
+        glyphs = []
+        for x1, x2, y1, y2 in crops:
+            glyph_width = x2 - x1
+            glyph_height = y2 - y1
+            bitmap = ''.join(
+                '1' if foreground[
+                    (y1 + gy * glyph_height / cls.GRID_HEIGHT) * width +
+                    x1 + gx * glyph_width / cls.GRID_WIDTH] else '0'
+                for gy in range(cls.GRID_HEIGHT)
+                for gx in range(cls.GRID_WIDTH))
+            glyphs.append([
+                glyph_width / float(glyph_height),
+                glyph_height / line_height,
+                bitmap])
+        return glyphs
+
+    @classmethod
+    def _confirm(cls, glyph, char):
+        """Method for recording a read of a glyph as a character, and
+        checking whether or not enough reads agree to learn it.
+
+        Args:
+            glyph (list): [aspect ratio, relative height, bitmap] glyph
+            char (str): character the glyph was read as
+
+        Returns:
+            bool: True if the glyph should be learned, False otherwise
+        """
+        for candidate in cls.candidates:
+            if cls._score(glyph, candidate[1]) < cls.DUPLICATE_SCORE:
+                continue
+            if candidate[0] != char:
+                # the reads disagree; trust neither
+                cls.candidates.remove(candidate)
+                return False
+            candidate[2] += 1
+            if candidate[2] < Globals.GLYPH_OCR_CONFIRMATIONS:
+                return False
+            cls.candidates.remove(candidate)
+            return True
+        cls.candidates.append([char, glyph, 1])
+        return Globals.GLYPH_OCR_CONFIRMATIONS <= 1
+
+    @classmethod
+    def _forget_conflicts(cls, glyph, char):
+        """Method for discarding the templates of other characters that a
+        glyph would be recognized as.
+
+        Args:
+            glyph (list): [aspect ratio, relative height, bitmap] glyph
+            char (str): character the glyph is known to be
+        """
+        for other_char, samples in cls.glyphs.items():
+            if other_char == char:
+                continue
+            samples[:] = [
+                sample for sample in samples
+                if cls._score(glyph, sample) < Globals.GLYPH_OCR_CONFIDENCE]
+
+    @classmethod
+    def _classify(cls, glyph):
+        """Method for finding the learned character that best matches a
+        glyph.
+
+        Args:
+            glyph (list): [aspect ratio, relative height, bitmap] glyph
+
+        Returns:
+            str: best matching character, or None if there are no templates
+            float: confidence (0 to 1) of the match
+            float: margin of the confidence over that of the next best
+                character
+        """
+        scores = []
+        for char, samples in cls.glyphs.items():
+            if samples:
+                scores.append((
+                    max(cls._score(glyph, sample) for sample in samples),
+                    char))
+        if not scores:
+            return (None, 0, 0)
+        scores.sort(reverse=True)
+        best_score, best_char = scores[0]
+        runner_up_score = scores[1][0] if len(scores) > 1 else 0
+        return (best_char, best_score, best_score - runner_up_score)
+
+    @staticmethod
+    def _score(glyph_a, glyph_b):
+        """Method for scoring the similarity of two glyphs: the fraction of
+        matching bitmap cells, scaled down by any difference in shape.
+
+        Args:
+            glyph_a (list): [aspect ratio, relative height, bitmap] glyph
+            glyph_b (list): [aspect ratio, relative height, bitmap] glyph
+
+        Returns:
+            float: similarity between 0 and 1
+        """
+        bitmap_a = glyph_a[2]
+        bitmap_b = glyph_b[2]
+        matching = sum(1 for a, b in zip(bitmap_a, bitmap_b) if a == b)
+        score = matching / float(len(bitmap_a))
+        for index in (0, 1):
+            smaller = min(glyph_a[index], glyph_b[index])
+            larger = max(glyph_a[index], glyph_b[index])
+            score *= smaller / larger if larger else 1
+        return score
+
+    @classmethod
+    def _glyph_file(cls):
+        """Method for returning the path of the glyph template file.
+
+        Returns:
+            str: path of the glyph template file
+        """
+        return os.path.join(os.getcwd(), Globals.GLYPH_OCR_FILE)
+
+    @classmethod
+    def _load(cls):
+        """Method for loading the persisted glyph templates, once.
+        """
+        if cls.loaded:
+            return
+        cls.loaded = True
+        try:
+            with open(cls._glyph_file()) as glyph_file:
+                cls.glyphs = json.load(glyph_file)
+        except (IOError, ValueError):
+            cls.glyphs = {}
+
+    @classmethod
+    def _save(cls):
+        """Method for persisting the glyph templates.
+        """
+        try:
+            with open(cls._glyph_file(), 'w') as glyph_file:
+                json.dump(cls.glyphs, glyph_file)
+        except IOError:
+            pass
@@ -0,0 +1,247 @@
+import json
+import os
+from datetime import datetime, timedelta
+from kca_globals import Globals
+
+
+class StateStore(object):
+    """Crash-safe store of the runtime state of kcauto-kai's modules (timers,
+    caches, checkpoints, and stats), so that a restarted kcauto-kai can resume
+    scheduling without re-scraping every screen. States are saved under a key
+    per module and persisted to an append-only journal of JSON lines at
+    Globals.STATE_FILE; every record is flushed to disk as it is written and a
+    partially written record (eg. from a crash) is ignored on load. Once the
+    journal holds Globals.STATE_COMPACT_RECORDS records it is compacted down
+    to the latest record of every key. Every save pass ends with a record of
+    the keys it saved (see touch()), so that a state that was still being
+    saved counts as current even if it has not changed in a while. States
+    last saved more than Globals.STATE_MAX_AGE hours ago are discarded on
+    load. All methods are class methods; StateStore should not be directly
+    instantiated.
+
+    Attributes:
+        loaded (bool): whether or not the journal has been loaded
+        path (str): path of the journal, or None if states are not persisted
+        records (int): number of records in the journal
+        states (dict): (save time, state) of every key; the state of
+            SAVED_KEY is the list of keys saved in the last save pass
+    """
+
+    TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+    SAVED_KEY = '_saved'
+
+    loaded = False
+    path = None
+    records = 0
+    states = {}
+
+    @classmethod
+    def load(cls, path=None):
+        """Method for loading the latest state of every key from the journal.
+
+        Args:
+            path (str, optional): path of the journal; defaults to
+                Globals.STATE_FILE in the working directory
+        """
+        cls.path = path if path else os.path.join(
+            os.getcwd(), Globals.STATE_FILE)
+        cls.states = {}
+        cls.records = 0
+        cls.loaded = True
+        journal_path = cls.path
+        if (not os.path.isfile(journal_path)
+                and os.path.isfile(journal_path + '.tmp')):
+            # a compaction was interrupted after the journal was removed
+            journal_path += '.tmp'
+        try:
+            with open(journal_path) as journal:
+                for line in journal:
+                    try:
+                        record = json.loads(line)
+                        cls.states[record['key']] = (
+                            record['time'], record['state'])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    cls.records += 1
+        except IOError:
+            return
+        if journal_path != cls.path:
+            # finish the interrupted compaction before anything is appended
+            # to the journal, so that later records are not written to a
+            # separate file from the recovered ones
+            try:
+                os.rename(journal_path, cls.path)
+            except OSError:
+                pass
+
+        cutoff = (
+            datetime.now() - timedelta(hours=Globals.STATE_MAX_AGE)).strftime(
+                cls.TIME_FORMAT)
+        pass_time, saved_keys = cls.states.get(cls.SAVED_KEY, (None, []))
+        for key in list(cls.states):
+            saved_time = cls.states[key][0]
+            if key in saved_keys:
+                # the state was unchanged but still saved in the last pass
+                saved_time = max(saved_time, pass_time)
+            if saved_time < cutoff:
+                del cls.states[key]
+
+    @classmethod
+    def reset(cls):
+        """Method for dropping all states and no longer persisting them, so
+        that states start empty (eg. between benchmark runs).
+        """
+        cls.loaded = True
+        cls.path = None
+        cls.records = 0
+        cls.states = {}
+
+    @classmethod
+    def get(cls, key):
+        """Method for returning the saved state of a key. Loads the journal on
+        first use.
+
+        Args:
+            key (str): key of the state
+
+        Returns:
+            object: the saved state, or None if none was saved
+        """
+        if not cls.loaded:
+            cls.load()
+        return cls.states[key][1] if key in cls.states else None
+
+    @classmethod
+    def saved_time(cls, key):
+        """Method for returning when the state of a key was saved.
+
+        Args:
+            key (str): key of the state
+
+        Returns:
+            str: save time of the state, or None if none was saved
+        """
+        if not cls.loaded:
+            cls.load()
+        return cls.states[key][0] if key in cls.states else None
+
+    @classmethod
+    def put(cls, key, state):
+        """Method for saving the state of a key, appending it to the journal
+        if it differs from the saved state.
+
+        Args:
+            key (str): key of the state
+            state (object): JSON-serializable state; datetimes should be
+                converted with encode_time()
+        """
+        if not cls.loaded:
+            cls.load()
+        # round-trip the state so that it compares equal to a loaded state
+        state = json.loads(json.dumps(state))
+        if key in cls.states and cls.states[key][1] == state:
+            return
+        saved_time = datetime.now().strftime(cls.TIME_FORMAT)
+        cls.states[key] = (saved_time, state)
+        if not cls.path:
+            return
+        if cls.records >= Globals.STATE_COMPACT_RECORDS:
+            cls.compact()
+            return
+        try:
+            with open(cls.path, 'a') as journal:
+                cls._write_record(journal, key, saved_time, state)
+            cls.records += 1
+        except (IOError, OSError):
+            pass
+
+    @classmethod
+    def touch(cls, keys):
+        """Method for recording the end of a save pass: the keys saved in it
+        are considered saved now, even if their states did not change. Always
+        appended to the journal.
+
+        Args:
+            keys (list): keys saved in the pass
+        """
+        if not cls.loaded:
+            cls.load()
+        saved_time = datetime.now().strftime(cls.TIME_FORMAT)
+        state = sorted(keys)
+        cls.states[cls.SAVED_KEY] = (saved_time, state)
+        if not cls.path:
+            return
+        if cls.records >= Globals.STATE_COMPACT_RECORDS:
+            cls.compact()
+            return
+        try:
+            with open(cls.path, 'a') as journal:
+                cls._write_record(journal, cls.SAVED_KEY, saved_time, state)
+            cls.records += 1
+        except (IOError, OSError):
+            pass
+
+    @classmethod
+    def compact(cls):
+        """Method for rewriting the journal to hold only the latest state of
+        every key. The compacted journal is written to a temporary file that
+        then replaces the journal, so that a crash mid-compaction leaves
+        either the old or the new journal intact.
+        """
+        if not cls.path:
+            return
+        temp_path = cls.path + '.tmp'
+        try:
+            with open(temp_path, 'w') as journal:
+                for key in sorted(cls.states):
+                    saved_time, state = cls.states[key]
+                    cls._write_record(journal, key, saved_time, state)
+            try:
+                os.rename(temp_path, cls.path)
+            except OSError:
+                # renaming over an existing file fails on Windows
+                os.remove(cls.path)
+                os.rename(temp_path, cls.path)
+            cls.records = len(cls.states)
+        except (IOError, OSError):
+            pass
+
+    @classmethod
+    def encode_time(cls, time):
+        """Method for converting a datetime to a JSON-serializable string.
+
+        Args:
+            time (datetime): datetime to convert; may be None
+
+        Returns:
+            str: converted datetime, or None
+        """
+        return time.strftime(cls.TIME_FORMAT) if time else None
+
+    @classmethod
+    def decode_time(cls, time):
+        """Method for converting a string from encode_time() back to a
+        datetime.
+
+        Args:
+            time (str): string to convert; may be None
+
+        Returns:
+            datetime: converted string, or None
+        """
+        return datetime.strptime(time, cls.TIME_FORMAT) if time else None
+
+    @staticmethod
+    def _write_record(journal, key, saved_time, state):
+        """Method for writing a record to the journal and flushing it to disk.
+
+        Args:
+            journal (file): journal opened for writing
+            key (str): key of the state
+            saved_time (str): save time of the state
+            state (object): the state
+        """
+        journal.write(json.dumps(
+            {'key': key, 'time': saved_time, 'state': state}) + '\n')
+        journal.flush()
+        os.fsync(journal.fileno())
@@ -5,12 +5,18 @@ import org.sikuli.script.FindFailed as FindFailed
 import org.sikuli.script.Region as JRegion
 import org.sikuli.script.Match as JMatch
 import org.sikuli.script.Pattern as JPattern
+import org.sikuli.script.ScreenImage as ScreenImage
+from java.awt import Rectangle, RenderingHints
+from java.awt.image import BufferedImage
 from time import strftime
 from random import uniform, gauss
 from time import sleep
-from datetime import timedelta
+from datetime import datetime, timedelta
 from re import match
 from kca_globals import Globals
+from assetregistry import AssetRegistry
+from digitocr import DigitOCR
+from vision import BACKENDS, SikuliBackend
 
 
 class Util(object):
@@ -20,6 +26,31 @@ class Util(object):
 
     Attributes:
         CLR_* (str): shell coloring prefixes and suffixes
+        kc_geometry (tuple): (x, y, w, h) of the last match of the game
+            screen's reference point and the pre-defined regions generated
+            from it; see focus_kc()
+        vision (VisionBackend): backend screen captures, template searches,
+            and OCR reads are conducted through; see set_vision_backend()
+        frame (ScreenImage): the most recently captured frame of the game
+            screen; used by the frame_* methods
+        location_cache (dict): last known (x, y, w, h) match location of
+            assets, keyed by asset name
+        location_cache_origin (tuple): (x, y) of the game region the
+            location cache was populated against
+        location_cache_stats (dict): [hits, misses] of the location cache,
+            keyed by asset name
+        pyramid_frames (dict): downscaled ScreenImages of the stored frame,
+            keyed by (x1, y1, x2, y2, scale); see frame_exists()
+        pyramid_patterns (dict): downscaled Patterns of assets (None if the
+            asset is too small at the scale), keyed by
+            (asset name, similarity, scale)
+        gate_cache (dict): (checksum, result, consecutive skips) of the last
+            gated search of each asset in each region, keyed by
+            (x, y, w, h, asset name)
+        searches_saved (int): running count of gated searches skipped
+            because their region had not changed since the previous search
+        vision_calls (int): running count of the screen captures, template
+            searches, and OCR reads conducted through Util
     """
 
     CLR_MSG = '\033[94m'
@@ -28,6 +59,18 @@ class Util(object):
     CLR_ERROR = '\033[91m'
     CLR_END = '\033[0m'
 
+    vision = SikuliBackend()
+    kc_geometry = None
+    frame = None
+    location_cache = {}
+    location_cache_origin = None
+    location_cache_stats = {}
+    vision_calls = 0
+    pyramid_frames = {}
+    pyramid_patterns = {}
+    gate_cache = {}
+    searches_saved = 0
+
     @staticmethod
     def kc_sleep(base=None, flex=None):
         """Method for putting the program to sleep for a random amount of time.
@@ -76,10 +119,13 @@ class Util(object):
         """
         return time - timedelta(hours=getattr(config, 'jst_offset', 0))
 
-    @staticmethod
-    def read_ocr_number_text(kc_region, text_ref=None, rdir=None, width=None):
+    @classmethod
+    def read_ocr_number_text(
+            cls, kc_region, text_ref=None, rdir=None, width=None):
         """Method for reading in text in reference to an asset or Match
-        instance, and then cleaning up the OCR results, tuned for numbers.
+        instance, tuned for numbers. The learned digit glyph templates are
+        tried first, with Tesseract OCR (and clean up of its results) as the
+        fallback.
 
         Args:
             kc_region (Region): sikuli Region instance containing the last
@@ -95,24 +141,86 @@ class Util(object):
         Returns:
             str: OCR read results, tuned for numbers
         """
+        region = cls._ocr_region(kc_region, text_ref, rdir, width)
+        cls.vision_calls += 1
+        screen_image = cls.vision.capture(region)
+        text = DigitOCR.read(screen_image.getImage())
+        if text is not None:
+            return text
+        cls.vision_calls += 1
+        return cls._clean_ocr_text(cls.vision.read(screen_image))
+
+    @classmethod
+    def _read_validated_number_text(cls, region, valid_format, fix=None):
+        """Method for reading in text tuned for numbers that must match the
+        specified format. The learned digit glyph templates are tried first;
+        if their read is missing or invalid Tesseract OCR is used instead, on
+        the same captured image, and valid Tesseract reads are used to learn
+        new glyph templates (see DigitOCR.learn()).
+
+        Args:
+            region (Region): Region containing the text to read
+            valid_format (str): regex the read must match to be valid
+            fix (function, optional): function applied to the cleaned up
+                Tesseract read before validating it
+
+        Returns:
+            str: OCR read results, tuned for numbers; may be invalid
+        """
+        cls.vision_calls += 1
+        screen_image = cls.vision.capture(region)
+        image = screen_image.getImage()
+        text = DigitOCR.read(image)
+        if text is not None and match(valid_format, text):
+            return text
+        cls.vision_calls += 1
+        text = cls._clean_ocr_text(cls.vision.read(screen_image))
+        if fix:
+            text = fix(text)
+        if match(valid_format, text):
+            DigitOCR.learn(image, text)
+        return text
+
+    @staticmethod
+    def _ocr_region(kc_region, text_ref=None, rdir=None, width=None):
+        """Method for generating the region an OCR read should occur in, in
+        reference to an asset or Match instance.
+
+        Args:
+            kc_region (Region): sikuli Region instance containing the last
+                known location of the Kantai Collection game screen
+            text_ref (str, Match): image name of reference or Match of
+                reference the OCR read should happen in relation to
+            rdir (str): specifies in what direction relative to text_ref the
+                OCR read should occur: 'r' for 'right of text_ref' and 'l' for
+                'left of text_ref'
+            width (int): width (in pixels) of the region the OCR read should
+                occur in
+
+        Returns:
+            Region: Region to conduct the OCR read in
+        """
         if text_ref is None and rdir is None and width is None:
-            text = kc_region.text().encode('utf-8')
-        if isinstance(text_ref, str) and rdir and width:
-            if rdir == 'r':
-                text = kc_region.find(text_ref).right(width).text().encode(
-                    'utf-8')
-            elif rdir == 'l':
-                text = kc_region.find(text_ref).left(width).text().encode(
-                    'utf-8')
-        elif (
-                isinstance(text_ref, Match) or isinstance(text_ref, JMatch)
-                and rdir and width):
-            if rdir == 'r':
-                text = text_ref.right(width).text().encode('utf-8')
-            elif rdir == 'l':
-                text = text_ref.left(width).text().encode('utf-8')
-        # replace characters to numbers
-        text = (
+            return kc_region
+        if isinstance(text_ref, str):
+            text_ref = kc_region.find(text_ref)
+        if rdir == 'r':
+            return text_ref.right(width)
+        return text_ref.left(width)
+
+    @staticmethod
+    def _clean_ocr_text(text):
+        """Method for cleaning up Tesseract OCR results by replacing commonly
+        misread characters with numbers.
+
+        Args:
+            text (unicode): raw OCR read results
+
+        Returns:
+            str: OCR read results, tuned for numbers
+        """
+        text = text.encode('utf-8')
+        return (
             text.replace('O', '0').replace('o', '0').replace('D', '0')
             .replace('Q', '0').replace('@', '0').replace('l', '1')
             .replace('I', '1').replace('[', '1').replace(']', '1')
@@ -121,7 +229,6 @@ class Util(object):
             .replace('B', '8').replace(':', '8').replace(' ', '')
             .replace('-', '')
         )
-        return text
 
     @classmethod
     def read_timer(cls, kc_region, timer_ref, dir, width, attempt_limit=0):
@@ -147,15 +254,12 @@ class Util(object):
         ocr_matching = True
         timer_dict = {'hours': 95, 'minutes': 0, 'seconds': 0}
         attempt = 0
+        region = cls._ocr_region(kc_region, timer_ref, dir, width)
         while ocr_matching:
             attempt += 1
-            timer = cls.read_ocr_number_text(kc_region, timer_ref, dir, width)
+            timer = cls._read_validated_number_text(
+                region, r'^\d{2}:\d{2}:\d{2}$', cls._fix_timer_text)
             if len(timer) == 8:
-                # valid length for timer ('##:##:##')
-                timer = list(timer)
-                timer[2] = ':'
-                timer[5] = ':'
-                timer = ''.join(timer)
                 timer_format_match = match(r'^\d{2}:\d{2}:\d{2}$', timer)
                 if timer_format_match:
                     # valid timer reading; return timer reading
@@ -179,6 +283,25 @@ class Util(object):
                 "Got invalid timer ({})... trying again!".format(timer))
             sleep(0.2)
 
+    @staticmethod
+    def _fix_timer_text(timer):
+        """Method for restoring the colons of a timer read by Tesseract OCR,
+        which are usually misread.
+
+        Args:
+            timer (str): cleaned up OCR read of a timer
+
+        Returns:
+            str: timer read with colons in place, if it is of valid length
+                for a timer ('##:##:##')
+        """
+        if len(timer) != 8:
+            return timer
+        timer = list(timer)
+        timer[2] = ':'
+        timer[5] = ':'
+        return ''.join(timer)
+
     @classmethod
     def read_number(cls, kc_region, number_ref, dir, width, attempt_limit=0):
         """Method for reading various numbers via OCR.
@@ -201,10 +324,10 @@ class Util(object):
         """
         ocr_matching = True
         attempt = 0
+        region = cls._ocr_region(kc_region, number_ref, dir, width)
         while ocr_matching:
             attempt += 1
-            number = cls.read_ocr_number_text(
-                kc_region, number_ref, dir, width)
+            number = cls._read_validated_number_text(region, r'^\d+$')
             m = match(r'^\d+$', number)
             if m:
                 # OCR match is a number; return it
@@ -233,24 +356,805 @@ class Util(object):
         Returns:
             list: list of all Matches of pattern in the region
         """
-        try:
-            matches = region.findAll(pattern)
-            return matches if matches is not None else []
-        except FindFailed:
-            return []
+        Util.vision_calls += 1
+        return Util.vision.find_all_live(region, pattern)
+
+    @classmethod
+    def set_vision_backend(cls, name):
+        """Method for switching the vision backend screen captures, template
+        searches, and OCR reads are conducted through. Does nothing if the
+        backend is already active.
+
+        Args:
+            name (str): name of the backend; one of the keys of
+                vision.BACKENDS
+        """
+        if cls.vision.name == name:
+            return
+        cls.vision = BACKENDS[name]()
+        cls.release_frame()
+        cls.pyramid_patterns = {}
+        cls.log_msg("Using the {} vision backend.".format(name))
+
+    @classmethod
+    def capture_frame(cls, region):
+        """Method for capturing a single frame (screenshot) of the specified
+        region and storing it for use in the frame_exists() and
+        frame_find_all() methods. Meant to be called once at the start of a
+        decision 'tick' so that all the checks conducted in the tick are run
+        against the same in-memory image instead of each check grabbing the
+        screen again.
+
+        Args:
+            region (Region): Region to capture; usually the game region
+
+        Returns:
+            ScreenImage: the captured frame
+        """
+        cls.vision_calls += 1
+        cls.frame = cls.vision.capture(region)
+        cls.pyramid_frames = {}
+        return cls.frame
+
+    @classmethod
+    def release_frame(cls):
+        """Method for discarding the stored frame so that subsequent frame_*
+        calls fall back to searching the live screen.
+        """
+        cls.frame = None
+        cls.pyramid_frames = {}
+
+    @classmethod
+    def frame_covers(cls, region):
+        """Method for checking whether or not the stored frame covers the
+        whole of the specified region.
+
+        Args:
+            region (Region): Region to check
+
+        Returns:
+            bool: True if the region is entirely within the stored frame,
+                False otherwise
+        """
+        return cls._frame_bounds(region) == (
+            region.x, region.y, region.x + region.w, region.y + region.h)
+
+    @classmethod
+    def _frame_image(cls, region):
+        """Method for generating a ScreenImage of the portion of the stored
+        frame that overlaps the specified region. Matches found in it by the
+        vision backend are in screen coordinates, same as those of Region
+        searches.
+
+        Args:
+            region (Region): Region to limit the image to
+
+        Returns:
+            ScreenImage: ScreenImage instance, or None if there is no stored
+                frame or the region is not within the stored frame
+        """
+        bounds = cls._frame_bounds(region)
+        if bounds is None:
+            return None
+        x1, y1, x2, y2 = bounds
+        roi = cls.frame.getROI()
+        return ScreenImage(
+            Rectangle(x1, y1, x2 - x1, y2 - y1),
+            cls.frame.getImage().getSubimage(
+                x1 - roi.x, y1 - roi.y, x2 - x1, y2 - y1))
+
+    @classmethod
+    def _frame_bounds(cls, region):
+        """Method for calculating the portion of the stored frame that
+        overlaps the specified region.
+
+        Args:
+            region (Region): Region to overlap with the stored frame
+
+        Returns:
+            tuple: (x1, y1, x2, y2) screen coordinates of the overlap, or None
+                if there is no stored frame or the region is not within it
+        """
+        if cls.frame is None:
+            return None
+        roi = cls.frame.getROI()
+        x1 = max(region.x, roi.x)
+        y1 = max(region.y, roi.y)
+        x2 = min(region.x + region.w, roi.x + roi.width)
+        y2 = min(region.y + region.h, roi.y + roi.height)
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return (x1, y1, x2, y2)
+
+    @classmethod
+    def frame_exists(cls, region, target):
+        """Method for checking for the existence of an asset in the specified
+        region of the stored frame (see capture_frame()). Falls back to an
+        immediate search of the live screen if there is no stored frame or the
+        region is outside of it. Searches of large regions are conducted as
+        pyramid searches (see _pyramid_find()).
+
+        Args:
+            region (Region): Region to conduct the match in
+            target (str, Pattern): the filename of the asset or Pattern to
+                search for
+
+        Returns:
+            Match: Match instance if the asset was found, None otherwise
+        """
+        key = cls._asset_key(target)
+        hint_region = cls._hint_region(region, key)
+        if hint_region and cls.frame is not None:
+            match = cls._frame_find(hint_region, target)
+            cls._record_hint(key, match is not None)
+            if match:
+                return match
+
+        scale = cls._pyramid_scale(region, target)
+        if scale:
+            matches = cls._pyramid_find(region, target, scale, 1)
+            match = matches[0] if matches else None
+            if match:
+                cls._record_location(key, match)
+            return match
+
+        cls.vision_calls += 1
+        frame_image = cls._frame_image(region)
+        if frame_image is None:
+            return cls.vision.exists(region, target, 0)
+        match = cls.vision.find(frame_image, target)
+        if match:
+            cls._record_location(key, match)
+        return match
+
+    @classmethod
+    def _frame_find(cls, region, target):
+        """Method for conducting a single find in the specified region of the
+        stored frame.
+
+        Args:
+            region (Region): Region to conduct the match in
+            target (str, Pattern): the filename of the asset or Pattern to
+                search for
+
+        Returns:
+            Match: Match instance if the asset was found, None otherwise
+        """
+        frame_image = cls._frame_image(region)
+        if frame_image is None:
+            return None
+        cls.vision_calls += 1
+        return cls.vision.find(frame_image, target)
+
+    @classmethod
+    def frame_find_all(cls, region, target):
+        """Method for finding all matches of an asset in the specified region
+        of the stored frame (see capture_frame()). Falls back to
+        findAll_wrapper() on the live screen if there is no stored frame or the
+        region is outside of it. Searches of large regions are conducted as
+        pyramid searches (see _pyramid_find()).
+
+        Args:
+            region (Region): Region to conduct the match in
+            target (str, Pattern): the filename of the asset or Pattern to
+                search for
+
+        Returns:
+            list: list of all Matches of the asset in the region
+        """
+        scale = cls._pyramid_scale(region, target)
+        if scale:
+            return cls._pyramid_find(region, target, scale)
+        frame_image = cls._frame_image(region)
+        if frame_image is None:
+            return cls.findAll_wrapper(region, target)
+        cls.vision_calls += 1
+        return cls.vision.find_all(frame_image, target)
+
+    @classmethod
+    def _pyramid_scale(cls, region, target):
+        """Method for picking the scale to pyramid search for an asset in the
+        specified region of the stored frame at: the smallest of
+        Globals.PYRAMID_SCALES at which the asset is still at least
+        Globals.PYRAMID_MIN_ASSET_SIZE pixels in both dimensions.
+
+        Args:
+            region (Region): Region to conduct the match in
+            target (str, Pattern): the filename of the asset or Pattern to
+                search for
+
+        Returns:
+            float: scale to search at, or None if pyramid matching is
+                disabled, there is no stored frame, the region is smaller
+                than Globals.PYRAMID_MIN_REGION_AREA, or the asset is too small
+        """
+        if not Globals.PYRAMID_MATCHING:
+            return None
+        bounds = cls._frame_bounds(region)
+        if bounds is None:
+            return None
+        x1, y1, x2, y2 = bounds
+        if (x2 - x1) * (y2 - y1) < Globals.PYRAMID_MIN_REGION_AREA:
+            return None
+        for scale in sorted(Globals.PYRAMID_SCALES):
+            if cls._pyramid_pattern(target, scale):
+                return scale
+        return None
+
+    @classmethod
+    def _pyramid_find(cls, region, target, scale, limit=None):
+        """Method for conducting a coarse-to-fine search for an asset in the
+        specified region of the stored frame. Candidates are found in a
+        downscaled copy of the frame with a downscaled copy of the asset at
+        the asset's similarity less Globals.PYRAMID_SIMILARITY_MARGIN, then
+        each candidate is confirmed with a full resolution search at the
+        asset's own similarity in a tight box around it. If no candidate is
+        confirmed (downscaling can push small or low-contrast assets below
+        the lowered similarity), a full resolution search of the whole region
+        is conducted instead, so that pyramid searches never miss an asset a
+        full resolution search would find.
+
+        Args:
+            region (Region): Region to conduct the match in
+            target (str, Pattern): the filename of the asset or Pattern to
+                search for
+            scale (float): scale to find candidates at; see _pyramid_scale()
+            limit (int, optional): max number of matches to return; at most
+                Globals.PYRAMID_MAX_CANDIDATES candidates are confirmed if
+                set, all candidates are confirmed and all confirmed matches
+                are returned if None
+
+        Returns:
+            list: list of confirmed Matches, best candidate first
+        """
+        bounds = cls._frame_bounds(region)
+        x1, y1, x2, y2 = bounds
+        cls.vision_calls += 1
+        candidates = cls.vision.find_all(
+            cls._pyramid_frame(bounds, scale),
+            cls._pyramid_pattern(target, scale))
+
+        # downscaling can shift the candidate by up to 1 / scale pixels
+        padding = int(round(2 / scale))
+        if limit:
+            candidates = candidates[:Globals.PYRAMID_MAX_CANDIDATES]
+        matches = []
+        for candidate in candidates:
+            box_x1 = max(x1 + int((candidate.x - x1) / scale) - padding, x1)
+            box_y1 = max(y1 + int((candidate.y - y1) / scale) - padding, y1)
+            box_x2 = min(
+                box_x1 + int(candidate.w / scale) + 2 * padding, x2)
+            box_y2 = min(
+                box_y1 + int(candidate.h / scale) + 2 * padding, y2)
+            match = cls._frame_find(
+                Region(box_x1, box_y1, box_x2 - box_x1, box_y2 - box_y1),
+                target)
+            if match and not any(
+                    (match.x, match.y) == (found.x, found.y)
+                    for found in matches):
+                matches.append(match)
+                if limit and len(matches) >= limit:
+                    break
+        if matches:
+            return matches
+
+        # no candidate was confirmed; fall back to a full resolution search
+        cls.vision_calls += 1
+        frame_image = cls._frame_image(region)
+        if limit == 1:
+            match = cls.vision.find(frame_image, target)
+            return [match] if match else []
+        return cls.vision.find_all(frame_image, target)[:limit]
+
+    @classmethod
+    def _pyramid_frame(cls, bounds, scale):
+        """Method for generating (or returning the stored) downscaled copy of
+        a portion of the stored frame.
+
+        Args:
+            bounds (tuple): (x1, y1, x2, y2) screen coordinates of the portion
+                of the frame
+            scale (float): scale to downscale to
+
+        Returns:
+            ScreenImage: downscaled portion of the frame, with the same
+                upper-left corner as the portion
+        """
+        key = bounds + (scale, )
+        if key not in cls.pyramid_frames:
+            x1, y1, x2, y2 = bounds
+            roi = cls.frame.getROI()
+            width = max(int((x2 - x1) * scale), 1)
+            height = max(int((y2 - y1) * scale), 1)
+            cls.pyramid_frames[key] = ScreenImage(
+                Rectangle(x1, y1, width, height),
+                cls._scale_image(
+                    cls.frame.getImage().getSubimage(
+                        x1 - roi.x, y1 - roi.y, x2 - x1, y2 - y1),
+                    width, height))
+        return cls.pyramid_frames[key]
+
+    @classmethod
+    def _pyramid_pattern(cls, target, scale):
+        """Method for generating (or returning the stored) downscaled Pattern
+        of an asset, at the asset's similarity less
+        Globals.PYRAMID_SIMILARITY_MARGIN.
+
+        Args:
+            target (str, Pattern): the filename of the asset or Pattern
+            scale (float): scale to downscale to
+
+        Returns:
+            Pattern: downscaled Pattern, or None if the asset could not be
+                loaded or is smaller than Globals.PYRAMID_MIN_ASSET_SIZE at
+                the scale
+        """
+        pattern = Pattern(target)
+        key = (cls._asset_key(target), pattern.getSimilar(), scale)
+        if key not in cls.pyramid_patterns:
+            cls.pyramid_patterns[key] = None
+            image = pattern.getBImage()
+            if image is None:
+                return None
+            width = int(image.getWidth() * scale)
+            height = int(image.getHeight() * scale)
+            if min(width, height) >= Globals.PYRAMID_MIN_ASSET_SIZE:
+                cls.pyramid_patterns[key] = Pattern(
+                    cls._scale_image(image, width, height)).similar(
+                        max(pattern.getSimilar() -
+                            Globals.PYRAMID_SIMILARITY_MARGIN, 0))
+        return cls.pyramid_patterns[key]
+
+    @staticmethod
+    def _scale_image(image, width, height):
+        """Method for resizing an image with bilinear interpolation.
+
+        Args:
+            image (BufferedImage): image to resize
+            width (int): width to resize to
+            height (int): height to resize to
+
+        Returns:
+            BufferedImage: resized RGB image
+        """
+        scaled = BufferedImage(width, height, BufferedImage.TYPE_INT_RGB)
+        graphics = scaled.createGraphics()
+        graphics.setRenderingHint(
+            RenderingHints.KEY_INTERPOLATION,
+            RenderingHints.VALUE_INTERPOLATION_BILINEAR)
+        graphics.drawImage(image, 0, 0, width, height, None)
+        graphics.dispose()
+        return scaled
+
+    @classmethod
+    def hinted_exists(cls, region, target, seconds=None):
+        """Method for checking for the existence of an asset by first
+        searching a small padded box around the asset's last known location
+        before falling back to the full region. The asset's location is
+        updated on every successful match.
+
+        Args:
+            region (Region): Region to conduct the match in
+            target (str, Pattern): the filename of the asset or Pattern to
+                search for
+            seconds (int, optional): max amount of time to wait for the asset
+                in the fallback search; defaults to the region's auto wait
+                timeout
+
+        Returns:
+            Match: Match instance if the asset was found, None otherwise
+        """
+        key = cls._asset_key(target)
+        hint_region = cls._hint_region(region, key)
+        if hint_region:
+            cls.vision_calls += 1
+            match = cls.vision.exists(hint_region, target, 0)
+            cls._record_hint(key, match is not None)
+            if match:
+                return match
+
+        cls.vision_calls += 1
+        match = cls.vision.exists(region, target, seconds)
+        if match:
+            cls._record_location(key, match)
+        return match
+
+    @classmethod
+    def hinted_wait(cls, region, target, seconds=None):
+        """Method for waiting for the appearance of an asset; like
+        hinted_exists(), the asset's last known location is checked first.
+
+        Args:
+            region (Region): Region to conduct the match in
+            target (str, Pattern): the filename of the asset or Pattern to
+                search for
+            seconds (int, optional): max amount of time to wait for the asset
+                to appear; defaults to the region's auto wait timeout
+
+        Returns:
+            Match: Match instance of the asset
+
+        Raises:
+            FindFailed: the asset did not appear before the timeout
+        """
+        key = cls._asset_key(target)
+        hint_region = cls._hint_region(region, key)
+        if hint_region:
+            cls.vision_calls += 1
+            match = cls.vision.exists(hint_region, target, 0)
+            cls._record_hint(key, match is not None)
+            if match:
+                return match
+
+        cls.vision_calls += 1
+        match = cls.vision.wait(region, target, seconds)
+        cls._record_location(key, match)
+        return match
+
+    @staticmethod
+    def _asset_key(target):
+        """Method for generating the location cache key of an asset.
+
+        Args:
+            target (str, Pattern): the filename of the asset or Pattern
+
+        Returns:
+            str: the asset's filename
+        """
+        if isinstance(target, Pattern) or isinstance(target, JPattern):
+            # Patterns of atlas images have no file, only a name
+            return target.getFilename() or target.getImage().getName()
+        return target
+
+    @classmethod
+    def _hint_region(cls, region, key):
+        """Method for generating the padded search Region around an asset's
+        last known location, limited to the bounds of the specified region.
+
+        Args:
+            region (Region): Region the search is limited to
+            key (str): location cache key of the asset
+
+        Returns:
+            Region: hint Region, or None if the asset has no known location or
+                the known location is not within the region
+        """
+        if key not in cls.location_cache:
+            return None
+        x, y, w, h = cls.location_cache[key]
+        pad = Globals.LOCATION_CACHE_PADDING
+        x1 = max(region.x, x - pad)
+        y1 = max(region.y, y - pad)
+        x2 = min(region.x + region.w, x + w + pad)
+        y2 = min(region.y + region.h, y + h + pad)
+        if x2 - x1 < w or y2 - y1 < h:
+            return None
+        return Region(x1, y1, x2 - x1, y2 - y1)
+
+    @classmethod
+    def _record_location(cls, key, match):
+        """Method for storing the location of an asset's match in the location
+        cache.
+
+        Args:
+            key (str): location cache key of the asset
+            match (Match): Match instance of the asset
+        """
+        cls.location_cache[key] = (match.x, match.y, match.w, match.h)
+
+    @classmethod
+    def _record_hint(cls, key, hit):
+        """Method for recording a location cache hit or miss of an asset.
+
+        Args:
+            key (str): location cache key of the asset
+            hit (bool): whether or not the asset was found at its last known
+                location
+        """
+        stats = cls.location_cache_stats.setdefault(key, [0, 0])
+        stats[0 if hit else 1] += 1
+
+    @classmethod
+    def get_location_cache_stats(cls):
+        """Method for summarizing the location cache hit and miss counts.
+
+        Returns:
+            dict: dict of total location cache hits and misses
+        """
+        hits = sum(stats[0] for stats in cls.location_cache_stats.values())
+        misses = sum(stats[1] for stats in cls.location_cache_stats.values())
+        return {'hits': hits, 'misses': misses}
+
+    @classmethod
+    def reset_location_cache(cls, origin=None):
+        """Method for evicting all entries in the location cache. Called when
+        the game region moves.
+
+        Args:
+            origin (tuple, optional): (x, y) of the new game region
+        """
+        cls.location_cache = {}
+        cls.location_cache_origin = origin
+
+    @classmethod
+    def wait_any(
+            cls, region_target_pairs, timeout=None, backoff=None,
+            gated=False):
+        """Method for waiting for any one of multiple assets to appear. Every
+        scan captures a single frame covering all the specified regions and
+        checks each region/target pair against it in order, pausing between
+        scans according to the backoff schedule. If gated, pairs whose region
+        has not changed since it was last searched are not searched again
+        (see gated_exists()).
+
+        Args:
+            region_target_pairs (list): list of (Region, target) tuples, where
+                target is the filename of the asset or Pattern to search for;
+                earlier pairs take priority over later ones
+            timeout (int, optional): max amount of time (in seconds) to wait
+                for any of the assets to appear; waits indefinitely if None
+            backoff (list, optional): pauses (in seconds) between scans; the
+                last value is repeated once exhausted. Defaults to
+                Globals.WAIT_ANY_BACKOFF
+            gated (bool, optional): whether or not to skip searching regions
+                that have not changed
+
+        Returns:
+            str, Pattern: the target of the first matching pair
+            Match: Match instance of the matched target
+
+        Raises:
+            FindFailed: none of the assets appeared before the timeout
+        """
+        backoff = Globals.WAIT_ANY_BACKOFF if backoff is None else backoff
+        capture_region = cls._bounding_region(
+            [pair[0] for pair in region_target_pairs])
+        end_time = (
+            datetime.now() + timedelta(seconds=timeout)
+            if timeout is not None else None)
+
+        scan = 0
+        while True:
+            cls.capture_frame(capture_region)
+            for region, target in region_target_pairs:
+                match = (
+                    cls._gated_frame_exists(region, target) if gated
+                    else cls.frame_exists(region, target))
+                if match:
+                    return (target, match)
+            if end_time and datetime.now() >= end_time:
+                raise FindFailed(
+                    "None of {} appeared within {} seconds".format(
+                        ', '.join(
+                            str(pair[1]) for pair in region_target_pairs),
+                        timeout))
+            sleep(backoff[min(scan, len(backoff) - 1)])
+            scan += 1
+
+    @classmethod
+    def gated_exists(cls, region, target):
+        """Method for checking for the existence of an asset, skipping the
+        search if the region has not changed since the asset was last searched
+        for in it; the previous result is returned instead. Meant for polling
+        loops that look at the same, often unchanged, screen repeatedly.
+
+        Args:
+            region (Region): Region to conduct the match in
+            target (str, Pattern): the filename of the asset or Pattern to
+                search for
+
+        Returns:
+            Match: Match instance if the asset was found, None otherwise
+        """
+        cls.capture_frame(region)
+        return cls._gated_frame_exists(region, target)
+
+    @classmethod
+    def gated_wait(cls, region, target, seconds=None):
+        """Method for waiting for the appearance of an asset, skipping the
+        search whenever the region has not changed since the last one.
+
+        Args:
+            region (Region): Region to conduct the match in
+            target (str, Pattern): the filename of the asset or Pattern to
+                search for
+            seconds (int, optional): max amount of time to wait for the asset
+                to appear; waits indefinitely if None
+
+        Returns:
+            Match: Match instance of the asset
+
+        Raises:
+            FindFailed: the asset did not appear before the timeout
+        """
+        return cls.wait_any([(region, target)], seconds, gated=True)[1]
+
+    @classmethod
+    def _gated_frame_exists(cls, region, target):
+        """Method for conducting frame_exists() unless the region of the
+        stored frame has the same checksum as when the asset was last searched
+        for in it. A search is still forced after Globals.FRAME_GATE_MAX_SKIPS
+        consecutive skips, in case a change was too small to alter the
+        checksum.
+
+        Args:
+            region (Region): Region to conduct the match in
+            target (str, Pattern): the filename of the asset or Pattern to
+                search for
+
+        Returns:
+            Match: Match instance if the asset was found, None otherwise
+        """
+        checksum = cls._frame_checksum(region)
+        key = (region.x, region.y, region.w, region.h, cls._asset_key(target))
+        cached = cls.gate_cache.get(key, None)
+        if (checksum is not None and cached and cached[0] == checksum
+                and cached[2] < Globals.FRAME_GATE_MAX_SKIPS):
+            cls.gate_cache[key] = (checksum, cached[1], cached[2] + 1)
+            cls.searches_saved += 1
+            return cached[1]
+        match = cls.frame_exists(region, target)
+        if checksum is not None:
+            cls.gate_cache[key] = (checksum, match, 0)
+        return match
+
+    @classmethod
+    def _frame_checksum(cls, region, size=16):
+        """Method for generating a checksum of the specified region of the
+        stored frame from a downsampled, coarsely quantized grayscale
+        thumbnail of it.
+
+        Args:
+            region (Region): Region to checksum
+            size (int, optional): width and height of the thumbnail
+
+        Returns:
+            int: checksum, or None if the region is not within the stored
+                frame
+        """
+        bounds = cls._frame_bounds(region)
+        if bounds is None:
+            return None
+        x1, y1, x2, y2 = bounds
+        roi = cls.frame.getROI()
+        image = cls.frame.getImage().getSubimage(
+            x1 - roi.x, y1 - roi.y, x2 - x1, y2 - y1)
+        return hash(tuple(
+            pixel >> 3 for pixel in cls._thumbnail_pixels(image, size)))
+
+    @staticmethod
+    def _bounding_region(regions):
+        """Method for generating the smallest region that contains all the
+        specified regions.
+
+        Args:
+            regions (list): list of Regions
+
+        Returns:
+            Region: bounding Region
+        """
+        x1 = min(r.x for r in regions)
+        y1 = min(r.y for r in regions)
+        x2 = max(r.x + r.w for r in regions)
+        y2 = max(r.y + r.h for r in regions)
+        return Region(x1, y1, x2 - x1, y2 - y1)
+
+    @classmethod
+    def classify_slots(cls, slots, states):
+        """Method for classifying each of the specified slots into one of the
+        specified states. A single frame covering all the slots is captured,
+        then each slot is checked against the state targets in order until
+        one matches.
+
+        Args:
+            slots (list): list of Regions, one per slot
+            states (list): list of (state, target) tuples, where target is the
+                filename of the asset or Pattern signifying the state; earlier
+                states take priority over later ones
+
+        Returns:
+            list: state of each slot, or None for slots matching no state
+        """
+        cls.capture_frame(cls._bounding_region(slots))
+        slot_states = []
+        for slot in slots:
+            slot_state = None
+            for state, target in states:
+                if cls._frame_find(slot, target):
+                    slot_state = state
+                    break
+            slot_states.append(slot_state)
+        return slot_states
+
+    @classmethod
+    def classify_icons(cls, region, states):
+        """Method for finding every state icon in the specified region, such
+        as the damage icons of a fleet list, regardless of how many ship slots
+        the region holds or where their boundaries lie. A single frame of the
+        region is captured and searched for all matches of each state target;
+        where matches of different states overlap, the earlier state is kept.
+
+        Args:
+            region (Region): Region to conduct the search in
+            states (list): list of (state, target) tuples, where target is the
+                filename of the asset or Pattern signifying the state; earlier
+                states take priority over later ones
+
+        Returns:
+            list: state of each icon found, top to bottom
+        """
+        cls.capture_frame(region)
+        icons = []
+        for state, target in states:
+            for match in cls.frame_find_all(region, target):
+                center = match.getCenter()
+                if any(
+                        icon.x <= center.x < icon.x + icon.w and
+                        icon.y <= center.y < icon.y + icon.h
+                        for icon, icon_state in icons):
+                    continue
+                icons.append((match, state))
+        return [
+            state for icon, state in sorted(
+                icons, key=lambda icon: (icon[0].y, icon[0].x))]
+
+    @staticmethod
+    def average_hash(image, size=8):
+        """Method for generating a perceptual (average) hash of an image by
+        downsampling it to a size x size grayscale thumbnail and thresholding
+        each pixel against the thumbnail's mean brightness.
+
+        Args:
+            image (BufferedImage): image to hash
+            size (int, optional): width and height of the thumbnail
+
+        Returns:
+            long: size * size bit hash of the image
+        """
+        pixels = Util._thumbnail_pixels(image, size)
+        mean = sum(pixels) / float(len(pixels))
+        value = 0
+        for pixel in pixels:
+            value = (value << 1) | (1 if pixel > mean else 0)
+        return value
+
+    @staticmethod
+    def _thumbnail_pixels(image, size):
+        """Method for downsampling an image to a size x size grayscale
+        thumbnail.
+
+        Args:
+            image (BufferedImage): image to downsample
+            size (int): width and height of the thumbnail
+
+        Returns:
+            list: brightness (0-255) of the thumbnail's pixels, row by row
+        """
+        thumbnail = BufferedImage(size, size, BufferedImage.TYPE_BYTE_GRAY)
+        graphics = thumbnail.createGraphics()
+        graphics.setRenderingHint(
+            RenderingHints.KEY_INTERPOLATION,
+            RenderingHints.VALUE_INTERPOLATION_BILINEAR)
+        graphics.drawImage(image, 0, 0, size, size, None)
+        graphics.dispose()
+        raster = thumbnail.getRaster()
+        return [
+            raster.getSample(x, y, 0)
+            for y in range(size) for x in range(size)]
 
     @staticmethod
-    def multithreader(threads):
-        """Method for starting and threading multithreadable Threads in
-        threads.
+    def hamming_distance(hash_a, hash_b):
+        """Method for calculating the number of differing bits between two
+        hashes.
 
         Args:
-            threads (list): list of Threads to multithread
+            hash_a (long): first hash
+            hash_b (long): second hash
+
+        Returns:
+            int: number of differing bits
         """
-        for thread in threads:
-            thread.start()
-        for thread in threads:
-            thread.join()
+        return bin(hash_a ^ hash_b).count('1')
 
     @staticmethod
     def focus_app(config):
@@ -269,7 +1173,10 @@ class Util(object):
     @classmethod
     def focus_kc(cls, config):
         """Method for focusing on the window Kantai Collection is running in
-        and defining all the pre-defined regions based off of it.
+        and defining all the pre-defined regions based off of it. The game
+        screen's geometry is cached: if the reference point is still where it
+        was last found, the cached regions are returned without searching the
+        whole window.
 
         Args:
             config (Config): kcauto-kai Config instance
@@ -280,12 +1187,69 @@ class Util(object):
             list: list of pre-defined Regions
         """
         kc = cls.focus_app(config)
+        reference_point = AssetRegistry.pattern(
+            'kc_reference_point.png', Globals.EXACT_SIMILARITY)
+        if cls.kc_geometry:
+            # re-verify the cached geometry by checking for the reference
+            # point only where it was last found
+            reference, regions = cls.kc_geometry
+            padding = Globals.LOCATION_CACHE_PADDING
+            cls.vision_calls += 1
+            reference_region = cls.vision.exists(Region(
+                reference[0] - padding, reference[1] - padding,
+                reference[2] + 2 * padding, reference[3] + 2 * padding),
+                reference_point, 0)
+            if reference_region:
+                if (reference_region.x, reference_region.y) == reference[:2]:
+                    return (kc, regions)
+                # the reference point was found, but not where it was
+                # last found: the game region moved by a few pixels
+                return (
+                    kc, cls._cache_kc_geometry(reference_region, moved=True))
+
         # match the reference point to find the exact location of the game
         # within the game container window
-        reference_region = kc.wait(Pattern('kc_reference_point.png').exact())
+        cls.vision_calls += 1
+        reference_region = cls.vision.wait(kc, reference_point)
+        return (kc, cls._cache_kc_geometry(reference_region))
+
+    @classmethod
+    def _cache_kc_geometry(cls, reference_region, moved=False):
+        """Method for generating the pre-defined regions off of the match of
+        the reference point and caching them as the game screen's geometry.
+
+        Args:
+            reference_region (Match): match of the reference point
+            moved (bool, optional): whether or not the reference point is
+                known to have moved since the geometry was last cached
+
+        Returns:
+            dict: dict of pre-defined Regions
+        """
         x = reference_region.x - 99
         y = reference_region.y
+        if moved or cls.location_cache_origin != (x, y):
+            # the game region moved; all known asset locations are invalid
+            cls.reset_location_cache((x, y))
+        regions = cls._generate_regions(x, y)
+        cls.kc_geometry = (
+            (reference_region.x, reference_region.y, reference_region.w,
+             reference_region.h),
+            regions)
+        return regions
+
+    @staticmethod
+    def _generate_regions(x, y):
+        """Method for generating the pre-defined regions of a game screen
+        whose upper-left corner is at the specified coordinates.
+
+        Args:
+            x (int): x-coordinate of the game screen
+            y (int): y-coordinate of the game screen
 
+        Returns:
+            dict: dict of pre-defined Regions
+        """
         regions = {}
         # pre-defined regions are defined as (X_start, Y_start, width, height)
         # generic regions
@@ -329,7 +1293,7 @@ class Util(object):
         regions['formation_combinedfleet_4'] = Region(
             x + 580, y + 280, 160, 50)
 
-        return (kc, regions)
+        return regions
 
     @classmethod
     def rejigger_mouse(cls, regions, preset):
@@ -426,8 +1390,9 @@ class Util(object):
         Returns:
             bool: True if the asset was found and clicked, False otherwise
         """
-        if region.exists(target):
-            region.click(cls.generate_pattern(region, target, expand, True))
+        match = cls.hinted_exists(region, target)
+        if match:
+            cls.click_match(region, match, expand)
             cls.kc_sleep()
             return True
         return False
@@ -444,10 +1409,10 @@ class Util(object):
                 appear
             expand (list, optional): area expansion for the click
         """
-        region.wait(target, time)
+        match = cls.hinted_wait(region, target, time)
         if Globals.SLEEP_MODIFIER:
             cls.kc_sleep()
-        region.click(cls.generate_pattern(region, target, expand, True))
+        cls.click_match(region, match, expand)
         cls.kc_sleep()
 
     @classmethod
@@ -468,11 +1433,10 @@ class Util(object):
                 appear
             expand (list, optional): area expansion for the click
         """
-        click_region.wait(click_target, time)
+        match = cls.hinted_wait(click_region, click_target, time)
         if Globals.SLEEP_MODIFIER:
             cls.kc_sleep()
-        click_region.click(
-            cls.generate_pattern(click_region, click_target, expand, True))
+        cls.click_match(click_region, match, expand)
         try:
             wait_region.wait(wait_target, time)
         except FindFailed:
@@ -485,6 +1449,28 @@ class Util(object):
 
         cls.kc_sleep()
 
+    @classmethod
+    def click_match(cls, region, match, expand=[]):
+        """Method to click a randomized point within an already-obtained Match
+        instance. Unlike clicking a Pattern, this does not make sikuli search
+        the region for the asset again.
+
+        Args:
+            region (Region): Region to conduct the click through
+            match (Match): Match instance to click
+            expand (list, optional): area expansion for the click, relative to
+                the center of the match; defaults to the bounds of the match
+        """
+        if len(expand) == 0:
+            x_width = match.w / 2
+            y_height = match.h / 2
+            expand = [-x_width, x_width, -y_height, y_height]
+
+        center = match.getCenter()
+        region.click(Location(
+            center.x + int(round(cls.randint_gauss(expand[0], expand[1]))),
+            center.y + int(round(cls.randint_gauss(expand[2], expand[3])))))
+
     @classmethod
     def generate_pattern(cls, region, target, expand=[], prematched=False):
         """Method to generate a pattern with a custom targetOffset (click
@@ -514,7 +1500,7 @@ class Util(object):
                 expand = [-x_width, x_width, -y_height, y_height]
 
         if isinstance(target, str):
-            created_pattern = Pattern(target).targetOffset(
+            created_pattern = AssetRegistry.pattern(target).targetOffset(
                 int(round(cls.randint_gauss(expand[0], expand[1]))),
                 int(round(cls.randint_gauss(expand[2], expand[3]))))
         elif isinstance(target, Pattern) or isinstance(target, JPattern):
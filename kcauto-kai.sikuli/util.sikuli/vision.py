@@ -0,0 +1,368 @@
+from sikuli import Region, Pattern, Match
+import org.sikuli.script.FindFailed as FindFailed
+import org.sikuli.script.Finder as Finder
+import org.sikuli.script.TextRecognizer as TextRecognizer
+from java.awt.image import BufferedImage
+from collections import OrderedDict
+from threading import Lock
+from time import sleep
+from datetime import datetime, timedelta
+from kca_globals import Globals
+
+try:
+    from org.opencv.core import Core, CvType, Mat, Scalar
+    from org.opencv.imgproc import Imgproc
+except ImportError:
+    Core = None
+
+
+class VisionBackend(object):
+    """Interface of the engines Util conducts screen captures, template
+    searches, and OCR reads through. Searches are conducted either on a
+    captured ScreenImage (find(), find_all()) or on the live screen (exists(),
+    wait(), find_all_live()); matches are always in screen coordinates.
+    Subclasses implement capture(), find() and find_all(); the live screen
+    methods default to polling captures at Globals.SIKULI_SCANRATE and OCR
+    defaults to sikuli's.
+
+    Attributes:
+        name (str): name the backend is selected by in the config
+    """
+
+    name = None
+
+    @staticmethod
+    def available():
+        """Method for checking whether or not the backend can be used in the
+        running environment.
+
+        Returns:
+            bool: True if the backend can be used, False otherwise
+        """
+        return True
+
+    def capture(self, region):
+        """Method for capturing the specified region of the screen.
+
+        Args:
+            region (Region): Region to capture
+
+        Returns:
+            ScreenImage: the captured image
+        """
+        raise NotImplementedError
+
+    def find(self, screen_image, target):
+        """Method for finding the best match of an asset in a captured image.
+
+        Args:
+            screen_image (ScreenImage): image to search in
+            target (str, Pattern): the filename of the asset or Pattern to
+                search for
+
+        Returns:
+            Match: Match instance if the asset was found, None otherwise
+        """
+        raise NotImplementedError
+
+    def find_all(self, screen_image, target):
+        """Method for finding all matches of an asset in a captured image.
+
+        Args:
+            screen_image (ScreenImage): image to search in
+            target (str, Pattern): the filename of the asset or Pattern to
+                search for
+
+        Returns:
+            list: list of all Matches of the asset in the image
+        """
+        raise NotImplementedError
+
+    def exists(self, region, target, seconds=None):
+        """Method for checking for the existence of an asset on the live
+        screen, waiting up to the specified time for it to appear.
+
+        Args:
+            region (Region): Region to conduct the search in
+            target (str, Pattern): the filename of the asset or Pattern to
+                search for
+            seconds (int, optional): max amount of time (in seconds) to wait
+                for the asset; defaults to the region's auto wait timeout
+
+        Returns:
+            Match: Match instance if the asset was found, None otherwise
+        """
+        if seconds is None:
+            seconds = region.getAutoWaitTimeout()
+        end_time = datetime.now() + timedelta(seconds=seconds)
+        while True:
+            match = self.find(self.capture(region), target)
+            if match or datetime.now() >= end_time:
+                return match
+            sleep(1.0 / Globals.SIKULI_SCANRATE)
+
+    def wait(self, region, target, seconds=None):
+        """Method for waiting for an asset to appear on the live screen.
+
+        Args:
+            region (Region): Region to conduct the search in
+            target (str, Pattern): the filename of the asset or Pattern to
+                search for
+            seconds (int, optional): max amount of time (in seconds) to wait
+                for the asset; defaults to the region's auto wait timeout
+
+        Returns:
+            Match: Match instance of the asset
+
+        Raises:
+            FindFailed: the asset did not appear before the timeout
+        """
+        match = self.exists(region, target, seconds)
+        if not match:
+            raise FindFailed("{} not found in {}".format(target, region))
+        return match
+
+    def find_all_live(self, region, target):
+        """Method for finding all matches of an asset on the live screen.
+
+        Args:
+            region (Region): Region to conduct the search in
+            target (str, Pattern): the filename of the asset or Pattern to
+                search for
+
+        Returns:
+            list: list of all Matches of the asset in the region
+        """
+        return self.find_all(self.capture(region), target)
+
+    def text(self, region):
+        """Method for reading the text in the specified region of the live
+        screen.
+
+        Args:
+            region (Region): Region to read
+
+        Returns:
+            str: the read text
+        """
+        return region.text()
+
+    def read(self, screen_image):
+        """Method for reading the text in a captured image, so that the text
+        is guaranteed to be that of the image.
+
+        Args:
+            screen_image (ScreenImage): image to read
+
+        Returns:
+            str: the read text
+        """
+        return TextRecognizer.getInstance().recognize(screen_image.getImage())
+
+
+class SikuliBackend(VisionBackend):
+    """Vision backend conducting everything through sikuli's own Region and
+    Finder methods.
+    """
+
+    name = 'sikuli'
+
+    def capture(self, region):
+        return region.getScreen().capture(region)
+
+    def find(self, screen_image, target):
+        finder = self._finder(screen_image)
+        finder.find(target)
+        match = finder.next() if finder.hasNext() else None
+        finder.destroy()
+        return match
+
+    def find_all(self, screen_image, target):
+        finder = self._finder(screen_image)
+        finder.findAll(target)
+        matches = []
+        while finder.hasNext():
+            matches.append(finder.next())
+        finder.destroy()
+        return matches
+
+    def exists(self, region, target, seconds=None):
+        return (
+            region.exists(target) if seconds is None
+            else region.exists(target, seconds))
+
+    def wait(self, region, target, seconds=None):
+        return (
+            region.wait(target) if seconds is None
+            else region.wait(target, seconds))
+
+    def find_all_live(self, region, target):
+        # findAll returns None or raises FindFailed on no matches depending on
+        # the sikuli version: https://bugs.launchpad.net/sikuli/+bug/1677134
+        try:
+            matches = region.findAll(target)
+            return list(matches) if matches is not None else []
+        except FindFailed:
+            return []
+
+    @staticmethod
+    def _finder(screen_image):
+        """Method for generating a Finder over a captured image whose matches
+        are in screen coordinates.
+
+        Args:
+            screen_image (ScreenImage): image to search in
+
+        Returns:
+            Finder: Finder instance
+        """
+        roi = screen_image.getROI()
+        return Finder(
+            screen_image, Region(roi.x, roi.y, roi.width, roi.height))
+
+
+class OpenCVBackend(VisionBackend):
+    """Vision backend conducting template searches on captured images with
+    OpenCV's normalized cross-correlation matching (the OpenCV bindings
+    bundled with SikuliX), capturing the screen and reading text through
+    sikuli. Scores are comparable to, but not identical with, those of
+    sikuli's matcher.
+
+    Attributes:
+        image_templates (OrderedDict): (image, template Mat, width, height)
+            of the most recently searched for in-memory images, keyed by the
+            image's id; at most Globals.IMAGE_TEMPLATE_CACHE_SIZE are held,
+            the least recently used are evicted first
+        templates (dict): (template Mat, width, height) of every asset
+            searched for, keyed by (asset filename, width, height)
+    """
+
+    name = 'opencv'
+
+    def __init__(self):
+        self.templates = {}
+        self.image_templates = OrderedDict()
+        self._image_templates_lock = Lock()
+
+    @staticmethod
+    def available():
+        return Core is not None
+
+    def capture(self, region):
+        return region.getScreen().capture(region)
+
+    def find(self, screen_image, target):
+        matches = self._match(screen_image, target, 1)
+        return matches[0] if matches else None
+
+    def find_all(self, screen_image, target):
+        return self._match(screen_image, target, None)
+
+    def _match(self, screen_image, target, limit):
+        """Method for matching an asset against a captured image, picking the
+        best remaining location and suppressing its surroundings until no
+        location scores at or above the asset's similarity.
+
+        Args:
+            screen_image (ScreenImage): image to search in
+            target (str, Pattern): the filename of the asset or Pattern to
+                search for
+            limit (int): max number of matches to return; no limit if None
+
+        Returns:
+            list: list of Matches, best first
+        """
+        pattern = Pattern(target)
+        template, width, height = self._template(pattern)
+        image = screen_image.getImage()
+        if (template is None or width > image.getWidth()
+                or height > image.getHeight()):
+            return []
+        result = Mat()
+        Imgproc.matchTemplate(
+            self._to_mat(image), template, result, Imgproc.TM_CCOEFF_NORMED)
+
+        roi = screen_image.getROI()
+        offset = pattern.getTargetOffset()
+        matches = []
+        while limit is None or len(matches) < limit:
+            best = Core.minMaxLoc(result)
+            if best.maxVal < pattern.getSimilar():
+                break
+            x = int(best.maxLoc.x)
+            y = int(best.maxLoc.y)
+            match = Match(
+                Region(roi.x + x, roi.y + y, width, height), best.maxVal)
+            match.setTargetOffset(offset)
+            matches.append(match)
+            # suppress every location overlapping the match by more than half
+            result.submat(
+                max(y - height / 2, 0),
+                min(y + height / 2 + 1, result.rows()),
+                max(x - width / 2, 0),
+                min(x + width / 2 + 1, result.cols())).setTo(Scalar(-1))
+        return matches
+
+    def _template(self, pattern):
+        """Method for generating (or returning the stored) template Mat of an
+        asset.
+
+        Args:
+            pattern (Pattern): Pattern of the asset
+
+        Returns:
+            tuple: template Mat (None if the asset could not be loaded),
+                width, and height
+        """
+        image = pattern.getBImage()
+        if image is None:
+            return (None, 0, 0)
+        if not pattern.getFilename():
+            # Pattern of an in-memory image; key it by the image's identity,
+            # holding on to the image so that its id is not reused while the
+            # template is held
+            key = id(image)
+            with self._image_templates_lock:
+                if key in self.image_templates:
+                    entry = self.image_templates.pop(key)
+                else:
+                    entry = (
+                        image, self._to_mat(image), image.getWidth(),
+                        image.getHeight())
+                self.image_templates[key] = entry
+                while (len(self.image_templates)
+                        > Globals.IMAGE_TEMPLATE_CACHE_SIZE):
+                    self.image_templates.popitem(last=False)
+            return entry[1:]
+        key = (pattern.getFilename(), image.getWidth(), image.getHeight())
+        if key not in self.templates:
+            self.templates[key] = (
+                self._to_mat(image), image.getWidth(), image.getHeight())
+        return self.templates[key]
+
+    @staticmethod
+    def _to_mat(image):
+        """Method for converting an image to a 3-channel OpenCV Mat. The image
+        is always drawn onto a new BGR image of its exact size first: the
+        data buffer of a subimage (eg. of a captured frame) is that of its
+        whole parent image, whatever the subimage's type.
+
+        Args:
+            image (BufferedImage): image to convert
+
+        Returns:
+            Mat: converted image
+        """
+        converted = BufferedImage(
+            image.getWidth(), image.getHeight(), BufferedImage.TYPE_3BYTE_BGR)
+        graphics = converted.createGraphics()
+        graphics.drawImage(image, 0, 0, None)
+        graphics.dispose()
+        mat = Mat(image.getHeight(), image.getWidth(), CvType.CV_8UC3)
+        mat.put(0, 0, converted.getRaster().getDataBuffer().getData())
+        return mat
+
+
+# available backends, keyed by the name they are selected by in the config
+BACKENDS = dict(
+    (backend.name, backend) for backend in (SikuliBackend, OpenCVBackend))
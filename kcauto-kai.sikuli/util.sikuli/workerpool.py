@@ -0,0 +1,204 @@
+import sys
+from threading import Event, Lock, Thread, current_thread
+from Queue import Queue
+from datetime import datetime
+from kca_globals import Globals
+
+
+class Future(object):
+    """Result of a task submitted to a WorkerPool.
+
+    Attributes:
+        submitted (datetime): when the task was submitted
+    """
+
+    def __init__(self):
+        self.submitted = datetime.now()
+        self._done = Event()
+        self._result = None
+        self._exception = None
+
+    def done(self):
+        """Method for checking whether or not the task has finished.
+
+        Returns:
+            bool: True if the task has finished, False otherwise
+        """
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """Method for waiting for and returning the result of the task.
+
+        Args:
+            timeout (int, optional): max amount of time (in seconds) to wait
+                for the task; waits indefinitely if None
+
+        Returns:
+            object: return value of the task
+
+        Raises:
+            RuntimeError: the task did not finish before the timeout
+            Exception: anything raised by the task (including Java
+                Throwables) is re-raised
+        """
+        if not self._done.wait(timeout):
+            raise RuntimeError("Task did not finish within {} seconds".format(
+                timeout))
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def _set(self, result=None, exception=None):
+        self._result = result
+        self._exception = exception
+        self._done.set()
+
+
+class WorkerPool(object):
+    """Bounded pool of persistent worker threads for running short, parallel
+    screen searches. Tasks are submitted as callables and return Futures, so
+    results are passed back instead of being written into shared state.
+    Tasks submitted from a worker thread are run inline to avoid deadlocking
+    the pool on nested submissions.
+
+    Attributes:
+        size (int): number of worker threads
+        stats (dict): task counts, max queue depth, and total and max queue
+            wait and run times (in seconds) since the pool was created
+    """
+
+    _shared = None
+
+    def __init__(self, size):
+        """Initializes the WorkerPool. Worker threads are started on the first
+        submission.
+
+        Args:
+            size (int): number of worker threads
+        """
+        self.size = size
+        self.stats = {
+            'tasks': 0, 'max_depth': 0, 'wait': 0.0, 'max_wait': 0.0,
+            'run': 0.0, 'max_run': 0.0}
+        self._queue = Queue()
+        self._lock = Lock()
+        self._workers = []
+
+    @classmethod
+    def shared(cls):
+        """Method for returning the pool shared program-wide, sized by
+        Globals.WORKER_POOL_SIZE.
+
+        Returns:
+            WorkerPool: the shared pool
+        """
+        if cls._shared is None:
+            cls._shared = cls(Globals.WORKER_POOL_SIZE)
+        return cls._shared
+
+    def submit(self, func, *args, **kwargs):
+        """Method for submitting a task to the pool.
+
+        Args:
+            func (function): function to run
+            *args: positional arguments to run the function with
+            **kwargs: keyword arguments to run the function with
+
+        Returns:
+            Future: Future of the function's return value
+        """
+        future = Future()
+        if current_thread() in self._workers:
+            self._run(future, func, args, kwargs)
+            return future
+        self._start_workers()
+        self._queue.put((future, func, args, kwargs))
+        with self._lock:
+            self.stats['max_depth'] = max(
+                self.stats['max_depth'], self._queue.qsize())
+        return future
+
+    def map(self, func, *iterables):
+        """Method for running a function over every item of one or more
+        iterables in parallel and waiting for all the results.
+
+        Args:
+            func (function): function to run
+            *iterables: iterables of the arguments to run the function with
+
+        Returns:
+            list: return values of the function, in the order of the items
+        """
+        futures = [self.submit(func, *args) for args in zip(*iterables)]
+        return [future.result() for future in futures]
+
+    def queue_depth(self):
+        """Method for returning the number of tasks waiting for a worker.
+
+        Returns:
+            int: number of queued tasks
+        """
+        return self._queue.qsize()
+
+    def summary(self):
+        """Method for summarizing the pool's task latency.
+
+        Returns:
+            str: summary, or None if no tasks were run
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        if not stats['tasks']:
+            return None
+        return (
+            "Worker pool: {} tasks, {:.1f}ms mean/{:.1f}ms max queue wait, "
+            "{:.1f}ms mean/{:.1f}ms max run time, max queue depth {}".format(
+                stats['tasks'], stats['wait'] / stats['tasks'] * 1000,
+                stats['max_wait'] * 1000, stats['run'] / stats['tasks'] * 1000,
+                stats['max_run'] * 1000, stats['max_depth']))
+
+    def _start_workers(self):
+        """Method for starting the worker threads, if not yet started.
+        """
+        with self._lock:
+            while len(self._workers) < self.size:
+                worker = Thread(target=self._work)
+                worker.daemon = True
+                self._workers.append(worker)
+                worker.start()
+
+    def _work(self):
+        """Method run by each worker thread; runs queued tasks forever.
+        """
+        while True:
+            future, func, args, kwargs = self._queue.get()
+            self._run(future, func, args, kwargs)
+
+    def _run(self, future, func, args, kwargs):
+        """Method for running a task, resolving its Future, and recording its
+        latency.
+
+        Args:
+            future (Future): Future of the task
+            func (function): function to run
+            args (tuple): positional arguments to run the function with
+            kwargs (dict): keyword arguments to run the function with
+        """
+        start = datetime.now()
+        result = exception = None
+        try:
+            result = func(*args, **kwargs)
+        except:  # noqa
+            # not only Exceptions: under Jython, Java Throwables (eg.
+            # FindFailed) do not derive from Exception, and the Future has to
+            # be resolved whatever the task raised
+            exception = sys.exc_info()[1]
+        wait = (start - future.submitted).total_seconds()
+        run = (datetime.now() - start).total_seconds()
+        with self._lock:
+            self.stats['tasks'] += 1
+            self.stats['wait'] += wait
+            self.stats['max_wait'] = max(self.stats['max_wait'], wait)
+            self.stats['run'] += run
+            self.stats['max_run'] = max(self.stats['max_run'], run)
+        future._set(result, exception)
@@ -0,0 +1,84 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+BUNDLE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'kcauto-kai.sikuli')
+sys.path.insert(0, BUNDLE_PATH)
+
+import replay  # noqa
+
+replay.install(replay.ReplaySession({
+    'start': 'home',
+    'states': {
+        'home': {
+            'assets': {'kc_reference_point.png': [[99, 0, 30, 30]]}}}}))
+
+from config import Config  # noqa
+from main import KCAutoKai  # noqa
+from quest import QuestModule, get_quest_info  # noqa
+from scheduler import Scheduler  # noqa
+from statestore import StateStore  # noqa
+
+
+class TestRefreshConfig(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.temp_path = tempfile.mkdtemp()
+        self.config_path = os.path.join(self.temp_path, 'config.ini')
+        with open(os.path.join(BUNDLE_PATH, '..', 'config.ini')) as base:
+            config = base.read()
+        config = config.replace(
+            '[ScheduledSleep]\nEnabled: True',
+            '[ScheduledSleep]\nEnabled: False')
+        config = config.replace(
+            '[Combat]\nEnabled: False', '[Combat]\nEnabled: True')
+        self._write_config(config)
+        Scheduler.reset()
+        StateStore.reset()
+        self.kcauto_kai = KCAutoKai(Config(self.config_path))
+        self.kcauto_kai.refresh_config()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_path)
+
+    def _write_config(self, config):
+        with open(self.config_path, 'w') as config_file:
+            config_file.write(config)
+        # force a new file stamp even if the size did not change
+        stamp = getattr(self, 'stamp', 1000000000) + 1
+        os.utime(self.config_path, (stamp, stamp))
+        self.stamp = stamp
+
+    def test_combat_map_change_keeps_quest_checkpoints(self):
+        quest = self.kcauto_kai.modules['quest']
+        quest.combat_checkpoints = [5, 10]
+        quest.pvp_checkpoints = [3]
+        quest.expedition_checkpoints = [2]
+        quest.loop_checkpoint = 7
+        with open(self.config_path) as config_file:
+            config = config_file.read()
+        self._write_config(config.replace('Map: 1-1', 'Map: 2-5'))
+        self.kcauto_kai.refresh_config()
+
+        self.assertIs(self.kcauto_kai.modules['quest'], quest)
+        self.assertEqual(quest.combat_checkpoints, [5, 10])
+        self.assertEqual(quest.pvp_checkpoints, [3])
+        self.assertEqual(quest.expedition_checkpoints, [2])
+        self.assertEqual(quest.loop_checkpoint, 7)
+        # the quest list is redefined for the new map, not appended to
+        fresh_quest = QuestModule(
+            self.kcauto_kai.config, self.kcauto_kai.stats,
+            self.kcauto_kai.regions)
+        self.assertIn(get_quest_info('bm1'), quest.quest_list)
+        self.assertEqual(quest.quest_list, fresh_quest.quest_list)
+        self.assertEqual(
+            quest.active_quest_types, fresh_quest.active_quest_types)
+
+
+if __name__ == '__main__':
+    unittest.main()
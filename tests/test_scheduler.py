@@ -0,0 +1,54 @@
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'kcauto-kai.sikuli'))
+
+from scheduler import Scheduler  # noqa
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        Scheduler.reset()
+        self.now = datetime(2018, 1, 1, 12)
+
+    def tearDown(self):
+        Scheduler.reset()
+
+    def test_queue_bounded_across_reschedules(self):
+        for minutes in range(1000):
+            Scheduler.schedule(
+                'combat', self.now + timedelta(minutes=minutes % 7))
+            Scheduler.schedule(
+                'pvp', self.now + timedelta(minutes=1000 - minutes))
+            if minutes % 3 == 0:
+                Scheduler.unschedule('expedition_fleet_2')
+            else:
+                Scheduler.schedule(
+                    'expedition_fleet_2', self.now + timedelta(minutes=3))
+            self.assertLessEqual(len(Scheduler.queue), 3)
+        self.assertEqual(
+            Scheduler.next_deadline(), self.now + timedelta(minutes=1))
+
+    def test_next_deadline_after(self):
+        for task, minutes in (
+                ('combat', 5), ('pvp', 1), ('repair', 3), ('quest', 8)):
+            Scheduler.schedule(task, self.now + timedelta(minutes=minutes))
+        Scheduler.schedule('repair', self.now + timedelta(minutes=10))
+        self.assertEqual(
+            Scheduler.next_deadline(self.now + timedelta(minutes=1)),
+            self.now + timedelta(minutes=5))
+        self.assertEqual(
+            Scheduler.next_deadline(self.now + timedelta(minutes=8)),
+            self.now + timedelta(minutes=10))
+        self.assertIsNone(
+            Scheduler.next_deadline(self.now + timedelta(minutes=10)))
+        self.assertEqual(
+            Scheduler.due(self.now + timedelta(minutes=5)), ['pvp', 'combat'])
+
+
+if __name__ == '__main__':
+    unittest.main()
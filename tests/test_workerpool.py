@@ -0,0 +1,44 @@
+import os
+import sys
+import unittest
+
+BUNDLE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'kcauto-kai.sikuli')
+sys.path.insert(0, BUNDLE_PATH)
+sys.path.insert(0, os.path.join(BUNDLE_PATH, 'util.sikuli'))
+
+from workerpool import WorkerPool  # noqa
+
+
+class Throwable(BaseException):
+    """Stand-in for a Java Throwable, which does not derive from Exception
+    under Jython.
+    """
+
+
+def search(value):
+    if value == 2:
+        raise Throwable('FindFailed')
+    return value * 10
+
+
+class TestWorkerPool(unittest.TestCase):
+    def test_map(self):
+        pool = WorkerPool(2)
+        self.assertEqual(pool.map(search, [0, 1, 3]), [0, 10, 30])
+
+    def test_non_exception_error_resolves_future(self):
+        pool = WorkerPool(2)
+        future = pool.submit(search, 2)
+        # a worker that lets the error escape never resolves the Future
+        with self.assertRaises(Throwable):
+            future.result(5)
+        with self.assertRaises(Throwable):
+            pool.map(search, [1, 2, 3])
+        # the workers survive the error
+        self.assertEqual(pool.map(search, [1, 3]), [10, 30])
+
+
+if __name__ == '__main__':
+    unittest.main()